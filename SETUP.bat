@@ -12,6 +12,9 @@ call venv\Scripts\activate.bat
 echo Installing dependencies...
 pip install --upgrade pip
 pip install flask flask-cors flask-sqlalchemy marshmallow==3.20.1 flask-marshmallow==1.2.0 marshmallow-sqlalchemy==1.0.0 python-dotenv scikit-learn pandas numpy joblib python-dateutil werkzeug requests
+echo Creating database...
+flask --app app upgrade-db
+flask --app app seed-db
 echo.
 echo Backend setup complete!
 echo.
@@ -1,8 +1,14 @@
+import click
 from flask import Flask, jsonify
 from flask_cors import CORS
-from config import Config
+from config import get_config
 from models import db
 from schemas import ma
+import response_cache
+import sqlite_pragmas
+import metrics
+import logging_config
+import profiler
 import os
 
 # Import blueprints
@@ -11,15 +17,22 @@ from routes.category_routes import categories_bp
 from routes.expense_routes import expenses_bp
 from routes.budget_routes import budgets_bp
 from routes.prediction_routes import predictions_bp
+from routes.dashboard_routes import dashboard_bp
 
-def create_app(config_class=Config):
+def create_app(config_class=None):
     app = Flask(__name__)
-    app.config.from_object(config_class)
+    # Default: APP_CONFIG environment variable ('development' or 'production')
+    app.config.from_object(config_class or get_config())
+    logging_config.init_app(app)
     
     # Initialize extensions
     db.init_app(app)
+    sqlite_pragmas.init_app(app)
     ma.init_app(app)
     CORS(app)
+    response_cache.init_app(app)
+    metrics.init_app(app)
+    profiler.init_app(app)
     
     # Register blueprints
     app.register_blueprint(users_bp, url_prefix='/api')
@@ -27,6 +40,14 @@ def create_app(config_class=Config):
     app.register_blueprint(expenses_bp, url_prefix='/api')
     app.register_blueprint(budgets_bp, url_prefix='/api')
     app.register_blueprint(predictions_bp, url_prefix='/api')
+    app.register_blueprint(dashboard_bp, url_prefix='/api')
+    
+    # Warm the model registry so the first predictions skip the cold load
+    if app.config.get('ML_PRELOAD_MODELS'):
+        from ml_service import budget_prediction_service
+        with app.app_context():
+            loaded = budget_prediction_service.registry.preload(app.config.get('ML_PRELOAD_LIMIT'))
+        print(f"Preloaded {loaded} prediction models")
     
     # Root route
     @app.route('/')
@@ -39,15 +60,56 @@ def create_app(config_class=Config):
                 'categories': '/api/categories',
                 'expenses': '/api/expenses',
                 'budgets': '/api/budgets',
-                'predictions': '/api/predictions'
+                'predictions': '/api/predictions',
+                'dashboard': '/api/dashboard'
             }
         })
     
+    # CLI: flask --app app upgrade-db
+    @app.cli.command('upgrade-db')
+    def upgrade_db_command():
+        """Apply pending database schema migrations"""
+        from migrations import upgrade
+        applied = upgrade()
+        print(f"Applied migrations: {applied}" if applied else "Database schema is up to date")
+    
+    # CLI: flask --app app rebuild-rollups [--user-id N]
+    @app.cli.command('rebuild-rollups')
+    @click.option('--user-id', type=int, multiple=True, help='Only rebuild these users')
+    def rebuild_rollups_command(user_id):
+        """Rebuild the daily spend rollup from raw expenses"""
+        import rollups
+        from data_versions import bump, user_scope
+        from models import User
+        count = rollups.rebuild(list(user_id) or None)
+        # Rebuilt totals may differ from what clients hold, so invalidate their validators
+        user_ids = list(user_id) or db.session.scalars(db.select(User.id)).all()
+        bump(*[user_scope(u) for u in user_ids])
+        db.session.commit()
+        print(f"Rebuilt {count} daily spend rows")
+    
+    # CLI: flask --app app seed-db
+    @app.cli.command('seed-db')
+    def seed_db_command():
+        """Insert the default categories and standard descriptions"""
+        from seed import seed_defaults
+        categories, descriptions = seed_defaults()
+        db.session.commit()
+        print(f"Created {categories} categories and {descriptions} standard descriptions")
+    
     # Health check route
     @app.route('/health')
     def health():
         return jsonify({'status': 'healthy'}), 200
     
+    # Response cache hit/miss metrics
+    @app.route('/api/cache/stats')
+    def cache_stats():
+        return jsonify({
+            'success': True,
+            'data': response_cache.get_cache().stats()
+        }), 200
+    
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
@@ -61,68 +123,8 @@ def create_app(config_class=Config):
     return app
 
 if __name__ == '__main__':
+    # Schema and default data are one-off steps:
+    #   flask --app app upgrade-db
+    #   flask --app app seed-db
     app = create_app()
-    
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        print("Database tables created successfully!")
-        
-        # Initialize with default categories if empty
-        from models import Category, StandardDescription
-        
-        if Category.query.count() == 0:
-            default_categories = [
-                {'name': 'Food & Dining', 'icon': '🍔', 'color': '#ef4444'},
-                {'name': 'Transportation', 'icon': '🚗', 'color': '#3b82f6'},
-                {'name': 'Shopping', 'icon': '🛍️', 'color': '#8b5cf6'},
-                {'name': 'Entertainment', 'icon': '🎬', 'color': '#ec4899'},
-                {'name': 'Bills & Utilities', 'icon': '⚡', 'color': '#f59e0b'},
-                {'name': 'Healthcare', 'icon': '🏥', 'color': '#10b981'},
-                {'name': 'Education', 'icon': '📚', 'color': '#6366f1'},
-                {'name': 'Travel', 'icon': '✈️', 'color': '#14b8a6'},
-                {'name': 'Housing', 'icon': '🏠', 'color': '#f97316'},
-                {'name': 'Groceries', 'icon': '🛒', 'color': '#22c55e'},
-                {'name': 'Personal Care', 'icon': '💅', 'color': '#a855f7'},
-                {'name': 'Others', 'icon': '📝', 'color': '#64748b'}
-            ]
-            
-            for cat_data in default_categories:
-                category = Category(**cat_data)
-                db.session.add(category)
-            
-            db.session.commit()
-            print("Default categories created!")
-            
-            # Add standard descriptions for each category
-            standard_descriptions = {
-                'Food & Dining': ['Restaurant', 'Fast Food', 'Coffee Shop', 'Home Delivery', 'Other'],
-                'Transportation': ['Fuel/Gas', 'Public Transit', 'Taxi/Uber', 'Parking', 'Vehicle Maintenance', 'Other'],
-                'Shopping': ['Clothing', 'Electronics', 'Home Items', 'Gifts', 'Online Shopping', 'Other'],
-                'Entertainment': ['Movies', 'Concerts', 'Streaming Services', 'Games', 'Sports', 'Other'],
-                'Bills & Utilities': ['Electricity', 'Water', 'Internet', 'Phone Bill', 'Insurance', 'Other'],
-                'Healthcare': ['Doctor Visit', 'Medicines', 'Lab Tests', 'Hospital', 'Pharmacy', 'Other'],
-                'Education': ['Tuition Fees', 'Books', 'Courses', 'Supplies', 'Other'],
-                'Travel': ['Flight', 'Hotel', 'Vacation', 'Travel Insurance', 'Other'],
-                'Housing': ['Rent', 'Mortgage', 'Property Tax', 'Home Maintenance', 'Other'],
-                'Groceries': ['Supermarket', 'Local Market', 'Organic Store', 'Other'],
-                'Personal Care': ['Salon', 'Gym', 'Spa', 'Cosmetics', 'Other'],
-                'Others': ['Miscellaneous', 'Other']
-            }
-            
-            categories = Category.query.all()
-            for category in categories:
-                if category.name in standard_descriptions:
-                    for desc in standard_descriptions[category.name]:
-                        std_desc = StandardDescription(
-                            category_id=category.id,
-                            description=desc,
-                            is_active=True
-                        )
-                        db.session.add(std_desc)
-            
-            db.session.commit()
-            print("Standard descriptions created!")
-    
-    # Run the app
     app.run(debug=True, host='0.0.0.0', port=5000)
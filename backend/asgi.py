@@ -0,0 +1,53 @@
+"""
+ASGI entry point.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+Serves the same Flask app and blueprints as ``app.py``. The event loop owns
+the sockets, so idle keep-alive connections and slow clients cost no
+thread; each request runs on a bounded thread pool (a2wsgi). Prediction
+routes, which spend their time in CPU-bound model code, get their own
+smaller pool so they cannot occupy every thread while cheap expense,
+budget and dashboard requests wait. Model training already runs in the
+training job process pool.
+
+The database layer stays synchronous: SQLite has no asynchronous driver
+(aiosqlite also runs sqlite3 calls on a thread), so an async session would
+only move the same blocking calls onto a different thread pool.
+"""
+
+from a2wsgi import WSGIMiddleware
+from app import create_app
+
+# Requests under these paths run on the ML executor
+ML_PATH_PREFIXES = ('/api/predictions',)
+
+
+def create_asgi_app(flask_app=None):
+    """Wrap a Flask app (default: create_app()) for an ASGI server"""
+    flask_app = flask_app or create_app()
+    io_app = WSGIMiddleware(flask_app, workers=flask_app.config.get('ASGI_WORKERS', 32))
+    ml_app = WSGIMiddleware(flask_app, workers=flask_app.config.get('ASGI_ML_WORKERS', 4))
+
+    async def asgi_app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    io_app.executor.shutdown(wait=False)
+                    ml_app.executor.shutdown(wait=False)
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+
+        if scope['type'] == 'http' and scope['path'].startswith(ML_PATH_PREFIXES):
+            await ml_app(scope, receive, send)
+        else:
+            await io_app(scope, receive, send)
+
+    asgi_app.flask_app = flask_app
+    return asgi_app
+
+
+app = create_asgi_app()
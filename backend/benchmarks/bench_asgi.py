@@ -0,0 +1,181 @@
+"""
+Load test: WSGI servers vs. the ASGI entry point under mixed traffic
+
+Seeds a temporary database (and trains user 1's model), then starts each
+server as one worker process on it and drives it with --connections
+keep-alive clients sending a weighted mix of dashboard, expense list,
+expense create, budget status and prediction requests for --seconds,
+plus --idle connections that stay open without sending anything.
+Reports throughput, p50/p95/p99 latency, p99 for predictions and for all
+other routes, failed requests, idle connections accepted, and the
+worker's peak thread count and RSS.
+
+Servers: "werkzeug" (app.run, threaded; the current entry point),
+"gunicorn" (-k gthread, one worker, --threads threads) and "asgi"
+(uvicorn asgi:app, one worker); the last two only if installed.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_asgi
+    python -m benchmarks.bench_asgi --connections 200 --idle 500 --seconds 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+from benchmarks.loadtest import (
+    BACKEND_DIR, SERVER_MODULES, process_stats, request, start_server, stop_server
+)
+
+# (name, weight, method, path, body)
+WORKLOAD = [
+    ('dashboard', 35, 'GET', '/api/dashboard?user_id=1&days=30', None),
+    ('expenses', 25, 'GET', '/api/expenses?user_id=1&limit=50', None),
+    ('create', 15, 'POST', '/api/expenses', lambda: {
+        'user_id': 1, 'category_id': 1, 'amount': 9.99, 'description': 'load',
+        'date': datetime.utcnow().isoformat()
+    }),
+    ('budgets', 10, 'GET', '/api/budgets/status?user_id=1', None),
+    ('predict', 15, 'POST', '/api/predictions/predict', lambda: {'user_id': 1, 'period': 'monthly'})
+]
+
+
+def seed(env, expenses):
+    """Create the schema, default data and expenses, and train user 1's model"""
+    script = (
+        'from app import create_app\n'
+        'from migrations import upgrade\n'
+        'from seed import seed_defaults\n'
+        'from benchmarks.common import seed_expenses\n'
+        'from ml_service import budget_prediction_service\n'
+        'app = create_app()\n'
+        'with app.app_context():\n'
+        '    upgrade()\n'
+        '    seed_defaults()\n'
+        f'    seed_expenses({expenses}, 365)\n'
+        '    ok, _ = budget_prediction_service.train_model(1)\n'
+        '    assert ok, "training failed"\n'
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+async def client(port, deadline, results, rng):
+    names = [w[0] for w in WORKLOAD]
+    weights = [w[1] for w in WORKLOAD]
+    by_name = {w[0]: w for w in WORKLOAD}
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        _, _, method, path, body = by_name[name]
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            status, keep_alive, _ = await asyncio.wait_for(
+                request(reader, writer, method, path, body() if body else None), timeout=30)
+            if not keep_alive:
+                writer.close()
+                writer = None
+            ok = status < 500
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            ok = False
+            if writer is not None:
+                writer.close()
+            writer = None
+        results.append((name, time.perf_counter() - start, ok))
+    if writer is not None:
+        writer.close()
+
+
+async def idle_connection(port, deadline, opened):
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    except OSError:
+        return
+    opened.append(1)
+    await asyncio.sleep(max(0.0, deadline - time.perf_counter()))
+    writer.close()
+
+
+async def sample_peak(pid, deadline, peak):
+    while time.perf_counter() < deadline:
+        threads, rss = process_stats(pid)
+        peak[0], peak[1] = max(peak[0], threads), max(peak[1], rss)
+        await asyncio.sleep(0.5)
+
+
+async def drive(port, pid, args):
+    results, opened, peak = [], [], [0, 0.0]
+    deadline = time.perf_counter() + args.seconds
+    rng = random.Random(7)
+    tasks = [idle_connection(port, deadline, opened) for _ in range(args.idle)]
+    tasks += [client(port, deadline, results, random.Random(rng.random())) for _ in range(args.connections)]
+    tasks.append(sample_peak(pid, deadline, peak))
+    await asyncio.gather(*tasks)
+    return results, len(opened), peak
+
+
+def report(server, results, idle_opened, threads, rss, args):
+    ok = [r for r in results if r[2]]
+    failed = len(results) - len(ok)
+    latency = np.array([r[1] for r in ok]) * 1000 if ok else np.zeros(1)
+    predict = np.array([r[1] for r in ok if r[0] == 'predict'] or [0]) * 1000
+    other = np.array([r[1] for r in ok if r[0] != 'predict'] or [0]) * 1000
+    p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+    print(f"{server:<9} {len(ok) / args.seconds:>7.1f} {p50:>7.1f} {p95:>7.1f} {p99:>8.1f} "
+          f"{np.percentile(other, 99):>10.1f} {np.percentile(predict, 99):>12.1f} {failed:>7} "
+          f"{f'{idle_opened}/{args.idle}':>10} {threads:>8} {rss:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--servers', default='werkzeug,gunicorn,asgi')
+    parser.add_argument('--connections', type=int, default=64, help='active keep-alive clients')
+    parser.add_argument('--idle', type=int, default=200, help='idle keep-alive connections')
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn gthread threads')
+    parser.add_argument('--expenses', type=int, default=20_000)
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    servers = []
+    for name in args.servers.split(','):
+        try:
+            __import__(SERVER_MODULES[name])
+            servers.append(name)
+        except ImportError:
+            print(f"skipping {name}: {SERVER_MODULES[name]} is not installed")
+
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ,
+               DATABASE_URL='sqlite:///' + os.path.join(workdir, 'load.db'),
+               ML_MODEL_DIR=os.path.join(workdir, 'models'),
+               RESPONSE_CACHE_BACKEND='null',
+               APP_CONFIG='production')
+    try:
+        seed(env, args.expenses)
+        print(f"{args.connections} active + {args.idle} idle connections, {args.seconds:g} s, "
+              f"one worker process per server\n")
+        print(f"{'server':<9} {'req/s':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>8} "
+              f"{'other p99':>10} {'predict p99':>12} {'failed':>7} {'idle held':>10} {'threads':>8} {'RSS MiB':>9}")
+        for server in servers:
+            process = start_server(server, args.port, env, args.threads)
+            try:
+                results, idle_opened, (threads, rss) = asyncio.run(drive(args.port, process.pid, args))
+                report(server, results, idle_opened, threads, rss, args)
+            finally:
+                stop_server(process)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark: bulk expense import vs. one POST per expense
+
+Imports --rows synthetic expenses (a few of them invalid) into a fresh
+temporary SQLite database through POST /api/expenses/bulk, once as a JSON
+array and once as a CSV body, and times --single rows posted one at a
+time to POST /api/expenses for comparison. After each bulk run the daily
+spend rollup is checked against a full rebuild; exits non-zero if they
+differ or the reported counts are wrong.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_bulk_import
+    python -m benchmarks.bench_bulk_import --rows 500000
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import insert, select
+from app import create_app
+from migrations import upgrade
+from models import db, Category, User, DailySpend
+from seed import seed_defaults, DEFAULT_CATEGORIES
+import rollups
+
+CSV_COLUMNS = ('date', 'category', 'amount', 'description', 'notes')
+
+# Every INVALID_EVERY-th row has a bad amount
+INVALID_EVERY = 10_000
+
+
+def make_rows(n, seed=42):
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    offsets = rng.integers(0, 3 * 365 * 24 * 60, n)
+    amounts = rng.gamma(2.0, 25.0, n).round(2)
+    categories = rng.integers(0, len(DEFAULT_CATEGORIES), n)
+
+    rows = []
+    for i, (offset, amount, category) in enumerate(zip(offsets, amounts, categories)):
+        rows.append({
+            'date': (now - timedelta(minutes=int(offset))).isoformat(timespec='seconds'),
+            'category': DEFAULT_CATEGORIES[category]['name'],
+            'amount': 'n/a' if i % INVALID_EVERY == INVALID_EVERY - 1 else str(amount),
+            'description': 'bench',
+            'notes': ''
+        })
+    return rows
+
+
+def to_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def rollup_snapshot():
+    """Rollup rows with totals rounded, since summation order differs"""
+    rows = db.session.execute(select(
+        DailySpend.user_id, DailySpend.category_id, DailySpend.day,
+        DailySpend.total, DailySpend.count, DailySpend.min_amount, DailySpend.max_amount
+    )).all()
+    return sorted((*row[:3], round(row.total, 6), *row[4:]) for row in rows)
+
+
+def fresh_app():
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    class BenchConfig:
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        RESPONSE_CACHE_BACKEND = 'null'
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        upgrade()
+        seed_defaults()
+        db.session.execute(insert(User), [{'username': 'bench', 'email': 'bench@example.com'}])
+        db.session.commit()
+    return app, path
+
+
+def run_bulk(label, body, content_type, expected_failed):
+    app, path = fresh_app()
+    try:
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post('/api/expenses/bulk?user_id=1', data=body, content_type=content_type)
+        elapsed = time.perf_counter() - start
+        result = response.get_json()['data']
+
+        with app.app_context():
+            incremental = rollup_snapshot()
+            rollups.rebuild([1])
+            db.session.commit()
+            consistent = incremental == rollup_snapshot()
+
+        ok = response.status_code == 201 and result['failed'] == expected_failed and consistent
+        print(f"{label:<12} {result['inserted']:>9} {result['failed']:>7} {elapsed:>9.2f} "
+              f"{result['inserted'] / elapsed:>10,.0f}  {'ok' if consistent else 'ROLLUP MISMATCH'}")
+        return ok
+    finally:
+        os.remove(path)
+
+
+def run_single(rows):
+    app, path = fresh_app()
+    try:
+        client = app.test_client()
+        with app.app_context():
+            category_ids = dict(db.session.execute(select(Category.name, Category.id)).all())
+
+        inserted = 0
+        start = time.perf_counter()
+        for row in rows:
+            response = client.post('/api/expenses', json={
+                'user_id': 1,
+                'category_id': category_ids[row['category']],
+                'amount': row['amount'],
+                'description': row['description'],
+                'date': row['date']
+            })
+            inserted += response.status_code == 201
+        elapsed = time.perf_counter() - start
+
+        print(f"{'single POST':<12} {inserted:>9} {len(rows) - inserted:>7} {elapsed:>9.2f} "
+              f"{inserted / elapsed:>10,.0f}")
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--single', type=int, default=1_000, help='rows posted one at a time (0 skips)')
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    invalid = args.rows // INVALID_EVERY
+
+    print(f"{'mode':<12} {'inserted':>9} {'failed':>7} {'time (s)':>9} {'rows/s':>10}")
+    ok = run_bulk('bulk JSON', json.dumps(rows), 'application/json', invalid)
+    ok = run_bulk('bulk CSV', to_csv(rows), 'text/csv', invalid) and ok
+    if args.single:
+        run_single([row for row in rows[:args.single] if row['amount'] != 'n/a'])
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Load test: repeated dashboard loads with and without the response cache
+
+Seeds a temporary SQLite database, then has --threads clients load
+/api/dashboard (plus the summary and budget status it is usually shown
+with) --requests times each, without validators so every load reaches
+the cache. Every --write-every requests a client adds an expense, which
+bumps the user's data version and invalidates their cached responses.
+Runs once with the 'null' backend and once with the in-process 'memory'
+backend and reports latency percentiles and the cache hit rate.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_cache
+    python -m benchmarks.bench_cache --expenses 50000 --threads 8 --requests 200
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+import numpy as np
+from app import create_app
+from migrations import upgrade
+from seed import seed_defaults
+from benchmarks.common import seed_expenses
+
+PATHS = [
+    '/api/dashboard?user_id=1&days=30',
+    '/api/expenses/summary?user_id=1&days=30',
+    '/api/budgets/status?user_id=1'
+]
+
+
+def client_loop(app, requests, write_every, timings):
+    client = app.test_client()
+    for i in range(requests):
+        if write_every and i and i % write_every == 0:
+            client.post('/api/expenses', json={
+                'user_id': 1,
+                'category_id': 1,
+                'amount': 12.5,
+                'date': datetime.utcnow().isoformat()
+            })
+        path = PATHS[i % len(PATHS)]
+        start = time.perf_counter()
+        response = client.get(path)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, (path, response.status_code)
+
+
+def run(path, backend, args):
+    class BenchConfig:
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        RESPONSE_CACHE_BACKEND = backend
+
+    app = create_app(BenchConfig)
+    timings = []
+    threads = [threading.Thread(target=client_loop, args=(app, args.requests, args.write_every, timings))
+               for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        from response_cache import get_cache
+        stats = get_cache().stats()
+
+    p50, p95, p99 = np.percentile(np.array(timings) * 1000, [50, 95, 99])
+    return p50, p95, p99, stats['hit_rate']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--expenses', type=int, default=20_000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=150, help='requests per client')
+    parser.add_argument('--write-every', type=int, default=50, help='0 disables writes')
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        class SeedConfig:
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+        with create_app(SeedConfig).app_context():
+            upgrade()
+            seed_defaults()
+            seed_expenses(args.expenses, 90)
+
+        print(f"{args.expenses} expenses, {args.threads} clients x {args.requests} requests, "
+              f"write every {args.write_every or 'never'}\n")
+        print(f"{'backend':<8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'hit rate':>9}")
+        for backend in ('null', 'memory'):
+            p50, p95, p99, hit_rate = run(path, backend, args)
+            print(f"{backend:<8} {p50:>9.2f} {p95:>9.2f} {p99:>9.2f} {hit_rate:>9.1%}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
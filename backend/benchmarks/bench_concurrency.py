@@ -0,0 +1,173 @@
+"""
+Benchmark: concurrent expense writers and dashboard readers on SQLite
+
+Seeds a temporary database, then for --seconds runs --writers processes
+posting expenses and --readers processes loading /api/dashboard (response
+cache off, so every read queries the database), like separate server
+workers sharing one database file. Runs once with the
+default Config (rollback journal, default pool) and once with
+ProductionConfig (WAL, synchronous=NORMAL, busy_timeout, mmap, pool
+options) and reports throughput, request latency, "database is locked"
+failures and lock wait: time spent in write statements and commits,
+which is where writers wait for the SQLite write lock.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_concurrency
+    python -m benchmarks.bench_concurrency --writers 8 --readers 8 --seconds 20
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+from sqlalchemy import event
+from app import create_app
+from config import Config, ProductionConfig
+from migrations import upgrade
+from models import db
+from seed import seed_defaults
+import sqlite_pragmas
+from benchmarks.common import seed_expenses
+
+
+PROFILES = {'default': Config, 'production': ProductionConfig}
+
+
+def time_writes(engine, lock_wait):
+    """
+    Record time spent in INSERT/UPDATE/DELETE statements and COMMITs. That
+    is where a writer waits for the SQLite write lock (busy_timeout), so
+    it is reported as lock wait.
+    """
+    started = {}
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        started['statement'] = None if statement.lstrip().upper().startswith('SELECT') else time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        if started.get('statement') is not None:
+            lock_wait.append(time.perf_counter() - started['statement'])
+
+    @event.listens_for(db.session, 'before_commit')
+    def before_commit(session):
+        started['commit'] = time.perf_counter()
+
+    @event.listens_for(db.session, 'after_commit')
+    def after_commit(session):
+        lock_wait.append(time.perf_counter() - started['commit'])
+
+
+def worker(kind, profile, path, start_at, seconds):
+    """One worker process: post expenses or load the dashboard until time is up"""
+    class BenchConfig(PROFILES[profile]):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        RESPONSE_CACHE_BACKEND = 'null'
+
+    app = create_app(BenchConfig)
+    client = app.test_client()
+    result = {'kind': kind, 'latency': [], 'lock_wait': [], 'locked': 0, 'errors': 0, 'pragmas': None}
+    with app.app_context():
+        time_writes(db.engine, result['lock_wait'])
+        with db.engine.connect() as connection:
+            result['pragmas'] = sqlite_pragmas.current(connection, ('journal_mode', 'synchronous', 'busy_timeout'))
+
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        if kind == 'write':
+            response = client.post('/api/expenses', json={
+                'user_id': 1,
+                'category_id': 1,
+                'amount': 9.99,
+                'description': 'bench',
+                'date': datetime.utcnow().isoformat()
+            })
+        else:
+            response = client.get('/api/dashboard?user_id=1&days=30')
+        elapsed = time.perf_counter() - start
+
+        if response.status_code < 400:
+            result['latency'].append(elapsed)
+        elif b'locked' in response.get_data():
+            result['locked'] += 1
+        else:
+            result['errors'] += 1
+    return result
+
+
+def run(profile, path, args):
+    kinds = ['write'] * args.writers + ['read'] * args.readers
+    # Workers start together once every process has imported and built its app
+    start_at = time.time() + args.warmup
+    with ProcessPoolExecutor(max_workers=len(kinds)) as pool:
+        futures = [pool.submit(worker, kind, profile, path, start_at, args.seconds) for kind in kinds]
+        return [future.result() for future in futures]
+
+
+def percentiles_ms(values):
+    if not values:
+        return 0.0, 0.0
+    p50, p99 = np.percentile(np.array(values) * 1000, [50, 99])
+    return p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--expenses', type=int, default=20_000)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=3, help='seconds allowed for workers to start')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        seed_path = os.path.join(workdir, 'seed.db')
+
+        class SeedConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + seed_path
+
+        with create_app(SeedConfig).app_context():
+            upgrade()
+            seed_defaults()
+            seed_expenses(args.expenses, 90)
+            db.session.remove()
+            db.engine.dispose()
+
+        print(f"{args.writers} writers, {args.readers} dashboard readers, {args.seconds:g} s, "
+              f"{args.expenses} seeded expenses\n")
+        header = (f"{'profile':<12} {'journal':>8} {'writes/s':>9} {'reads/s':>8} {'write p50/p99 (ms)':>19} "
+                  f"{'read p50/p99 (ms)':>18} {'write stmt p99 (ms)':>19} {'lock wait (s)':>14} {'locked':>7} {'errors':>7}")
+        print(header)
+        for profile in PROFILES:
+            # Each profile starts from an identical copy in rollback-journal mode
+            path = os.path.join(workdir, f'{profile}.db')
+            shutil.copy(seed_path, path)
+            results = run(profile, path, args)
+
+            writes = [t for r in results if r['kind'] == 'write' for t in r['latency']]
+            reads = [t for r in results if r['kind'] == 'read' for t in r['latency']]
+            lock_wait = [t for r in results for t in r['lock_wait']]
+            locked = sum(r['locked'] for r in results)
+            errors = sum(r['errors'] for r in results)
+
+            write_p50, write_p99 = percentiles_ms(writes)
+            read_p50, read_p99 = percentiles_ms(reads)
+            _, lock_p99 = percentiles_ms(lock_wait)
+            print(f"{profile:<12} {results[0]['pragmas']['journal_mode']:>8} {len(writes) / args.seconds:>9.1f} "
+                  f"{len(reads) / args.seconds:>8.1f} "
+                  f"{f'{write_p50:.1f} / {write_p99:.1f}':>19} {f'{read_p50:.1f} / {read_p99:.1f}':>18} "
+                  f"{lock_p99:>19.1f} {sum(lock_wait):>14.2f} {locked:>7} {errors:>7}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: /api/dashboard vs. the three requests it replaces
+
+Seeds a temporary SQLite database with synthetic expenses, then counts the
+SQL statements issued per call (via a before_cursor_execute listener) and
+times the combined dashboard endpoint against /expenses/summary,
+/insights/spending and /insights/recommendations. Exits non-zero if the
+dashboard issues more than --max-queries statements per call.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_dashboard
+    python -m benchmarks.bench_dashboard --expenses 50000 --repeat 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from sqlalchemy import event
+from app import create_app
+from migrations import upgrade
+from models import db
+from seed import seed_defaults
+from benchmarks.common import seed_expenses
+
+LEGACY_PATHS = [
+    '/api/expenses/summary?user_id=1&days={days}',
+    '/api/insights/spending?user_id=1&days={days}',
+    '/api/insights/recommendations?user_id=1'
+]
+DASHBOARD_PATH = '/api/dashboard?user_id=1&days={days}'
+
+
+def measure(client, paths, repeat, counter):
+    """Median wall time (ms) and statements per call for one round of paths"""
+    timings = []
+    for _ in range(repeat):
+        counter[0] = 0
+        start = time.perf_counter()
+        for path in paths:
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2] * 1000, counter[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--expenses', type=int, default=10_000)
+    parser.add_argument('--days', type=int, default=30, help='dashboard window')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--max-queries', type=int, default=2)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        class BenchConfig:
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            # Measure the build itself, not response cache hits
+            RESPONSE_CACHE_BACKEND = 'null'
+
+        app = create_app(BenchConfig)
+        counter = [0]
+        with app.app_context():
+            upgrade()
+            seed_defaults()
+            seed_expenses(args.expenses, max(args.days, 30) * 2)
+
+            @event.listens_for(db.engine, 'before_cursor_execute')
+            def count_statement(*_):
+                counter[0] += 1
+
+        client = app.test_client()
+        legacy = [p.format(days=args.days) for p in LEGACY_PATHS]
+        dashboard = [DASHBOARD_PATH.format(days=args.days)]
+
+        print(f"{args.expenses} expenses, {args.days}-day window\n")
+        print(f"{'requests':<38} {'median (ms)':>12} {'SQL statements':>15}")
+        results = {}
+        for label, paths in (('summary + insights + recommendations', legacy),
+                             ('/api/dashboard', dashboard)):
+            results[label] = measure(client, paths, args.repeat, counter)
+            print(f"{label:<38} {results[label][0]:>12.2f} {results[label][1]:>15}")
+    finally:
+        os.remove(path)
+
+    queries = results['/api/dashboard'][1]
+    if queries > args.max_queries:
+        sys.exit(f"\n/api/dashboard issued {queries} SQL statements (limit {args.max_queries})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmark: weekly feature build time in BudgetPredictionService.prepare_features
+
+Generates synthetic expense histories (10 years, 12 categories) and times
+the feature build for each size.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_features
+    python -m benchmarks.bench_features --sizes 1000 100000 1000000 --repeat 5
+"""
+
+import argparse
+import time
+from ml_service import BudgetPredictionService
+from benchmarks.common import make_expenses
+
+
+def time_build(service, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        features = service.prepare_features(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), features.shape
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    service = BudgetPredictionService()
+
+    print(f"{'expenses':>10} {'weeks':>6} {'columns':>8} {'best (ms)':>10} {'rows/s':>12}")
+    for n in args.sizes:
+        df = make_expenses(n)
+        best, (weeks, columns) = time_build(service, df, args.repeat)
+        print(f"{n:>10} {weeks:>6} {columns:>8} {best * 1000:>10.1f} {n / best:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark: incremental model updates vs. full retrains
+
+For each history length (--weeks) seeds a temporary database with
+--per-week expenses per week for user 1 and saves a full fit on that
+history as the current model. It then adds one new week of expenses and
+times train_model both ways (median of --repeat runs, each starting from
+the same saved model):
+
+  incremental  featurize the weeks since the last fit, add boosting stages
+  full         reload and featurize the whole history, fit a new model
+
+Both models are scored on every week of the final history (MAE of the
+weekly totals). Checks that the update ran incrementally, that its
+stored feature frame equals a full featurization of the history, and
+that its MAE stays within --max-mae-ratio of the full retrain's.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_incremental
+    python -m benchmarks.bench_incremental --weeks 52 260 1040 --per-week 500
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from app import create_app
+from config import Config
+from migrations import upgrade
+from models import Expense, db
+from ml_service import expected_feature_columns
+from seed import seed_defaults
+from benchmarks.common import seed_expenses
+
+
+def add_week(per_week, seed=7):
+    """One week of expenses after the seeded history"""
+    rng = np.random.default_rng(seed)
+    start = datetime.utcnow() + timedelta(days=1)
+    db.session.execute(insert(Expense), [{
+        'user_id': 1,
+        'category_id': int(category_id),
+        'amount': float(amount),
+        'description': 'bench',
+        'date': start + timedelta(minutes=int(offset))
+    } for offset, amount, category_id in zip(
+        rng.integers(0, 7 * 24 * 60, per_week), rng.gamma(2.0, 25.0, per_week).round(2),
+        rng.integers(1, 13, per_week))])
+    db.session.commit()
+
+
+def weekly_mae(bundle, features_df):
+    """Mean absolute error of the bundle's weekly totals over features_df"""
+    X = features_df.reindex(columns=expected_feature_columns(bundle), fill_value=0.0).fillna(0).astype(float)
+    predictions = bundle.model.predict(bundle.scaler.transform(X))
+    return float(np.abs(predictions - features_df['total_spending']).mean())
+
+
+def run_size(weeks, per_week, repeat, workdir):
+    """(row dict, failures) for one history length"""
+    path = os.path.join(workdir, f'incremental_{weeks}.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        ML_MODEL_DIR = os.path.join(workdir, f'models_{weeks}')
+        RESPONSE_CACHE_BACKEND = 'null'
+
+    failures = []
+    app = create_app(BenchConfig)
+    with app.app_context(), redirect_stdout(sys.stderr):
+        from ml_service import budget_prediction_service as service
+        upgrade()
+        seed_defaults()
+        seed_expenses(weeks * per_week, weeks * 7)
+        success, base = service.fit_model(service.load_training_data(1))
+        assert success, base
+        add_week(per_week)
+
+        full = service.prepare_features(service.load_training_data(1))
+        timings = {'incremental': [], 'full': []}
+        results, mae = {}, {}
+        for _ in range(repeat):
+            for mode in ('incremental', 'full'):
+                service.registry.save(1, None, base)
+                start = time.perf_counter()
+                success, metrics = service.train_model(1, full=mode == 'full')
+                timings[mode].append(time.perf_counter() - start)
+                assert success, metrics
+                results[mode] = metrics
+                mae[mode] = weekly_mae(service.registry.get(1), full)
+
+        if results['incremental']['training_mode'] != 'incremental':
+            failures.append(f"{weeks} weeks: update ran as {results['incremental']['training_mode']}")
+        service.registry.save(1, None, base)
+        service.train_model(1)
+        stored = service.registry.get(1).training_features
+        try:
+            pd.testing.assert_frame_equal(stored.reset_index(drop=True),
+                                          full[stored.columns].reset_index(drop=True), check_dtype=False)
+        except AssertionError as e:
+            failures.append(f'{weeks} weeks: incremental features differ from a full build: {e}')
+        expenses = service.load_training_data(1).shape[0]
+
+        db.session.remove()
+        db.engine.dispose()
+
+    row = {
+        'weeks': weeks,
+        'expenses': expenses,
+        'full_ms': np.median(timings['full']) * 1000,
+        'incremental_ms': np.median(timings['incremental']) * 1000,
+        'base_mae': weekly_mae(base, full),
+        'full_mae': mae['full'],
+        'incremental_mae': mae['incremental']
+    }
+    return row, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--weeks', type=int, nargs='+', default=[26, 104, 260, 520])
+    parser.add_argument('--per-week', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-mae-ratio', type=float, default=1.5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    failures = []
+    print(f"{args.per_week} expenses per week, one new week since the last fit, median of {args.repeat}\n")
+    print(f"{'weeks':>6} {'expenses':>9} {'full ms':>9} {'incr. ms':>9} {'speedup':>8} "
+          f"{'base MAE':>9} {'full MAE':>9} {'incr. MAE':>10}")
+    for weeks in args.weeks:
+        row, size_failures = run_size(weeks, args.per_week, args.repeat, workdir)
+        failures.extend(size_failures)
+        print(f"{row['weeks']:>6} {row['expenses']:>9} {row['full_ms']:>9.1f} {row['incremental_ms']:>9.1f} "
+              f"{row['full_ms'] / row['incremental_ms']:>7.1f}x {row['base_mae']:>9.2f} "
+              f"{row['full_mae']:>9.2f} {row['incremental_mae']:>10.2f}")
+        if row['incremental_mae'] > args.max_mae_ratio * max(row['full_mae'], 1.0):
+            failures.append(f"{weeks} weeks: incremental MAE {row['incremental_mae']:.2f} "
+                            f"vs. {row['full_mae']:.2f} for a full retrain")
+    shutil.rmtree(workdir)
+
+    if failures:
+        print('\nFAILED:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+    print("\nMAE: weekly totals over the whole final history; base is the model before the new week")
+    print("checks passed: updates ran incrementally, stored features match a full build")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark: ML service logging on the prediction path
+
+Seeds a temporary database and trains user 1's model, then sends
+--requests predictions from --threads threads in each mode and reports
+p50/p99 latency and the log lines written:
+
+  info        LOG_LEVEL=INFO (the default): diagnostics are skipped
+  sampled     INFO plus ML_LOG_SAMPLE_RATE=--sample-rate
+  debug       every diagnostic, through the queue handler
+  debug-sync  every diagnostic, written synchronously by the request
+              thread (a plain StreamHandler, like the old print() calls)
+
+Each write to the log sink takes --write-delay-ms, standing in for a
+terminal, pipe or log driver that is slower than the request rate.
+
+Checks that every line is JSON carrying the X-Request-ID returned with
+its response, that INFO writes no diagnostics, and that the sampled
+share of requests is near the rate.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --threads 4 --requests 400 --write-delay-ms 10
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+import numpy as np
+from app import create_app
+from config import Config
+from migrations import upgrade
+from models import db
+from seed import seed_defaults
+import logging_config
+from benchmarks.common import seed_expenses
+
+MODES = {
+    'info': {'LOG_LEVEL': 'INFO'},
+    'sampled': {'LOG_LEVEL': 'INFO'},
+    'debug': {'LOG_LEVEL': 'DEBUG'},
+    'debug-sync': {'LOG_LEVEL': 'DEBUG'}
+}
+
+
+class SlowStream:
+    """File wrapper whose writes take a fixed time"""
+
+    def __init__(self, f, delay):
+        self.f = f
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return self.f.write(text)
+
+    def flush(self):
+        self.f.flush()
+
+
+def run_mode(app, requests, threads):
+    """(latencies, request ids) for predictions sent from several threads"""
+    latencies, request_ids = [], []
+    lock = threading.Lock()
+
+    def worker(count):
+        client = app.test_client()
+        for _ in range(count):
+            start = time.perf_counter()
+            response = client.post('/api/predictions/predict', json={'user_id': 1, 'period': 'monthly'})
+            elapsed = time.perf_counter() - start
+            assert response.status_code == 200, response.get_data(as_text=True)
+            with lock:
+                latencies.append(elapsed)
+                request_ids.append(response.headers['X-Request-ID'])
+
+    workers = [threading.Thread(target=worker, args=(requests // threads,)) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return latencies, request_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--expenses', type=int, default=10_000)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--sample-rate', type=float, default=0.1)
+    parser.add_argument('--write-delay-ms', type=float, default=5.0, help='time per write to the log sink')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, 'logging.db')
+    log_path = os.path.join(workdir, 'ml.log')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        ML_MODEL_DIR = os.path.join(workdir, 'models')
+        RESPONSE_CACHE_BACKEND = 'null'
+
+    failures = []
+    with create_app(BenchConfig).app_context(), redirect_stdout(sys.stderr):
+        from ml_service import budget_prediction_service
+        upgrade()
+        seed_defaults()
+        seed_expenses(args.expenses, 365)
+        budget_prediction_service.train_model(1)
+        db.session.remove()
+
+    logger = logging.getLogger('ml_service')
+    # The listener's output handler, pointed at a file for each mode
+    output = logging_config._listener.handlers[0]
+
+    print(f"{args.requests} predictions from {args.threads} threads per mode, "
+          f"{args.write_delay_ms:g} ms per log write\n")
+    print(f"{'mode':<11} {'p50 ms':>8} {'p99 ms':>8} {'lines':>7} {'requests logged':>16} {'dropped':>8}")
+    for mode, settings in MODES.items():
+        class ModeConfig(BenchConfig):
+            LOG_LEVEL = settings['LOG_LEVEL']
+            ML_LOG_SAMPLE_RATE = args.sample_rate if mode == 'sampled' else 0.0
+
+        app = create_app(ModeConfig)
+        run_mode(app, args.threads * 2, args.threads)  # warm up
+
+        with open(log_path, 'w') as f:
+            sink = SlowStream(f, args.write_delay_ms / 1000)
+            queued = logger.handlers
+            if mode == 'debug-sync':
+                direct = logging.StreamHandler(sink)
+                direct.setFormatter(logging_config.JsonFormatter())
+                direct.addFilter(logging_config.RequestContextFilter())
+                logger.handlers = [direct]
+            else:
+                logging_config._listener.stop()
+                output.setStream(sink)
+                logging_config._listener.start()
+            dropped_before = logging_config.dropped()
+
+            latencies, request_ids = run_mode(app, args.requests, args.threads)
+
+            logger.handlers = queued
+            # Stopping the listener drains the queue into the sink
+            logging_config._listener.stop()
+            output.setStream(sys.stderr)
+            logging_config._listener.start()
+
+        with open(log_path) as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        logged_ids = {line.get('request_id') for line in lines}
+        p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+        dropped = logging_config.dropped() - dropped_before
+        print(f"{mode:<11} {p50:>8.1f} {p99:>8.1f} {len(lines):>7} "
+              f"{len(logged_ids & set(request_ids)):>16} {dropped:>8}")
+
+        if not logged_ids <= set(request_ids):
+            failures.append(f'{mode}: log lines with request ids not returned to any client')
+        if mode == 'info' and any(line['level'] == 'DEBUG' for line in lines):
+            failures.append('info: diagnostics written at INFO')
+        if mode.startswith('debug') and len(logged_ids) != len(request_ids):
+            failures.append(f'{mode}: {len(logged_ids)} of {len(request_ids)} requests logged')
+        if mode == 'sampled':
+            share = len(logged_ids) / len(request_ids)
+            tolerance = 4 * (args.sample_rate * (1 - args.sample_rate) / len(request_ids)) ** 0.5
+            if abs(share - args.sample_rate) > tolerance:
+                failures.append(f'sampled: {share:.1%} of requests logged, expected ~{args.sample_rate:.0%}')
+
+    shutil.rmtree(workdir)
+    if failures:
+        print('\nFAILED:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+    print("\nchecks passed: JSON lines correlate with responses, INFO is quiet, sampling matches the rate")
+
+
+if __name__ == '__main__':
+    main()
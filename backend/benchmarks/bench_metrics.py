@@ -0,0 +1,160 @@
+"""
+Benchmark: request overhead of the /metrics instrumentation
+
+Seeds a temporary database and trains user 1's model, then times
+--repeat rounds of cheap and SQL-heavy requests with METRICS_ENABLED off
+and on (response cache off, so every request runs its queries) and
+reports the per-request overhead. Afterwards it checks the exposition:
+with metrics off /metrics is 404; with them on the request counts, SQL
+statement counts and ML stages (feature_build, predict) must match what
+was sent, and the text must parse with prometheus_client's parser when
+it is installed.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --repeat 500
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+import numpy as np
+from app import create_app
+from config import Config
+from migrations import upgrade
+from models import db
+from seed import seed_defaults
+from benchmarks.common import count_statements, seed_expenses
+
+PATHS = [
+    '/health',
+    '/api/categories',
+    '/api/expenses?user_id=1&limit=50',
+    '/api/budgets/status?user_id=1',
+    '/api/dashboard?user_id=1&days=30'
+]
+
+
+def sample(text, name, **labels):
+    """Value of one sample line in the exposition text"""
+    selector = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = re.escape(name + ('{' + selector + '}' if selector else '')) + r' (\S+)$'
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def time_paths(client, repeat):
+    """Per-path request times (s), rounds interleaved"""
+    timings = {path: [] for path in PATHS}
+    for _ in range(repeat):
+        for path in PATHS:
+            start = time.perf_counter()
+            response = client.get(path)
+            timings[path].append(time.perf_counter() - start)
+            assert response.status_code == 200, (path, response.status_code)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--expenses', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, 'metrics.db')
+
+    class OffConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        ML_MODEL_DIR = os.path.join(workdir, 'models')
+        RESPONSE_CACHE_BACKEND = 'null'
+        METRICS_ENABLED = False
+
+    class OnConfig(OffConfig):
+        METRICS_ENABLED = True
+
+    failures = []
+    off_app = create_app(OffConfig)
+    with off_app.app_context(), redirect_stdout(sys.stderr):
+        from ml_service import budget_prediction_service
+        upgrade()
+        seed_defaults()
+        seed_expenses(args.expenses, 365)
+        budget_prediction_service.train_model(1)
+
+    # Metrics off first: enabling them turns on the process-wide ML timers
+    off_client = off_app.test_client()
+    if off_client.get('/metrics').status_code != 404:
+        failures.append('/metrics is served with METRICS_ENABLED off')
+    time_paths(off_client, 20)
+    off = time_paths(off_client, args.repeat)
+
+    on_app = create_app(OnConfig)
+    on_client = on_app.test_client()
+    time_paths(on_client, 20)
+    before = on_client.get('/metrics').get_data(as_text=True)
+    on = time_paths(on_client, args.repeat)
+
+    print(f"{args.repeat} requests per path, {args.expenses} expenses, response cache off\n")
+    print(f"{'path':<36} {'off p50 ms':>11} {'on p50 ms':>10} {'overhead us':>12}")
+    for p in PATHS:
+        off_p50 = np.median(off[p]) * 1000
+        on_p50 = np.median(on[p]) * 1000
+        print(f"{p:<36} {off_p50:>11.3f} {on_p50:>10.3f} {(on_p50 - off_p50) * 1000:>12.1f}")
+
+    with redirect_stdout(sys.stderr):
+        predict = on_client.post('/api/predictions/predict', json={'user_id': 1, 'period': 'monthly'})
+    if predict.status_code != 200:
+        failures.append(f'predict returned {predict.status_code}')
+
+    response = on_client.get('/metrics')
+    text = response.get_data(as_text=True)
+    if not response.content_type.startswith('text/plain; version=0.0.4'):
+        failures.append(f'unexpected content type {response.content_type}')
+
+    def recorded(name, **labels):
+        return (sample(text, name, **labels) or 0) - (sample(before, name, **labels) or 0)
+
+    for endpoint, p in [('categories.get_categories', '/api/categories'),
+                        ('expenses.get_expenses', '/api/expenses?user_id=1&limit=50'),
+                        ('dashboard.get_dashboard', '/api/dashboard?user_id=1&days=30')]:
+        count = recorded('http_request_duration_seconds_count', endpoint=endpoint, method='GET')
+        if count != args.repeat:
+            failures.append(f'{endpoint}: latency count {count}, expected {args.repeat}')
+        statements = count_statements(on_app, p)
+        total = recorded('http_request_db_statements_sum', endpoint=endpoint)
+        if total != statements * args.repeat:
+            failures.append(f'{endpoint}: {total} statements recorded, expected {statements} x {args.repeat}')
+    if recorded('http_requests_total', endpoint='health', method='GET', status='200') != args.repeat:
+        failures.append('health request total does not match')
+    for stage in ('feature_build', 'predict'):
+        if not sample(text, 'ml_stage_duration_seconds_count', stage=stage):
+            failures.append(f'no ML timings for {stage}')
+
+    try:
+        from prometheus_client.parser import text_string_to_metric_families
+    except ImportError:
+        print("\nprometheus_client not installed; skipped parsing the exposition")
+    else:
+        families = {family.name for family in text_string_to_metric_families(text)}
+        print(f"\nexposition parses: {len(families)} metric families, {len(text.splitlines())} lines")
+
+    for app in (off_app, on_app):
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+    shutil.rmtree(workdir)
+
+    if failures:
+        print('\nFAILED:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+    print("checks passed: request counts, SQL statement counts and ML stages match")
+
+
+if __name__ == '__main__':
+    main()
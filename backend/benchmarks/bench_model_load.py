@@ -0,0 +1,112 @@
+"""
+Benchmark: model artifact cold-load time and resident memory per worker
+
+Trains one model on synthetic expenses, writes it as N registry artifacts
+and starts W fresh worker processes that each load every artifact through
+ModelRegistry, once with memory mapping and once without. Workers stay
+alive until all of them have loaded, so PSS (proportional set size, shared
+pages split between the processes sharing them) reflects page sharing.
+RSS/PSS are read from /proc and are only reported on Linux.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_model_load
+    python -m benchmarks.bench_model_load --models 200 --workers 4
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from benchmarks.common import make_expenses
+
+
+def _memory_kb():
+    """(rss, pss) of the current process in kB, or (None, None) off Linux"""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            values = {}
+            for line in f:
+                parts = line.split()
+                if parts[0] in ('Rss:', 'Pss:'):
+                    values[parts[0]] = int(parts[1])
+        return values.get('Rss:'), values.get('Pss:')
+    except OSError:
+        return None, None
+
+
+def _worker(root, keys, mmap_mode, verify, barrier, results):
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry(root, capacity=len(keys), mmap_mode=mmap_mode, verify_checksums=verify)
+    base_rss, base_pss = _memory_kb()
+
+    start = time.perf_counter()
+    for user_id in keys:
+        registry.get(user_id)
+    elapsed = time.perf_counter() - start
+
+    # Measure only once every worker holds its models
+    barrier.wait()
+    rss, pss = _memory_kb()
+    results.put((elapsed, base_rss, base_pss, rss, pss))
+    barrier.wait()
+
+
+def run(root, keys, workers, mmap_mode, verify):
+    ctx = multiprocessing.get_context('spawn')
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_worker, args=(root, keys, mmap_mode, verify, barrier, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--models', type=int, default=100, help='artifacts loaded per worker')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--expenses', type=int, default=20_000, help='training set size')
+    args = parser.parse_args()
+
+    from ml_service import fit_model_job
+    from model_registry import ModelRegistry
+
+    # Silence the training progress output
+    with contextlib.redirect_stdout(io.StringIO()):
+        success, bundle = fit_model_job(make_expenses(args.expenses, years=3))
+    if not success:
+        raise SystemExit(f'Training failed: {bundle}')
+
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(root)
+        keys = list(range(1, args.models + 1))
+        for user_id in keys:
+            registry.save(user_id, None, bundle)
+
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+        print(f"{args.models} artifacts, {size / args.models / 1024:.0f} kB each, {args.workers} workers\n")
+        print(f"{'mode':<18} {'load (ms/model)':>16} {'RSS (MB/worker)':>16} {'PSS (MB/worker)':>16}")
+
+        for label, mmap_mode, verify in (('mmap + checksum', 'r', True),
+                                         ('mmap', 'r', False),
+                                         ('in-memory', None, False)):
+            samples = run(root, keys, args.workers, mmap_mode, verify)
+            load_ms = sum(s[0] for s in samples) / len(samples) / len(keys) * 1000
+            if samples[0][3] is None:
+                print(f"{label:<18} {load_ms:>16.2f} {'n/a':>16} {'n/a':>16}")
+                continue
+            rss = sum(s[3] - s[1] for s in samples) / len(samples) / 1024
+            pss = sum(s[4] - s[2] for s in samples) / len(samples) / 1024
+            print(f"{label:<18} {load_ms:>16.2f} {rss:>16.1f} {pss:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Benchmark: cost of the on-demand request profiler
+
+Seeds a temporary database and trains user 1's model, then times
+--repeat rounds of spending insights, a prediction and an expense list
+with PROFILER_ENABLED off and on (no X-Profile header), and the same
+requests profiled in cprofile and sampling mode. Checks that:
+
+  - unsigned requests get no profile and leave no SQL listeners behind
+  - a signed request returns X-Profile-Id, and its report lists every
+    SQL statement the request ran
+  - the folded export is "frame;frame;... count" lines, and in cprofile
+    mode adds up to about the request time
+  - bad, expired and other-path signatures and unsigned report reads
+    are rejected
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_profiler
+    python -m benchmarks.bench_profiler --repeat 200
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+import numpy as np
+from sqlalchemy import event
+from app import create_app
+from config import Config
+from migrations import upgrade
+from models import db
+from seed import seed_defaults
+import profiler
+from benchmarks.common import count_statements, seed_expenses
+
+SECRET = 'bench-secret'
+REQUESTS = [
+    ('GET', '/api/insights/spending', '/api/insights/spending?user_id=1&days=90', None),
+    ('POST', '/api/predictions/predict', '/api/predictions/predict', {'user_id': 1, 'period': 'monthly'}),
+    ('GET', '/api/expenses', '/api/expenses?user_id=1&limit=50', None)
+]
+
+
+def send(client, method, url, body, headers=None):
+    if method == 'POST':
+        return client.post(url, json=body, headers=headers)
+    return client.get(url, headers=headers)
+
+
+def time_requests(client, repeat, mode=None):
+    """Per-path request times (s), rounds interleaved; signed for mode if given"""
+    timings = {path: [] for _, path, _, _ in REQUESTS}
+    for _ in range(repeat):
+        for method, path, url, body in REQUESTS:
+            headers = {profiler.HEADER: profiler.sign(SECRET, method, path, mode)} if mode else None
+            start = time.perf_counter()
+            response = send(client, method, url, body, headers)
+            timings[path].append(time.perf_counter() - start)
+            assert response.status_code == 200, (path, response.status_code)
+    return timings
+
+
+def read_report(client, profile_id, suffix=''):
+    path = f'{profiler.PROFILES_PATH}/{profile_id}{suffix}'
+    return client.get(path, headers={profiler.HEADER: profiler.sign(SECRET, 'GET', path)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--expenses', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, 'profiler.db')
+
+    class OffConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        ML_MODEL_DIR = os.path.join(workdir, 'models')
+        RESPONSE_CACHE_BACKEND = 'null'
+        PROFILER_ENABLED = False
+
+    class OnConfig(OffConfig):
+        PROFILER_ENABLED = True
+        PROFILER_SECRET = SECRET
+        PROFILER_DIR = os.path.join(workdir, 'profiles')
+        PROFILER_KEEP = 10 * args.repeat
+
+    failures = []
+    off_app = create_app(OffConfig)
+    with off_app.app_context(), redirect_stdout(sys.stderr):
+        from ml_service import budget_prediction_service
+        upgrade()
+        seed_defaults()
+        seed_expenses(args.expenses, 365)
+        budget_prediction_service.train_model(1)
+
+    on_app = create_app(OnConfig)
+    off_client, on_client = off_app.test_client(), on_app.test_client()
+    with redirect_stdout(sys.stderr):
+        time_requests(off_client, 10)
+        time_requests(on_client, 10)
+        results = {
+            'disabled': time_requests(off_client, args.repeat),
+            'no header': time_requests(on_client, args.repeat),
+            'cprofile': time_requests(on_client, args.repeat, 'cprofile'),
+            'sampling': time_requests(on_client, args.repeat, 'sampling')
+        }
+
+    print(f"{args.repeat} requests per path, {args.expenses} expenses, response cache off\n")
+    print(f"{'path':<28}" + ''.join(f"{name + ' p50 ms':>18}" for name in results))
+    for _, p, _, _ in REQUESTS:
+        print(f"{p:<28}" + ''.join(f"{np.median(timings[p]) * 1000:>18.3f}" for timings in results.values()))
+
+    with on_app.app_context():
+        engine = db.engine
+    if event.contains(engine, 'before_cursor_execute', profiler._SqlCapture._before):
+        failures.append('SQL listeners left attached')
+
+    # Unprofiled and rejected requests
+    unsigned = on_client.get('/api/expenses?user_id=1&limit=50')
+    if profiler.ID_HEADER in unsigned.headers:
+        failures.append('unsigned request was profiled')
+    rejected = {
+        'bad signature': profiler.sign('wrong', 'GET', '/api/expenses'),
+        'expired': profiler.sign(SECRET, 'GET', '/api/expenses', timestamp=time.time() - 3600),
+        'other path': profiler.sign(SECRET, 'GET', '/api/budgets'),
+        'malformed': 'cprofile:soon:abc'
+    }
+    for name, value in rejected.items():
+        response = on_client.get('/api/expenses?user_id=1&limit=50', headers={profiler.HEADER: value})
+        if profiler.ID_HEADER in response.headers:
+            failures.append(f'{name} header was profiled')
+    if on_client.get(profiler.PROFILES_PATH).status_code != 404:
+        failures.append('report list served without a signature')
+    if off_client.get(profiler.PROFILES_PATH, headers={
+            profiler.HEADER: profiler.sign(SECRET, 'GET', profiler.PROFILES_PATH)}).status_code != 404:
+        failures.append('report list served with the profiler disabled')
+
+    # Reports
+    print(f"\n{'mode':<9} {'path':<28} {'SQL':>4} {'SQL ms':>7} {'request ms':>11} {'folded lines':>13} {'folded total':>14}")
+    for mode in profiler.MODES:
+        for method, p, url, body in REQUESTS:
+            with redirect_stdout(sys.stderr):
+                response = send(on_client, method, url, body,
+                                {profiler.HEADER: profiler.sign(SECRET, method, p, mode)})
+            profile_id = response.headers.get(profiler.ID_HEADER)
+            if profile_id is None:
+                failures.append(f'{mode} {p}: no {profiler.ID_HEADER}')
+                continue
+            report = read_report(on_client, profile_id).get_json()
+            folded = read_report(on_client, profile_id, '/folded').get_data(as_text=True)
+
+            with redirect_stdout(sys.stderr):
+                expected = count_statements(on_app, url) if method == 'GET' else None
+            if expected is not None and report['sql']['count'] != expected:
+                failures.append(f"{mode} {p}: {report['sql']['count']} statements in the report, expected {expected}")
+            total = 0
+            for line in folded.splitlines():
+                stack, _, value = line.rpartition(' ')
+                if not stack or not value.isdigit():
+                    failures.append(f'{mode} {p}: bad folded line {line!r}')
+                    break
+                total += int(value)
+            if mode == 'cprofile' and not 0.3 * report['duration_ms'] <= total / 1000 <= 1.1 * report['duration_ms']:
+                failures.append(f"{mode} {p}: folded stacks add up to {total / 1000:.1f} ms "
+                                f"of {report['duration_ms']:.1f} ms")
+            print(f"{mode:<9} {p:<28} {report['sql']['count']:>4} {report['sql']['total_ms']:>7.2f} "
+                  f"{report['duration_ms']:>11.2f} {len(folded.splitlines()):>13} "
+                  f"{total:>10} {'us' if mode == 'cprofile' else 'smp'}")
+
+    for app in (off_app, on_app):
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+    shutil.rmtree(workdir)
+
+    if failures:
+        print('\nFAILED:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+    print("\nchecks passed: unsigned requests untouched, reports carry every SQL statement and parse as folded stacks")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: GET /api/expenses serialization paths
+
+Seeds a temporary SQLite database with --expenses expenses and times one
+full (unpaginated) expense list:
+- marshmallow: the previous path, ORM rows with joined categories dumped
+  through expenses_schema and encoded with jsonify
+- fast, nested: projected columns, categories from one lookup, embedded
+  per row (?embed=category, same shape as marshmallow)
+- fast, side-loaded: the default shape with a top-level "categories" object
+Fast paths run with orjson (if installed) and with the stdlib encoder.
+Exits non-zero if the nested fast path differs from the marshmallow output.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_serialize
+    python -m benchmarks.bench_serialize --expenses 50000 --repeat 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from flask import jsonify
+from sqlalchemy.orm import joinedload
+from app import create_app
+from migrations import upgrade
+from models import Expense
+from schemas import expenses_schema
+from seed import seed_defaults
+import serializers
+from benchmarks.common import seed_expenses
+
+PATH = '/api/expenses?user_id=1'
+
+
+def marshmallow_list(app):
+    """The list response as built before the fast path"""
+    with app.test_request_context(PATH):
+        expenses = Expense.query.filter_by(user_id=1)\
+            .options(joinedload(Expense.category))\
+            .order_by(Expense.date.desc(), Expense.id.desc()).all()
+        response = jsonify({
+            'success': True,
+            'data': expenses_schema.dump(expenses),
+            'count': len(expenses)
+        })
+        return response.get_data()
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--expenses', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        class BenchConfig:
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            upgrade()
+            seed_defaults()
+            seed_expenses(args.expenses, 365)
+        client = app.test_client()
+
+        def fetch(query=''):
+            response = client.get(PATH + query)
+            assert response.status_code == 200, response.status_code
+            return response
+
+        reference = fetch('&embed=category').get_json()
+        with app.app_context():
+            legacy = app.json.loads(marshmallow_list(app))
+        same_shape = reference == legacy
+
+        encoders = [('orjson', serializers.orjson), ('stdlib', None)] if serializers.orjson else [('stdlib', None)]
+
+        print(f"{args.expenses} expenses, median of {args.repeat}\n")
+        print(f"{'path':<32} {'time (ms)':>10}")
+        with app.app_context():
+            print(f"{'marshmallow (previous)':<32} {median_ms(lambda: marshmallow_list(app), args.repeat):>10.1f}")
+        for name, module in encoders:
+            serializers.orjson = module
+            print(f"{'fast, nested (' + name + ')':<32} "
+                  f"{median_ms(lambda: fetch('&embed=category'), args.repeat):>10.1f}")
+            print(f"{'fast, side-loaded (' + name + ')':<32} {median_ms(fetch, args.repeat):>10.1f}")
+
+        print(f"\nnested fast path matches marshmallow output: {'yes' if same_shape else 'NO'}")
+        sys.exit(0 if same_shape else 1)
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
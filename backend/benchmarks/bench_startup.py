@@ -0,0 +1,138 @@
+"""
+Benchmark: worker startup time and time to first request
+
+Starts fresh interpreters with ``python -X importtime`` that import the app,
+build it against a migrated, seeded SQLite database and serve one request
+through the test client. Reports the import time of ``app`` (from the
+importtime log), the wall time to the first response, and the slowest
+top-level imports. Run it against the expenses route to see what a worker
+that never touches ML pays, and against an ML route to see the
+deferred ML import land on the first prediction request.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 5 --top 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = r'''
+import time
+start = time.perf_counter()
+from app import create_app
+
+class BenchConfig:
+    SQLALCHEMY_DATABASE_URI = {uri!r}
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+client = create_app(BenchConfig).test_client()
+created = time.perf_counter()
+response = client.get({path!r})
+done = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print('RESULT', created - start, done - start)
+'''
+
+PATHS = {
+    'expenses': '/api/expenses?user_id=1',
+    'predictions': '/api/predictions/models/stats'
+}
+
+
+def prepare_database(path):
+    """Create the schema and default data once, outside the timed runs"""
+    script = (
+        'from app import create_app\n'
+        'from models import db\n'
+        'from migrations import upgrade\n'
+        'from seed import seed_defaults\n'
+        'class BenchConfig:\n'
+        f'    SQLALCHEMY_DATABASE_URI = {"sqlite:///" + path!r}\n'
+        'app = create_app(BenchConfig)\n'
+        'with app.app_context():\n'
+        '    upgrade()\n'
+        '    seed_defaults()\n'
+        '    db.session.commit()\n'
+    )
+    subprocess.run([sys.executable, '-c', script], check=True, stdout=subprocess.DEVNULL)
+
+
+def parse_importtime(stderr):
+    """
+    Map of module -> cumulative import time in ms for modules imported by
+    the child script or directly by ``app`` (importtime indents each level
+    by two spaces), including imports deferred until the first request
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+
+def run_once(uri, path):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD.format(uri=uri, path=path)],
+        capture_output=True, text=True, check=True
+    )
+    line = next(l for l in result.stdout.splitlines() if l.startswith('RESULT'))
+    _, created, first_request = line.split()
+    return float(created) * 1000, float(first_request) * 1000, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10, help='slowest imports to list')
+    parser.add_argument('--json', action='store_true', help='print raw results as JSON')
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        prepare_database(path)
+        uri = 'sqlite:///' + path
+
+        results = {}
+        for label, route in PATHS.items():
+            runs = [run_once(uri, route) for _ in range(args.repeat)]
+            imports = runs[-1][2]
+            results[label] = {
+                'route': route,
+                'app_import_ms': statistics.median(r[2].get('app', 0) for r in runs),
+                'app_ready_ms': statistics.median(r[0] for r in runs),
+                'first_request_ms': statistics.median(r[1] for r in runs),
+                'slowest_imports': sorted(imports.items(), key=lambda item: -item[1])[:args.top]
+            }
+    finally:
+        os.remove(path)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'first route':<14} {'import app (ms)':>16} {'app ready (ms)':>15} {'first response (ms)':>20}")
+    for label, result in results.items():
+        print(f"{label:<14} {result['app_import_ms']:>16.1f} {result['app_ready_ms']:>15.1f} "
+              f"{result['first_request_ms']:>20.1f}")
+
+    for label, result in results.items():
+        print(f"\nSlowest top-level imports ({label}):")
+        for name, ms in result['slowest_imports']:
+            if name == 'app':
+                continue
+            print(f"  {name:<40} {ms:>8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
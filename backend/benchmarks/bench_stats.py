@@ -0,0 +1,97 @@
+"""
+Benchmark: amount statistics time and memory
+
+1. Feeds --values amounts from several distributions (gamma, lognormal,
+   with zeros and a heavy tail) through QuantileSketch and Histogram and
+   reports the time and the number of sketch buckets.
+2. Seeds a temporary SQLite database with --expenses expenses and times
+   GET /api/expenses/stats (totals, percentiles, histogram, per-category),
+   reporting peak traced memory for a second request.
+
+Accuracy against numpy.percentile / numpy.histogram is checked by
+tests/test_sketches.py (the 1M-value case with ``pytest -m slow``).
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_stats
+    python -m benchmarks.bench_stats --values 1000000 --expenses 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from app import create_app
+from migrations import upgrade
+from seed import seed_defaults
+from sketches import Histogram, QuantileSketch
+from insights import QUANTILE_ACCURACY
+from benchmarks.common import amount_distributions, seed_expenses
+
+PERCENTILES = [1, 10, 25, 50, 75, 90, 99, 99.9]
+BINS = 20
+
+
+def time_sketches(n):
+    print(f"QuantileSketch + Histogram, {n:,} values, accuracy {QUANTILE_ACCURACY}\n")
+    print(f"{'distribution':<12} {'buckets':>8} {'time (s)':>9}")
+    for name, values in amount_distributions(n).items():
+        start = time.perf_counter()
+        sketch = QuantileSketch(QUANTILE_ACCURACY)
+        histogram = Histogram(float(values.min()), float(values.max()), BINS)
+        for value in values.tolist():
+            sketch.add(value)
+            histogram.add(value)
+        for p in PERCENTILES:
+            sketch.quantile(p / 100)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<12} {len(sketch.buckets):>8} {elapsed:>9.2f}")
+
+
+def time_endpoint(n):
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        class BenchConfig:
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            RESPONSE_CACHE_BACKEND = 'null'
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            upgrade()
+            seed_defaults()
+            seed_expenses(n, 90)
+
+        query = '/api/expenses/stats?user_id=1&days=365&bins={}&percentiles={}'.format(
+            BINS, ','.join(f'{p:g}' for p in PERCENTILES))
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.get(query)
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.status_code
+
+        # Second request only for memory; tracing slows it down
+        tracemalloc.start()
+        client.get(query)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"\nGET /api/expenses/stats, {n:,} expenses: {elapsed:.2f} s, "
+              f"peak traced memory {peak / 2**20:.1f} MiB")
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--values', type=int, default=1_000_000)
+    parser.add_argument('--expenses', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    time_sketches(args.values)
+    time_endpoint(args.expenses)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Fixtures shared by the benchmarks and tests: synthetic expense histories
+(in the database or as a DataFrame), amount samples from several
+distributions and a per-request SQL statement counter.
+"""
+
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import event, insert
+from models import db, User, Expense
+import rollups
+
+
+def seed_expenses(n, days, seed=42):
+    """User 1 ("bench") with n expenses spread over the last days days, 12 categories"""
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    offsets = rng.integers(0, days * 24 * 60, n)
+    amounts = rng.gamma(2.0, 25.0, n).round(2)
+    categories = rng.integers(1, 13, n)
+
+    db.session.execute(insert(User), [{'username': 'bench', 'email': 'bench@example.com'}])
+    db.session.execute(insert(Expense), [{
+        'user_id': 1,
+        'category_id': int(category_id),
+        'amount': float(amount),
+        'description': 'bench',
+        'date': now - timedelta(minutes=int(offset))
+    } for offset, amount, category_id in zip(offsets, amounts, categories)])
+    rollups.rebuild([1])
+    db.session.commit()
+
+
+def make_expenses(n, years=10, categories=12, seed=42):
+    """An expense DataFrame (date, amount, category_id) without a database"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2015-01-01')
+    minutes = rng.integers(0, years * 365 * 24 * 60, n)
+    return pd.DataFrame({
+        'date': start + pd.to_timedelta(minutes, unit='m'),
+        'amount': rng.gamma(2.0, 25.0, n).round(2),
+        'category_id': rng.integers(1, categories + 1, n)
+    })
+
+
+def amount_distributions(n, seed=7):
+    """{name: n amounts} from gamma, lognormal, zero-inflated and heavy-tailed distributions"""
+    rng = np.random.default_rng(seed)
+    with_zeros = rng.gamma(2.0, 25.0, n).round(2)
+    with_zeros[rng.random(n) < 0.05] = 0.0
+    return {
+        'gamma': rng.gamma(2.0, 25.0, n).round(2),
+        'lognormal': rng.lognormal(3.0, 1.5, n).round(2),
+        'with zeros': with_zeros,
+        'heavy tail': (rng.pareto(1.2, n) * 10 + 0.01).round(2)
+    }
+
+
+def count_statements(app, path):
+    """SQL statements one GET request to path runs"""
+    counter = [0]
+
+    def count(*args):
+        counter[0] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        app.test_client().get(path)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return counter[0]
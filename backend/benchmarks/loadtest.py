@@ -0,0 +1,593 @@
+"""
+Load-test harness for the API blueprints
+
+``run`` seeds a temporary database (users, expenses, budgets and a trained
+model for user 1), starts create_app() on it in a server process and
+drives it with --concurrency keep-alive clients for --duration seconds
+(after --warmup). Each client repeatedly picks an endpoint from the
+weighted workload: "mixed" covers every route of users_bp, categories_bp,
+expenses_bp, budgets_bp and predictions_bp; the other workloads are one
+blueprint each. Writes create, update and delete their own rows, so runs
+start from the same data and send the same weighted mix. The report (JSON, on
+stdout or --output) has throughput, p50/p95/p99 latency and status
+counts per endpoint, plus the commit and settings it was run with.
+
+``compare`` prints per-endpoint changes between two reports and exits
+non-zero if any endpoint's p99 regressed by more than --threshold
+percent.
+
+Usage (from the backend directory):
+    python -m benchmarks.loadtest run --output base.json
+    python -m benchmarks.loadtest run --workload expenses --concurrency 32 --server asgi
+    python -m benchmarks.loadtest run --weight "POST /api/predictions/train=0"
+    python -m benchmarks.loadtest compare base.json head.json --threshold 10
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One weighted request type. path and body may be callables taking the
+# client State; a path of None means "nothing to act on yet", and the
+# client picks again. creates names the State pool that receives the id
+# from the response.
+Endpoint = namedtuple('Endpoint', ['name', 'weight', 'method', 'path', 'body', 'creates'])
+
+
+class State:
+    """Ids shared by all clients: seeded rows and rows created during the run"""
+
+    def __init__(self, rng, seeded):
+        self.rng = rng
+        self.seeded = seeded
+        self.created = {'user': [], 'category': [], 'expense': [], 'budget': [], 'job': []}
+        self.counter = 0
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f'{prefix}-{self.counter}'
+
+    def seeded_id(self, kind):
+        return self.rng.randint(1, self.seeded[kind])
+
+    def created_id(self, kind, pop=False):
+        ids = self.created[kind]
+        if not ids:
+            return None
+        index = self.rng.randrange(len(ids))
+        return ids.pop(index) if pop else ids[index]
+
+
+def _with_id(template, kind, pop=False, seeded=False):
+    def path(state):
+        item_id = state.seeded_id(kind) if seeded else state.created_id(kind, pop)
+        return template.format(id=item_id) if item_id is not None else None
+    return path
+
+
+def _expense(state):
+    return {
+        'user_id': 1,
+        'category_id': state.rng.randint(1, 12),
+        'amount': round(state.rng.uniform(1, 200), 2),
+        'description': 'load test',
+        'date': (datetime.utcnow() - timedelta(days=state.rng.randint(0, 60))).isoformat()
+    }
+
+
+def _budget(state):
+    return {
+        'user_id': 1,
+        'category_id': state.rng.randint(1, 12),
+        'amount': 500.0,
+        'period': 'monthly',
+        'start_date': datetime.utcnow().replace(day=1).isoformat()
+    }
+
+
+USERS = [
+    Endpoint('GET /api/users', 2, 'GET', '/api/users', None, None),
+    Endpoint('GET /api/users/<id>', 4, 'GET', _with_id('/api/users/{id}', 'user', seeded=True), None, None),
+    Endpoint('GET /api/users/by-email', 3, 'GET',
+             lambda s: f'/api/users/by-email?email=user{s.seeded_id("user")}@example.com', None, None),
+    Endpoint('POST /api/users', 1, 'POST', '/api/users',
+             lambda s: {'username': s.unique('load'), 'email': s.unique('load') + '@example.com'}, 'user'),
+    Endpoint('PUT /api/users/<id>', 1, 'PUT', _with_id('/api/users/{id}', 'user'),
+             lambda s: {'username': s.unique('renamed')}, None),
+    Endpoint('DELETE /api/users/<id>', 1, 'DELETE', _with_id('/api/users/{id}', 'user', pop=True), None, None)
+]
+
+CATEGORIES = [
+    Endpoint('GET /api/categories', 6, 'GET', '/api/categories', None, None),
+    Endpoint('GET /api/categories/<id>', 4, 'GET', _with_id('/api/categories/{id}', 'category', seeded=True),
+             None, None),
+    Endpoint('GET /api/categories/<id>/descriptions', 4, 'GET',
+             _with_id('/api/categories/{id}/descriptions', 'category', seeded=True), None, None),
+    Endpoint('GET /api/descriptions', 2, 'GET', '/api/descriptions', None, None),
+    Endpoint('POST /api/categories', 0.2, 'POST', '/api/categories',
+             lambda s: {'name': s.unique('Load'), 'icon': '', 'color': '#6366f1'}, 'category'),
+    Endpoint('PUT /api/categories/<id>', 0.2, 'PUT', _with_id('/api/categories/{id}', 'category'),
+             lambda s: {'color': '#10b981'}, None),
+    Endpoint('DELETE /api/categories/<id>', 0.2, 'DELETE', _with_id('/api/categories/{id}', 'category', pop=True),
+             None, None),
+    Endpoint('POST /api/descriptions', 0.2, 'POST', '/api/descriptions',
+             lambda s: {'category_id': s.seeded_id('category'), 'description': s.unique('load')}, None)
+]
+
+EXPENSES = [
+    Endpoint('GET /api/expenses', 10, 'GET', '/api/expenses?user_id=1&limit=50', None, None),
+    Endpoint('GET /api/expenses/<id>', 6, 'GET', _with_id('/api/expenses/{id}', 'expense', seeded=True),
+             None, None),
+    Endpoint('GET /api/expenses/summary', 4, 'GET', '/api/expenses/summary?user_id=1&days=30', None, None),
+    Endpoint('GET /api/expenses/stats', 1, 'GET', '/api/expenses/stats?user_id=1&days=30', None, None),
+    Endpoint('GET /api/expenses/export', 0.5, 'GET', '/api/expenses/export?user_id=1&days=30', None, None),
+    Endpoint('POST /api/expenses', 5, 'POST', '/api/expenses', _expense, 'expense'),
+    Endpoint('POST /api/expenses/bulk', 0.2, 'POST', '/api/expenses/bulk',
+             lambda s: {'expenses': [_expense(s) for _ in range(100)]}, None),
+    Endpoint('PUT /api/expenses/<id>', 2, 'PUT', _with_id('/api/expenses/{id}', 'expense'),
+             lambda s: {'amount': round(s.rng.uniform(1, 200), 2)}, None),
+    Endpoint('DELETE /api/expenses/<id>', 1, 'DELETE', _with_id('/api/expenses/{id}', 'expense', pop=True),
+             None, None)
+]
+
+BUDGETS = [
+    Endpoint('GET /api/budgets', 4, 'GET', '/api/budgets?user_id=1', None, None),
+    Endpoint('GET /api/budgets/<id>', 3, 'GET', _with_id('/api/budgets/{id}', 'budget', seeded=True), None, None),
+    Endpoint('GET /api/budgets/status', 6, 'GET', '/api/budgets/status?user_id=1', None, None),
+    Endpoint('POST /api/budgets/status/batch', 1, 'POST', '/api/budgets/status/batch',
+             lambda s: {'user_ids': list(range(1, s.seeded['user'] + 1))}, None),
+    Endpoint('POST /api/budgets', 1, 'POST', '/api/budgets', _budget, 'budget'),
+    Endpoint('PUT /api/budgets/<id>', 1, 'PUT', _with_id('/api/budgets/{id}', 'budget'),
+             lambda s: {'amount': 750.0}, None),
+    Endpoint('DELETE /api/budgets/<id>', 1, 'DELETE', _with_id('/api/budgets/{id}', 'budget', pop=True),
+             None, None)
+]
+
+PREDICTIONS = [
+    Endpoint('POST /api/predictions/predict', 4, 'POST', '/api/predictions/predict',
+             lambda s: {'user_id': 1, 'period': 'monthly'}, None),
+    Endpoint('POST /api/predictions/predict/batch', 0.5, 'POST', '/api/predictions/predict/batch',
+             lambda s: {'user_ids': [1], 'save': False}, None),
+    Endpoint('GET /api/predictions/history', 3, 'GET', '/api/predictions/history?user_id=1', None, None),
+    Endpoint('GET /api/predictions/models/stats', 1, 'GET', '/api/predictions/models/stats', None, None),
+    Endpoint('GET /api/insights/spending', 3, 'GET', '/api/insights/spending?user_id=1&days=30', None, None),
+    Endpoint('GET /api/insights/recommendations', 2, 'GET', '/api/insights/recommendations?user_id=1',
+             None, None),
+    Endpoint('POST /api/predictions/train', 0.1, 'POST', '/api/predictions/train',
+             lambda s: {'user_id': 1}, 'job'),
+    Endpoint('GET /api/predictions/jobs/<id>', 0.5, 'GET', _with_id('/api/predictions/jobs/{id}', 'job'),
+             None, None)
+]
+
+WORKLOADS = {
+    'users': USERS,
+    'categories': CATEGORIES,
+    'expenses': EXPENSES,
+    'budgets': BUDGETS,
+    'predictions': PREDICTIONS,
+    'mixed': USERS + CATEGORIES + EXPENSES + BUDGETS + PREDICTIONS
+}
+
+
+def server_command(server, port, threads=8):
+    """Command line serving create_app() on port with one worker process"""
+    if server == 'werkzeug':
+        return [sys.executable, '-c',
+                f'from app import create_app; create_app().run(host="127.0.0.1", port={port}, threaded=True)']
+    if server == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '-w', '1', '-k', 'gthread', '--threads', str(threads),
+                '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:create_app()']
+    if server == 'asgi':
+        return [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+                '--workers', '1', '--log-level', 'warning', '--no-access-log']
+    raise ValueError(f'Unknown server: {server}')
+
+
+SERVER_MODULES = {'werkzeug': 'werkzeug', 'gunicorn': 'gunicorn', 'asgi': 'uvicorn'}
+
+
+def wait_ready(port, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('server exited during startup')
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+def start_server(server, port, env, threads=8):
+    process = subprocess.Popen(server_command(server, port, threads), cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port, process)
+    except RuntimeError:
+        process.terminate()
+        raise
+    return process
+
+
+def stop_server(process):
+    process.terminate()
+    process.wait(timeout=30)
+
+
+def process_stats(pid):
+    """(threads, RSS in MiB) of a process and its children (uvicorn/gunicorn workers)"""
+    pids = [pid]
+    try:
+        children = subprocess.run(['pgrep', '-P', str(pid)], capture_output=True, text=True).stdout.split()
+        pids += [int(child) for child in children]
+    except OSError:
+        pass
+
+    threads = rss_kib = 0
+    for p in pids:
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('Threads:'):
+                        threads += int(line.split()[1])
+                    elif line.startswith('VmRSS:'):
+                        rss_kib += int(line.split()[1])
+        except OSError:
+            pass
+    return threads, rss_kib / 1024
+
+
+async def request(reader, writer, method, path, body):
+    """Send one HTTP/1.1 request; returns (status, keep-alive, body bytes)"""
+    payload = json.dumps(body).encode() if body is not None else b''
+    head = f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: keep-alive\r\n'
+    if payload or method in ('POST', 'PUT'):
+        head += f'Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n'
+    writer.write(head.encode() + b'\r\n' + payload)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode().partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding') == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            chunks.append((await reader.readexactly(size + 2))[:size])
+            if size == 0:
+                break
+        data = b''.join(chunks)
+    else:
+        data = await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection', '').lower() != 'close', data
+
+
+def _created_id(endpoint, data):
+    try:
+        payload = json.loads(data)
+    except ValueError:
+        return None
+    if endpoint.creates == 'job':
+        return payload.get('job_id')
+    return (payload.get('data') or {}).get('id')
+
+
+async def client(port, endpoints, state, measure_from, deadline, samples):
+    weights = [e.weight for e in endpoints]
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        endpoint = state.rng.choices(endpoints, weights)[0]
+        path = endpoint.path(state) if callable(endpoint.path) else endpoint.path
+        if path is None:
+            continue
+        body = endpoint.body(state) if endpoint.body else None
+
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            status, keep_alive, data = await asyncio.wait_for(
+                request(reader, writer, endpoint.method, path, body), timeout=60)
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            status, data = 'error', b''
+            if writer is not None:
+                writer.close()
+            writer = None
+        elapsed = time.perf_counter() - start
+
+        if endpoint.creates and status in (200, 201, 202):
+            created = _created_id(endpoint, data)
+            if created is not None:
+                state.created[endpoint.creates].append(created)
+        if start >= measure_from:
+            samples.append((endpoint.name, elapsed, status))
+    if writer is not None:
+        writer.close()
+
+
+async def drive(port, endpoints, state, args):
+    samples = []
+    measure_from = time.perf_counter() + args.warmup
+    deadline = measure_from + args.duration
+    await asyncio.gather(*[
+        client(port, endpoints, state, measure_from, deadline, samples)
+        for _ in range(args.concurrency)
+    ])
+    return samples
+
+
+def seed_database(path, model_dir, args):
+    """Schema, default catalog, --users users, user 1's expenses and budgets, and a trained model"""
+    from sqlalchemy import insert
+    from app import create_app
+    from config import get_config
+    from migrations import upgrade
+    from models import db, User, Budget, Category
+    from seed import seed_defaults
+    from ml_service import budget_prediction_service
+    from benchmarks.common import seed_expenses
+
+    class SeedConfig(get_config(args.config)):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        ML_MODEL_DIR = model_dir
+
+    with create_app(SeedConfig).app_context():
+        upgrade()
+        seed_defaults()
+        seed_expenses(args.expenses, 365)
+        db.session.execute(insert(User), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com'} for i in range(2, args.users + 1)
+        ])
+        # user 1 is seed_expenses' bench user; give it the same email pattern
+        db.session.get(User, 1).email = 'user1@example.com'
+        start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        db.session.execute(insert(Budget), [
+            {'user_id': 1, 'category_id': category_id, 'amount': 400.0, 'period': 'monthly',
+             'start_date': start, 'is_active': True}
+            for category_id in range(1, 7)
+        ])
+        db.session.commit()
+        ok, error = budget_prediction_service.train_model(1)
+        if not ok:
+            raise RuntimeError(f'training failed: {error}')
+        seeded = {
+            'user': args.users,
+            'expense': args.expenses,
+            'budget': 6,
+            'category': db.session.query(Category).count()
+        }
+        db.session.remove()
+        db.engine.dispose()
+    return seeded
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _latency_stats(latencies, duration):
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99]) if len(ms) else (0.0, 0.0, 0.0)
+    return {
+        'requests': len(latencies),
+        'throughput': round(len(latencies) / duration, 2),
+        'mean_ms': round(float(ms.mean()), 2) if len(ms) else 0.0,
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'max_ms': round(float(ms.max()), 2) if len(ms) else 0.0
+    }
+
+
+def build_report(samples, args, endpoints, peak):
+    by_endpoint = {}
+    for name, elapsed, status in samples:
+        by_endpoint.setdefault(name, []).append((elapsed, status))
+
+    report_endpoints = {}
+    for endpoint in endpoints:
+        results = by_endpoint.get(endpoint.name, [])
+        stats = _latency_stats([elapsed for elapsed, _ in results], args.duration)
+        statuses = Counter(status for _, status in results)
+        stats['errors'] = sum(n for status, n in statuses.items() if status == 'error' or status >= 500)
+        stats['status'] = {str(status): n for status, n in sorted(statuses.items(), key=str)}
+        report_endpoints[endpoint.name] = stats
+
+    totals = _latency_stats([elapsed for _, elapsed, _ in samples], args.duration)
+    totals['errors'] = sum(e['errors'] for e in report_endpoints.values())
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'server': args.server,
+            'config': args.config,
+            'workload': args.workload,
+            'weights': {e.name: e.weight for e in endpoints},
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'warmup_s': args.warmup,
+            'expenses': args.expenses,
+            'users': args.users,
+            'seed': args.seed,
+            'peak_threads': peak[0],
+            'peak_rss_mib': round(peak[1], 1)
+        },
+        'totals': totals,
+        'endpoints': report_endpoints
+    }
+
+
+def _apply_weights(endpoints, overrides):
+    weights = {}
+    for override in overrides:
+        name, _, weight = override.rpartition('=')
+        if name not in {e.name for e in endpoints}:
+            raise SystemExit(f'unknown endpoint in --weight: {name!r}')
+        weights[name] = float(weight)
+    endpoints = [e._replace(weight=weights.get(e.name, e.weight)) for e in endpoints]
+    return [e for e in endpoints if e.weight > 0]
+
+
+def run(args):
+    if args.server != 'werkzeug':
+        try:
+            __import__(SERVER_MODULES[args.server])
+        except ImportError:
+            raise SystemExit(f'{args.server} needs {SERVER_MODULES[args.server]}, which is not installed')
+    endpoints = _apply_weights(WORKLOADS[args.workload], args.weight)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'load.db')
+        model_dir = os.path.join(workdir, 'models')
+        # Training progress goes to stderr so a report on stdout stays valid JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            seeded = seed_database(path, model_dir, args)
+        env = dict(os.environ, DATABASE_URL='sqlite:///' + path, ML_MODEL_DIR=model_dir, APP_CONFIG=args.config)
+        if args.no_cache:
+            env['RESPONSE_CACHE_BACKEND'] = 'null'
+
+        process = start_server(args.server, args.port, env, args.threads)
+        try:
+            state = State(random.Random(args.seed), seeded)
+            peak = [0, 0.0]
+
+            async def sampled():
+                task = asyncio.ensure_future(drive(args.port, endpoints, state, args))
+                while not task.done():
+                    threads, rss = process_stats(process.pid)
+                    peak[0], peak[1] = max(peak[0], threads), max(peak[1], rss)
+                    await asyncio.sleep(0.5)
+                return task.result()
+
+            samples = asyncio.run(sampled())
+        finally:
+            stop_server(process)
+    finally:
+        shutil.rmtree(workdir)
+
+    report = build_report(samples, args, endpoints, peak)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        totals = report['totals']
+        print(f"{totals['requests']} requests, {totals['throughput']} req/s, p50 {totals['p50_ms']} ms, "
+              f"p99 {totals['p99_ms']} ms, {totals['errors']} errors -> {args.output}")
+    else:
+        print(text)
+
+
+def _change(base, head):
+    if not base:
+        return '   n/a'
+    return f'{(head - base) / base * 100:+6.1f}%'
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    for key in ('server', 'config', 'workload', 'concurrency', 'duration_s', 'expenses', 'cpus'):
+        if base['meta'].get(key) != head['meta'].get(key):
+            print(f"warning: {key} differs ({base['meta'].get(key)} vs {head['meta'].get(key)})")
+    print(f"base {base['meta'].get('commit')} ({base['meta']['timestamp']}) -> "
+          f"head {head['meta'].get('commit')} ({head['meta']['timestamp']})\n")
+
+    rows = [('TOTAL', base['totals'], head['totals'])]
+    names = list(base['endpoints']) + [n for n in head['endpoints'] if n not in base['endpoints']]
+    rows += [(n, base['endpoints'].get(n), head['endpoints'].get(n)) for n in names]
+
+    width = max(len(name) for name, _, _ in rows)
+    print(f"{'endpoint':<{width}} {'req/s, change':>17} {'p50 ms base, head':>18} "
+          f"{'p99 ms base, head':>19} {'errors':>10}")
+    regressions = []
+    for name, b, h in rows:
+        if b is None or h is None:
+            print(f"{name:<{width}} {'only in ' + ('head' if b is None else 'base'):>17}")
+            continue
+        print(f"{name:<{width}} {b['throughput']:>8.1f} {_change(b['throughput'], h['throughput'])} "
+              f"{b['p50_ms']:>8.1f} {h['p50_ms']:>8.1f}  {b['p99_ms']:>8.1f} {h['p99_ms']:>8.1f}  "
+              f"{b['errors']:>4} {h['errors']:>4}")
+        if (name != 'TOTAL' and b['p99_ms'] and h['requests'] >= args.min_requests
+                and (h['p99_ms'] - b['p99_ms']) / b['p99_ms'] * 100 > args.threshold):
+            regressions.append(name)
+
+    if regressions:
+        print(f"\np99 regressed by more than {args.threshold:g}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run a workload and write a JSON report')
+    run_parser.add_argument('--workload', choices=sorted(WORKLOADS), default='mixed')
+    run_parser.add_argument('--weight', action='append', default=[], metavar='"METHOD PATH=WEIGHT"',
+                            help='override one endpoint weight (0 disables it); repeatable')
+    run_parser.add_argument('--concurrency', type=int, default=16, help='concurrent keep-alive clients')
+    run_parser.add_argument('--duration', type=float, default=30, help='measured seconds')
+    run_parser.add_argument('--warmup', type=float, default=5, help='unmeasured seconds before that')
+    run_parser.add_argument('--server', choices=sorted(SERVER_MODULES), default='werkzeug')
+    run_parser.add_argument('--threads', type=int, default=8, help='gunicorn gthread threads')
+    run_parser.add_argument('--config', default='production', help='APP_CONFIG for the server')
+    run_parser.add_argument('--no-cache', action='store_true', help='turn the response cache off')
+    run_parser.add_argument('--expenses', type=int, default=20_000)
+    run_parser.add_argument('--users', type=int, default=50)
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--port', type=int, default=5098)
+    run_parser.add_argument('--output', help='write the report here instead of stdout')
+
+    compare_parser = commands.add_parser('compare', help='compare two reports')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('head')
+    compare_parser.add_argument('--threshold', type=float, default=10, help='allowed p99 regression, percent')
+    compare_parser.add_argument('--min-requests', type=int, default=50,
+                                help='ignore endpoints with fewer requests in head')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == '__main__':
+    main()
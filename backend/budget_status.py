@@ -0,0 +1,159 @@
+"""
+Budget status engine.
+
+Works out the current window for every active budget and sums the
+matching daily spend rollup rows for all of them in one grouped SQL
+statement, instead of issuing one SUM query (and one lazy category load)
+per budget. Standard periods start and end at midnight, so whole-day
+rollups are exact; budgets with a custom period are counted from the day
+of their start date through the day of their end date (or today).
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import and_, case, func, select
+from models import db, Budget, Category, DailySpend
+
+PERIODS = ('daily', 'weekly', 'monthly', 'yearly')
+
+# Max user ids bound into a single IN (...) clause in batch mode
+BATCH_CHUNK_SIZE = 500
+
+
+def period_window(period, now=None):
+    """Return the (start, end) window containing ``now`` for a budget period"""
+    now = now or datetime.utcnow()
+
+    if period == 'daily':
+        start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        end_date = start_date + timedelta(days=1)
+    elif period == 'weekly':
+        start_date = now - timedelta(days=now.weekday())
+        start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        end_date = start_date + timedelta(days=7)
+    elif period == 'monthly':
+        start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        if now.month == 12:
+            end_date = start_date.replace(year=now.year + 1, month=1)
+        else:
+            end_date = start_date.replace(month=now.month + 1)
+    elif period == 'yearly':
+        start_date = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        end_date = start_date.replace(year=now.year + 1)
+    else:
+        raise ValueError(f'Unknown budget period: {period}')
+
+    return start_date, end_date
+
+
+def _status_statement(user_ids, now):
+    """Build the grouped budget vs. spent statement for the given users"""
+    windows = {period: period_window(period, now) for period in PERIODS}
+
+    # Budgets with a non-standard period use their own start/end dates
+    window_start = case(
+        {period: start for period, (start, _) in windows.items()},
+        value=Budget.period,
+        else_=Budget.start_date
+    )
+    window_end = case(
+        {period: end for period, (_, end) in windows.items()},
+        value=Budget.period,
+        else_=func.coalesce(Budget.end_date, now)
+    )
+
+    # Same windows in whole days for matching rollup rows (end exclusive)
+    day_type = DailySpend.day.type
+    first_day = case(
+        {period: start.date() for period, (start, _) in windows.items()},
+        value=Budget.period,
+        else_=func.date(Budget.start_date, type_=day_type)
+    )
+    end_day = case(
+        {period: end.date() for period, (_, end) in windows.items()},
+        value=Budget.period,
+        else_=func.date(func.coalesce(Budget.end_date, now), '+1 day', type_=day_type)
+    )
+
+    return select(
+        Budget.id,
+        Budget.user_id,
+        Budget.category_id,
+        Budget.amount,
+        Budget.period,
+        Category.name,
+        Category.icon,
+        Category.color,
+        window_start.label('window_start'),
+        window_end.label('window_end'),
+        func.coalesce(func.sum(DailySpend.total), 0).label('spent')
+    ).outerjoin(
+        Category, Category.id == Budget.category_id
+    ).outerjoin(
+        DailySpend, and_(
+            DailySpend.user_id == Budget.user_id,
+            DailySpend.category_id == Budget.category_id,
+            DailySpend.day >= first_day,
+            DailySpend.day < end_day
+        )
+    ).where(
+        Budget.user_id.in_(user_ids),
+        Budget.is_active == True
+    ).group_by(
+        Budget.id, Category.id
+    ).order_by(Budget.user_id, Budget.id)
+
+
+def _status_entry(row):
+    spent = float(row.spent or 0)
+    budgeted = float(row.amount)
+    percentage = (spent / budgeted * 100) if budgeted > 0 else 0
+
+    return {
+        'budget_id': row.id,
+        'category_id': row.category_id,
+        'category_name': row.name if row.name is not None else 'Unknown',
+        'category_icon': row.icon if row.name is not None else '',
+        'category_color': row.color if row.name is not None else '',
+        'budgeted': budgeted,
+        'spent': spent,
+        'remaining': budgeted - spent,
+        'percentage_used': round(float(percentage), 2),
+        'period': row.period,
+        'start_date': row.window_start.isoformat(),
+        'end_date': row.window_end.isoformat(),
+        'is_exceeded': spent > budgeted
+    }
+
+
+def _summary(budget_status):
+    total_budgeted = sum(b['budgeted'] for b in budget_status)
+    total_spent = sum(b['spent'] for b in budget_status)
+
+    return {
+        'budgets': budget_status,
+        'total_budgeted': total_budgeted,
+        'total_spent': total_spent,
+        'total_remaining': total_budgeted - total_spent
+    }
+
+
+def get_budget_status(user_id, now=None):
+    """Budget status and totals for a single user"""
+    return get_budget_status_batch([user_id], now)[user_id]
+
+
+def get_budget_status_batch(user_ids, now=None):
+    """
+    Budget status for many users at once, e.g. for alerting sweeps.
+    Returns {user_id: status}; users without active budgets get an empty status.
+    """
+    now = now or datetime.utcnow()
+    user_ids = list(dict.fromkeys(user_ids))
+    statuses = {user_id: [] for user_id in user_ids}
+
+    for i in range(0, len(user_ids), BATCH_CHUNK_SIZE):
+        chunk = user_ids[i:i + BATCH_CHUNK_SIZE]
+        for row in db.session.execute(_status_statement(chunk, now)):
+            statuses[row.user_id].append(_status_entry(row))
+
+    return {user_id: _summary(entries) for user_id, entries in statuses.items()}
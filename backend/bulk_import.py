@@ -0,0 +1,155 @@
+"""
+Bulk expense import.
+
+Rows (dicts from a JSON array or CSV body) are validated in batches with
+``ExpenseSchema(many=True)``, checked against known users and categories,
+and inserted with one executemany per chunk. Each chunk is its own
+transaction that also folds the new rows into the daily spend rollup and
+bumps the users' data versions, so a failure only loses that chunk and
+readers never see expenses missing from the rollup. Invalid rows are
+reported by index and skipped; they never abort the import.
+"""
+
+from datetime import datetime, timezone
+from marshmallow import EXCLUDE, ValidationError
+from sqlalchemy import insert, select
+from models import db, Expense, User
+from catalog import get_catalog
+from schemas import expenses_schema
+from data_versions import bump, user_scope
+import rollups
+
+# Rows validated and inserted per transaction
+BULK_CHUNK_SIZE = 5000
+
+# Per-row errors included in the response
+MAX_REPORTED_ERRORS = 1000
+
+OPTIONAL_TEXT_FIELDS = ('description', 'notes')
+
+
+def parse_date(value):
+    """
+    Expense date from an ISO 8601 string or datetime, as the naive UTC
+    datetime the expenses table stores; values with an offset are converted
+    to UTC and values without one are taken to be UTC already
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _normalize(row, default_user_id, category_ids_by_name):
+    """Fill defaults and accept CSV-style values before schema validation"""
+    row = {k.strip(): v.strip() if isinstance(v, str) else v
+           for k, v in row.items() if k is not None}
+
+    # Empty CSV cells count as missing
+    row = {k: v for k, v in row.items() if v != '' or k in OPTIONAL_TEXT_FIELDS}
+
+    if 'user_id' not in row and default_user_id is not None:
+        row['user_id'] = default_user_id
+    if 'category_id' not in row and 'category' in row:
+        row['category_id'] = category_ids_by_name.get(row['category'], row['category'])
+
+    # Date-only values mean midnight
+    date = row.get('date')
+    if isinstance(date, str) and len(date) == 10:
+        row['date'] = f'{date}T00:00:00'
+
+    for field in OPTIONAL_TEXT_FIELDS:
+        if row.get(field) is None:
+            row[field] = ''
+    return row
+
+
+def _validate(rows):
+    """Schema-validate a batch; returns (valid {index: data}, errors {index: messages})"""
+    try:
+        return dict(enumerate(expenses_schema.load(rows, unknown=EXCLUDE))), {}
+    except ValidationError as e:
+        errors = e.messages if isinstance(e.messages, dict) else {}
+        valid = {i: data for i, data in enumerate(e.valid_data or []) if i not in errors}
+        return valid, errors
+
+
+def _insert_chunk(values):
+    """Insert one chunk and update rollups/versions in a single transaction"""
+    db.session.execute(insert(Expense.__table__), values)
+    rollups.add_expenses(values)
+    bump(*{user_scope(v['user_id']) for v in values})
+    db.session.commit()
+
+
+def import_expenses(rows, default_user_id=None):
+    """
+    Validate and insert expense rows. Returns a summary with the number of
+    rows received/inserted/failed and per-row errors (0-based index into
+    ``rows``); a chunk that fails to insert is reported as a row range.
+    """
+    snapshot = get_catalog()
+    known_categories = snapshot.categories_by_id
+    category_ids_by_name = snapshot.category_ids_by_name
+
+    result = {'received': len(rows), 'inserted': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+
+    def report(error, count=1):
+        result['failed'] += count
+        if len(result['errors']) < MAX_REPORTED_ERRORS:
+            result['errors'].append(error)
+        else:
+            result['errors_truncated'] = True
+
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        batch = rows[start:start + BULK_CHUNK_SIZE]
+
+        indexes = []
+        normalized = []
+        for index, row in enumerate(batch, start):
+            if isinstance(row, dict):
+                indexes.append(index)
+                normalized.append(_normalize(row, default_user_id, category_ids_by_name))
+            else:
+                report({'row': index, 'errors': {'_schema': ['Row must be an object.']}})
+
+        valid, batch_errors = _validate(normalized)
+        for position, messages in batch_errors.items():
+            report({'row': indexes[position], 'errors': messages})
+
+        user_ids = {data['user_id'] for data in valid.values()}
+        known_users = set(db.session.scalars(select(User.id).where(User.id.in_(user_ids)))) if user_ids else set()
+
+        values = []
+        for position, data in sorted(valid.items()):
+            if data['user_id'] not in known_users:
+                report({'row': indexes[position], 'errors': {'user_id': ['User not found.']}})
+                continue
+            if data['category_id'] not in known_categories:
+                report({'row': indexes[position], 'errors': {'category_id': ['Category not found.']}})
+                continue
+
+            values.append({
+                'user_id': data['user_id'],
+                'category_id': data['category_id'],
+                'amount': data['amount'],
+                'description': data.get('description', ''),
+                'notes': data.get('notes', ''),
+                'date': parse_date(data['date'])
+            })
+
+        if not values:
+            continue
+
+        try:
+            _insert_chunk(values)
+            result['inserted'] += len(values)
+        except Exception as e:
+            db.session.rollback()
+            report({
+                'rows': [start, start + len(batch) - 1],
+                'errors': {'_chunk': [f'Insert failed, {len(values)} valid rows skipped: {e}']}
+            }, count=len(values))
+
+    return result
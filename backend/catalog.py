@@ -0,0 +1,121 @@
+"""
+In-memory catalog of categories and standard descriptions.
+
+Categories and descriptions are shared by all users and rarely change, so
+each process keeps one immutable ``CatalogSnapshot`` of them per app,
+already in their serialized (CategorySchema / StandardDescriptionSchema)
+form. The
+snapshot records the ``catalog`` data version it was built from; every
+write to a category or description bumps that version, so a process
+notices writes made by other workers and rebuilds on the next access. The
+version is checked at most once per request (reusing the lookup that
+``conditional_get`` already did when present); the writing process
+rebuilds right after its commit via ``refresh``.
+
+Snapshots are replaced as a whole, never modified: readers holding the old
+one keep a consistent view, and nothing must mutate the returned dicts.
+"""
+
+import threading
+from types import MappingProxyType
+from flask import current_app, g, has_request_context
+from sqlalchemy import select
+from models import db, Category, StandardDescription
+from data_versions import CATALOG_SCOPE, current
+
+
+class CatalogSnapshot:
+    """One immutable version of the category/description catalog"""
+
+    __slots__ = ('version', 'categories', 'categories_by_id', 'category_ids_by_name',
+                 'descriptions', 'descriptions_by_category')
+
+    def __init__(self, version, categories, descriptions):
+        self.version = version
+        self.categories = tuple(categories)
+        self.categories_by_id = MappingProxyType({c['id']: c for c in self.categories})
+        self.category_ids_by_name = MappingProxyType({c['name']: c['id'] for c in self.categories})
+
+        # Only active descriptions are ever served
+        active = tuple(d for d in descriptions if d['is_active'])
+        by_category = {}
+        for description in active:
+            by_category.setdefault(description['category_id'], []).append(description)
+        self.descriptions = active
+        self.descriptions_by_category = MappingProxyType(
+            {category_id: tuple(items) for category_id, items in by_category.items()})
+
+    def category(self, category_id):
+        return self.categories_by_id.get(category_id)
+
+    def category_descriptions(self, category_id):
+        return self.descriptions_by_category.get(category_id, ())
+
+
+class _SnapshotHolder:
+    """The app's current snapshot; swapped under the lock, read without it"""
+
+    def __init__(self):
+        self.snapshot = None
+        self.lock = threading.Lock()
+
+
+def _holder():
+    return current_app.extensions.setdefault('catalog', _SnapshotHolder())
+
+
+def _load(version):
+    categories = [
+        {'id': row.id, 'name': row.name, 'icon': row.icon, 'color': row.color}
+        for row in db.session.execute(
+            select(Category.id, Category.name, Category.icon, Category.color).order_by(Category.id))
+    ]
+    descriptions = [
+        {'id': row.id, 'category_id': row.category_id, 'description': row.description,
+         'is_active': bool(row.is_active) if row.is_active is not None else None}
+        for row in db.session.execute(
+            select(StandardDescription.id, StandardDescription.category_id,
+                   StandardDescription.description, StandardDescription.is_active)
+            .order_by(StandardDescription.id))
+    ]
+    return CatalogSnapshot(version, categories, descriptions)
+
+
+def _current_version(use_request_cache=True):
+    """The catalog data version, looked up at most once per request"""
+    if use_request_cache and has_request_context():
+        versions = g.get('data_versions')
+        if versions is not None and CATALOG_SCOPE in versions:
+            return versions[CATALOG_SCOPE]
+
+    versions, _ = current([CATALOG_SCOPE])
+    version = versions.get(CATALOG_SCOPE, 0)
+    if has_request_context():
+        g.data_versions = dict(g.get('data_versions') or {}, **{CATALOG_SCOPE: version})
+    return version
+
+
+def get_catalog():
+    """The current catalog snapshot, rebuilt if the catalog version moved"""
+    version = _current_version()
+    snapshot = _holder().snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    return _rebuild(version)
+
+
+def refresh():
+    """Rebuild now; call after committing a category/description write"""
+    return _rebuild(_current_version(use_request_cache=False))
+
+
+def _rebuild(version):
+    holder = _holder()
+    with holder.lock:
+        # Another thread may have rebuilt this version while we waited
+        if holder.snapshot is not None and holder.snapshot.version == version:
+            return holder.snapshot
+        # Version is read before the rows, so a concurrent write can only
+        # make the snapshot newer than its version, never older
+        holder.snapshot = _load(version)
+        return holder.snapshot
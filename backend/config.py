@@ -9,6 +9,99 @@ class Config:
     # CORS settings
     CORS_HEADERS = 'Content-Type'
     
+    # Response cache for analytics endpoints: 'memory', 'null' or 'module:Class'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND') or 'memory'
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))  # entries (memory backend)
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))  # seconds
+    
+    # GET /api/expenses: embed a category object in every row instead of
+    # side-loading them (previous response shape; ?embed=category per request)
+    EXPENSES_EMBED_CATEGORY = os.environ.get('EXPENSES_EMBED_CATEGORY', 'false').lower() in ('1', 'true', 'yes')
+    
+    # Bulk expense import (POST /api/expenses/bulk)
+    BULK_IMPORT_MAX_ROWS = int(os.environ.get('BULK_IMPORT_MAX_ROWS', 500_000))
+    MAX_CONTENT_LENGTH = 128 * 1024 * 1024  # request body limit in bytes
+    
+    # ASGI serving (uvicorn asgi:app): request threads for general and prediction routes
+    ASGI_WORKERS = int(os.environ.get('ASGI_WORKERS', 32))
+    ASGI_ML_WORKERS = int(os.environ.get('ASGI_ML_WORKERS', 4))
+    
+    # Prometheus metrics (per process): request latency, SQL and ML timings
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    METRICS_PATH = os.environ.get('METRICS_PATH') or '/metrics'
+    
+    # Logging (ml_service): JSON lines ('json') or 'text' to stderr through a
+    # bounded queue; ML_LOG_SAMPLE_RATE logs the DEBUG diagnostics of that
+    # fraction of requests regardless of LOG_LEVEL
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
+    LOG_FORMAT = os.environ.get('LOG_FORMAT') or 'json'
+    LOG_LOGGERS = ('ml_service',)
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))  # records; more are dropped
+    ML_LOG_SAMPLE_RATE = float(os.environ.get('ML_LOG_SAMPLE_RATE', 0.0))
+    
+    # On-demand profiling of requests that carry an X-Profile header signed
+    # with PROFILER_SECRET (flask profile-header); reports go to PROFILER_DIR
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    PROFILER_SECRET = os.environ.get('PROFILER_SECRET')
+    PROFILER_DIR = os.environ.get('PROFILER_DIR') or 'profiles'
+    PROFILER_KEEP = int(os.environ.get('PROFILER_KEEP', 100))  # reports kept on disk
+    PROFILER_TOKEN_TTL = int(os.environ.get('PROFILER_TOKEN_TTL', 300))  # seconds a signed header is valid
+    PROFILER_SAMPLE_INTERVAL = float(os.environ.get('PROFILER_SAMPLE_INTERVAL', 0.005))  # sampling mode, seconds
+    
     # Model settings
-    ML_MODEL_PATH = 'models/budget_predictor.joblib'
-    SCALER_PATH = 'models/scaler.joblib'
+    ML_MODEL_DIR = os.environ.get('ML_MODEL_DIR') or 'models'
+    ML_REGISTRY_CAPACITY = int(os.environ.get('ML_REGISTRY_CAPACITY', 256))  # models kept in memory
+    ML_KEEP_VERSIONS = 3  # artifact versions kept on disk per user/category
+    ML_MMAP_MODE = 'r'  # memory-map model arrays so worker processes share pages (None to disable)
+    ML_VERIFY_CHECKSUMS = True  # check artifact SHA-256 checksums before unpickling
+    # Training updates the current model with the weeks added since its last
+    # fit (warm start) and retrains from scratch after ML_FULL_RETRAIN_UPDATES
+    # updates or ML_FULL_RETRAIN_DAYS days
+    ML_INCREMENTAL_TRAINING = os.environ.get('ML_INCREMENTAL_TRAINING', 'true').lower() in ('1', 'true', 'yes')
+    ML_FULL_RETRAIN_UPDATES = int(os.environ.get('ML_FULL_RETRAIN_UPDATES', 8))
+    ML_FULL_RETRAIN_DAYS = int(os.environ.get('ML_FULL_RETRAIN_DAYS', 7))
+    ML_PRELOAD_MODELS = os.environ.get('ML_PRELOAD_MODELS', '').lower() in ('1', 'true', 'yes')
+    ML_PRELOAD_LIMIT = int(os.environ.get('ML_PRELOAD_LIMIT', 0)) or None  # default: registry capacity
+    
+    # Background training (process pool)
+    TRAINING_WORKERS = int(os.environ.get('TRAINING_WORKERS', 2))
+    TRAINING_JOB_HISTORY = 1000  # finished jobs kept for status lookups
+    # Job records shared by all worker processes (default: <ML_MODEL_DIR>/jobs)
+    TRAINING_JOB_DIR = os.environ.get('TRAINING_JOB_DIR')
+
+
+class ProductionConfig(Config):
+    """
+    SQLite tuned for concurrent readers and writers (APP_CONFIG=production).
+    The pragmas are applied to every new connection (see sqlite_pragmas.py).
+    """
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # readers no longer block the writer (and vice versa)
+        'synchronous': 'NORMAL',  # fsync the WAL at checkpoints, not every commit
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # ms to wait for the write lock
+        'cache_size': -64000,  # page cache in KiB (64 MB)
+        'mmap_size': 256 * 1024 * 1024,  # bytes of the file read through mmap
+        'temp_store': 'MEMORY'
+    }
+    
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # seconds
+        'pool_pre_ping': True,
+        'pool_timeout': 30
+    }
+
+
+config_by_name = {
+    'development': Config,
+    'production': ProductionConfig
+}
+
+
+def get_config(name=None):
+    """Config class for ``name`` or the APP_CONFIG environment variable"""
+    name = name or os.environ.get('APP_CONFIG') or 'development'
+    if name not in config_by_name:
+        raise ValueError(f"Unknown APP_CONFIG '{name}', expected one of {', '.join(config_by_name)}")
+    return config_by_name[name]
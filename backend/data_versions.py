@@ -0,0 +1,176 @@
+"""
+Per-user data versions and conditional GET.
+
+Every write in the expense, budget and category routes bumps a version
+counter in the same transaction: ``user:<id>`` for a user's expenses and
+budgets, ``catalog`` for the shared categories and standard descriptions.
+Read endpoints wrapped in ``conditional_get`` derive their ETag and
+Last-Modified headers from those counters and answer a matching
+If-None-Match / If-Modified-Since with 304 Not Modified after a single
+primary-key lookup, without running the view or touching expense data.
+
+Windowed endpoints (last N days, current budget period) also change as
+time passes. Their windows start at a UTC midnight (``insights.window_start``,
+``budget_status.period_window``), so validators include the current UTC
+date and are never older than today's midnight.
+"""
+
+import hashlib
+from datetime import datetime, time
+from functools import wraps
+from flask import Response, g, make_response, request
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from models import db, DataVersion
+from response_cache import get_cache
+
+CATALOG_SCOPE = 'catalog'
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def bump(*scopes):
+    """
+    Increment the version of each scope in the current transaction (the
+    caller commits), creating missing counters at version 1
+    """
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return
+
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(DataVersion)
+        .where(DataVersion.scope.in_(scopes))
+        .values(version=DataVersion.version + 1, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == len(scopes):
+        _invalidate_cache(scopes)
+        return
+
+    existing = set(db.session.scalars(select(DataVersion.scope).where(DataVersion.scope.in_(scopes))))
+    for scope in scopes:
+        if scope in existing:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(DataVersion).values(scope=scope, version=1, updated_at=now))
+        except IntegrityError:
+            # Created by a concurrent writer; count this write on top of it
+            db.session.execute(
+                update(DataVersion)
+                .where(DataVersion.scope == scope)
+                .values(version=DataVersion.version + 1, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+
+    _invalidate_cache(scopes)
+
+
+def _invalidate_cache(scopes):
+    """Free cached responses of the written scopes (their keys are stale now)"""
+    response_cache = get_cache()
+    if response_cache is not None:
+        response_cache.invalidate(scopes)
+
+
+def current(scopes):
+    """({scope: version}, last updated_at or None) for the scopes, in one query"""
+    rows = db.session.execute(
+        select(DataVersion.scope, DataVersion.version, DataVersion.updated_at)
+        .where(DataVersion.scope.in_(scopes))
+    ).all()
+    versions = {row.scope: row.version for row in rows}
+    updated_at = max((row.updated_at for row in rows), default=None)
+    return versions, updated_at
+
+
+def _validators(scopes, now=None):
+    """
+    (state key, weak ETag, Last-Modified) for the current request and scopes.
+    The state key identifies the response body and doubles as the cache key.
+    Last-Modified has whole seconds, so it is None while the second of the
+    last change is still running: another write in that second would get
+    the same value, and a client revalidating with If-Modified-Since would
+    wrongly get a 304.
+    """
+    now = now or datetime.utcnow()
+    versions, updated_at = current(scopes)
+    # Reused by the view for the rest of the request (e.g. the catalog check)
+    g.data_versions = {scope: versions.get(scope, 0) for scope in scopes}
+
+    # Same data, endpoint, parameters and day -> same body
+    params = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    state = ','.join(f'{scope}={versions.get(scope, 0)}' for scope in scopes)
+    key = f'{request.path}?{params}|{state}|{now.date().isoformat()}'
+    etag = hashlib.sha1(key.encode()).hexdigest()[:20]
+
+    midnight = datetime.combine(now.date(), time())
+    last_modified = max(updated_at or midnight, midnight).replace(microsecond=0)
+    if last_modified >= now.replace(microsecond=0):
+        last_modified = None
+    return key, etag, last_modified
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since is not None and last_modified is not None:
+        return last_modified <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def conditional_get(user_param='user_id', cache=False):
+    """
+    Decorator for GET views whose body is a function of one user's data
+    (read from ``request.args[user_param]``) and the shared catalog.
+    With ``user_param=None`` the view depends on the catalog only.
+    Requests without a user id are passed through unchanged.
+    With ``cache=True`` 200 bodies are also kept in the response cache.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            scopes = [CATALOG_SCOPE]
+            if user_param is not None:
+                user_id = request.args.get(user_param, type=int)
+                if not user_id:
+                    return view(*args, **kwargs)
+                scopes.insert(0, user_scope(user_id))
+
+            key, etag, last_modified = _validators(scopes)
+            response_cache = get_cache() if cache else None
+            cache_key = f'{request.endpoint}|{key}'
+
+            cached = None
+            not_modified = _not_modified(etag, last_modified)
+            if not not_modified and response_cache is not None:
+                cached = response_cache.get(cache_key)
+
+            if not_modified:
+                response = Response(status=304)
+            elif cached is not None:
+                response = Response(cached['body'], mimetype=cached['mimetype'])
+                response.headers['X-Cache'] = 'HIT'
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if response_cache is not None and not response.is_streamed:
+                    response_cache.set(cache_key, {
+                        'body': response.get_data(),
+                        'mimetype': response.mimetype
+                    }, scopes)
+                    response.headers['X-Cache'] = 'MISS'
+
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            # Let clients store the body but revalidate before reuse
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,258 @@
+"""
+Spending summaries, insights, stats and recommendations.
+
+Everything here is derived from one load of a user's spend window
+(``load_window``: the daily spend rollup rows, with categories from the
+in-memory catalog), so the dashboard can build all of its panels from a
+single data pass.
+The individual summary, stats and insights endpoints use the same
+builders, which keeps their numbers identical to the dashboard's.
+
+Percentiles and histograms need individual amounts, which the rollup does
+not keep; ``distribution`` streams them from the covering expense index
+once and feeds fixed-size sketches, so memory stays bounded however large
+the window is.
+"""
+
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+from sqlalchemy import select
+from models import db, Expense
+from catalog import get_catalog
+from sketches import Histogram, QuantileSketch
+import rollups
+
+SpendWindow = namedtuple('SpendWindow', ['user_id', 'days', 'start', 'rows', 'categories'])
+
+# Share of total spend in one category that triggers a warning
+HIGH_CATEGORY_SHARE = 0.4
+HIGH_AVERAGE_DAILY = 100
+
+# Amount distribution defaults (GET /expenses/stats)
+DEFAULT_PERCENTILES = (50, 90, 99)
+DEFAULT_HISTOGRAM_BINS = 10
+MAX_HISTOGRAM_BINS = 100
+QUANTILE_ACCURACY = 0.005
+DISTRIBUTION_BATCH_SIZE = 5000
+
+
+def window_start(days, now=None):
+    """
+    Start of a "last ``days`` days" window: UTC midnight ``days - 1`` days
+    ago, so the window covers ``days`` calendar days including today.
+    Windows move a whole day at a time, so their results only change with
+    the data or the date, like the validators in data_versions.
+    """
+    now = now or datetime.utcnow()
+    return datetime.combine(now.date() - timedelta(days=max(days, 1) - 1), time())
+
+
+def load_window(user_id, days=30, now=None):
+    """Spend rows for the last ``days`` days and the categories they reference"""
+    start = window_start(days, now)
+    rows = rollups.spend_rows(user_id, start)
+
+    categories_by_id = get_catalog().categories_by_id
+    categories = {
+        category_id: categories_by_id[category_id]
+        for category_id in {row.category_id for row in rows} if category_id in categories_by_id
+    }
+
+    return SpendWindow(user_id, days, start, rows, categories)
+
+
+def summary(window):
+    """Totals, per-category breakdown and daily totals (GET /expenses/summary)"""
+    total = sum(row.total for row in window.rows)
+    category_totals = rollups.totals_by_category(window.rows)
+
+    category_breakdown = [{
+        'category': category['name'],
+        'icon': category['icon'],
+        'color': category['color'],
+        'total': float(category_totals[category_id])
+    } for category_id, category in sorted(window.categories.items())]
+
+    daily_breakdown = [{
+        'date': str(day),
+        'total': float(day_total)
+    } for day, day_total in rollups.totals_by_day(window.rows).items()]
+
+    return {
+        'total_spending': float(total),
+        'period_days': window.days,
+        'average_daily': float(total / window.days) if window.days > 0 else 0,
+        'category_breakdown': category_breakdown,
+        'daily_breakdown': daily_breakdown
+    }
+
+
+def stats(window):
+    """Transaction count and amount statistics (GET /expenses/stats)"""
+    rows = window.rows
+    if not rows:
+        return {'total': 0, 'count': 0, 'average': 0, 'max': 0, 'min': 0}
+
+    total = sum(row.total for row in rows)
+    count = sum(row.count for row in rows)
+
+    return {
+        'total': float(total),
+        'count': count,
+        'average': float(total / count),
+        'max': float(max(row.max_amount for row in rows)),
+        'min': float(min(row.min_amount for row in rows))
+    }
+
+
+def distribution(window, percentiles=DEFAULT_PERCENTILES, bins=DEFAULT_HISTOGRAM_BINS):
+    """
+    Amount percentiles, histogram and per-category statistics for the
+    window. Count, total, min and max come from the rollup rows; the
+    percentiles (within QUANTILE_ACCURACY of the exact value) and the
+    histogram from one streamed pass over the window's amounts.
+    """
+    rows = window.rows
+    if not rows:
+        return {
+            'percentiles': {_percentile_key(p): 0 for p in percentiles},
+            'histogram': {'bin_edges': [], 'counts': []},
+            'by_category': []
+        }
+
+    low = min(row.min_amount for row in rows)
+    high = max(row.max_amount for row in rows)
+    histogram = Histogram(low, high, bins)
+    sketches = defaultdict(lambda: QuantileSketch(QUANTILE_ACCURACY))
+
+    result = db.session.execute(
+        select(Expense.category_id, Expense.amount)
+        .where(Expense.user_id == window.user_id, Expense.date >= window.start)
+        .execution_options(yield_per=DISTRIBUTION_BATCH_SIZE)
+    )
+    for partition in result.partitions():
+        for category_id, amount in partition:
+            sketches[category_id].add(amount)
+            histogram.add(amount)
+
+    overall = QuantileSketch(QUANTILE_ACCURACY)
+    for sketch in sketches.values():
+        overall.merge(sketch)
+
+    per_category = defaultdict(lambda: [0.0, 0, None, None])
+    for row in rows:
+        entry = per_category[row.category_id]
+        entry[0] += row.total
+        entry[1] += row.count
+        entry[2] = row.min_amount if entry[2] is None else min(entry[2], row.min_amount)
+        entry[3] = row.max_amount if entry[3] is None else max(entry[3], row.max_amount)
+
+    by_category = []
+    for category_id, (total, count, min_amount, max_amount) in sorted(per_category.items()):
+        category = window.categories.get(category_id)
+        by_category.append({
+            'category_id': category_id,
+            'category': category['name'] if category is not None else 'Unknown',
+            'count': count,
+            'total': float(total),
+            'average': float(total / count),
+            'min': float(min_amount),
+            'max': float(max_amount),
+            'percentiles': _percentiles(sketches.get(category_id), percentiles)
+        })
+
+    return {
+        'percentiles': _percentiles(overall, percentiles),
+        'histogram': {'bin_edges': histogram.edges(), 'counts': histogram.counts},
+        'by_category': by_category
+    }
+
+
+def _percentile_key(p):
+    return f'p{p:g}'
+
+
+def _percentiles(sketch, percentiles):
+    values = {}
+    for p in percentiles:
+        estimate = sketch.quantile(p / 100) if sketch is not None else None
+        values[_percentile_key(p)] = round(estimate, 2) if estimate is not None else 0
+    return values
+
+
+def spending_insights(window):
+    """Spending insights and trends (GET /insights/spending), or None without data"""
+    rows = window.rows
+    if not rows:
+        return None
+
+    total = sum(row.total for row in rows)
+    count = sum(row.count for row in rows)
+
+    category_breakdown = {}
+    for category_id, category_total in rollups.totals_by_category(rows).items():
+        category = window.categories.get(category_id)
+        name = category['name'] if category is not None else 'Unknown'
+        category_breakdown[name] = category_breakdown.get(name, 0.0) + category_total
+
+    return {
+        'total_spending': float(total),
+        'average_daily': float(total / window.days),
+        'num_transactions': count,
+        'average_transaction': float(total / count),
+        'max_transaction': float(max(row.max_amount for row in rows)),
+        'category_breakdown': {k: float(v) for k, v in category_breakdown.items()},
+        'daily_trend': {str(k): float(v) for k, v in rollups.totals_by_day(rows).items()}
+    }
+
+
+def recommendations(insights):
+    """
+    Recommendations and a short summary for a spending_insights() result.
+    Returns (recommendations, insights_summary); the summary is None without data.
+    """
+    if not insights:
+        return ['Start tracking your expenses to get personalized recommendations'], None
+
+    recommendations = []
+
+    avg_daily = insights['average_daily']
+    total = insights['total_spending']
+    category_breakdown = insights['category_breakdown']
+
+    # Check for high spending categories
+    top_category = None
+    if category_breakdown:
+        top_category, top_amount = max(category_breakdown.items(), key=lambda x: x[1])
+
+        if top_amount > total * HIGH_CATEGORY_SHARE:
+            recommendations.append({
+                'type': 'warning',
+                'title': f'High spending in {top_category}',
+                'message': f'You spent ${top_amount:.2f} ({top_amount/total*100:.1f}% of total) on {top_category} this month. Consider setting a budget limit.',
+                'priority': 'high'
+            })
+
+    # Daily spending recommendation
+    if avg_daily > HIGH_AVERAGE_DAILY:
+        recommendations.append({
+            'type': 'tip',
+            'title': 'Daily spending is high',
+            'message': f'Your average daily spending is ${avg_daily:.2f}. Try to reduce discretionary expenses by 10-20%.',
+            'priority': 'medium'
+        })
+
+    # Generic tips if no specific recommendations
+    if not recommendations:
+        recommendations.append({
+            'type': 'success',
+            'title': 'Good spending habits!',
+            'message': 'Your spending is well-balanced. Keep up the good work!',
+            'priority': 'low'
+        })
+
+    return recommendations, {
+        'total_spending': total,
+        'average_daily': avg_daily,
+        'top_category': top_category
+    }
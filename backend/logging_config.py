@@ -0,0 +1,194 @@
+"""
+Structured logging for the ML service.
+
+``init_app`` gives the ``LOG_LOGGERS`` loggers (``ml_service``) a queue
+handler: the logging thread only merges the message and puts the record
+on a bounded queue, and one listener thread formats it (JSON lines, or
+``key=value`` text with ``LOG_FORMAT = 'text'``) and writes it to stderr.
+A full queue drops records and counts them instead of blocking a request.
+
+Records logged inside a request carry ``request_id`` (the X-Request-ID
+header, or a generated id, echoed on the response), ``method``, ``path``
+and ``endpoint``; fields passed with ``extra=`` are included as well.
+
+The level defaults to INFO (``LOG_LEVEL``); per-request diagnostics are
+logged at DEBUG through ``diagnostics(logger)``, which returns a no-op
+logger unless DEBUG is enabled or the request was sampled: a fraction
+``ML_LOG_SAMPLE_RATE`` of requests log their diagnostics regardless of
+the level.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import current_app, g, has_request_context, request
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# Attributes every LogRecord has; anything else came from extra= or the filter
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+def request_id():
+    """The current request's correlation id"""
+    rid = g.get('request_id')
+    if rid is None:
+        rid = g.request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+    return rid
+
+
+def _fields(record):
+    return {key: value for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS and not key.startswith('_')}
+
+
+def _timestamp(record):
+    return datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds')
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds request correlation fields; runs on the thread that logs"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = request_id()
+            record.method = request.method
+            record.path = request.path
+            record.endpoint = request.endpoint
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': _timestamp(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update(_fields(record))
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = f'{_timestamp(record)} {record.levelname} {record.name} {record.getMessage()}'
+        fields = ' '.join(f'{key}={value}' for key, value in _fields(record).items())
+        if fields:
+            line += ' ' + fields
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+FORMATTERS = {'json': JsonFormatter, 'text': TextFormatter}
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Never blocks: records that do not fit in the queue are counted and dropped"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge the arguments now; formatting happens on the listener thread
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _NullLogger:
+    """Stands in for a logger when diagnostics are off"""
+
+    def debug(self, *args, **kwargs):
+        pass
+
+    def isEnabledFor(self, level):
+        return False
+
+
+_NULL_LOGGER = _NullLogger()
+_handler = None
+_listener = None
+_lock = threading.Lock()
+
+
+def diagnostics(logger):
+    """
+    Logger for per-request DEBUG diagnostics: ``logger`` itself when DEBUG
+    is enabled, its ``.sampled`` child when this request was sampled, and
+    otherwise a no-op.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        return logger
+    if not has_request_context():
+        return _NULL_LOGGER
+
+    sampled = g.get('log_sampled')
+    if sampled is None:
+        rate = current_app.config.get('ML_LOG_SAMPLE_RATE', 0.0)
+        sampled = g.log_sampled = rate > 0 and random.random() < rate
+    return logging.getLogger(logger.name + '.sampled') if sampled else _NULL_LOGGER
+
+
+def dropped():
+    """Records dropped because the log queue was full"""
+    return _handler.dropped if _handler is not None else 0
+
+
+def _start(config):
+    global _handler, _listener
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(FORMATTERS[config.get('LOG_FORMAT', 'json')]())
+
+    _handler = DroppingQueueHandler(queue.Queue(maxsize=config.get('LOG_QUEUE_SIZE', 10000)))
+    _handler.addFilter(RequestContextFilter())
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    # Drain what is still queued at interpreter exit
+    atexit.register(_listener.stop)
+
+
+def _add_request_id(response):
+    response.headers.setdefault(REQUEST_ID_HEADER, request_id())
+    return response
+
+
+def init_app(app):
+    config = app.config
+    format_name = config.get('LOG_FORMAT', 'json')
+    if format_name not in FORMATTERS:
+        raise ValueError(f"Unknown LOG_FORMAT: {format_name!r} (expected 'json' or 'text')")
+
+    with _lock:
+        if _handler is None:
+            _start(config)
+
+    level = logging.getLevelName(str(config.get('LOG_LEVEL', 'INFO')).upper())
+    for name in config.get('LOG_LOGGERS', ('ml_service',)):
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+        logger.propagate = False
+        if _handler not in logger.handlers:
+            logger.addHandler(_handler)
+        # Sampled diagnostics go through the child, which always lets DEBUG through
+        logging.getLogger(name + '.sampled').setLevel(logging.DEBUG)
+
+    app.after_request(_add_request_id)
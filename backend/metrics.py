@@ -0,0 +1,252 @@
+"""
+Prometheus metrics at /metrics.
+
+Off unless ``METRICS_ENABLED`` is set: a disabled app registers no request
+hooks or engine listeners, and the ML timers reduce to one flag check.
+When enabled, every request records its latency per endpoint (blueprint
+view name, e.g. ``expenses.get_expenses``) and method, the status it
+returned, and the number of SQL statements it ran and their total time
+(from ``before/after_cursor_execute``). ``BudgetPredictionService``
+reports feature build, fit and predict times through ``ml_timer`` /
+``observe_ml``; fits in the training process pool are reported when the
+job finishes. Response cache, training queue and dropped log record
+counters are read at scrape time.
+
+Metrics are kept per process, in the format of the Prometheus text
+exposition (0.0.4); with several workers each one must be scraped (or run
+a single worker per port). For streamed responses the latency covers the
+view up to the first byte.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from models import db
+import logging_config
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``observe`` is one bisect and an increment"""
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time"""
+
+    def __init__(self, name, help, read, type='gauge'):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.type = type
+
+    def render(self):
+        value = self.read()
+        if value is None:
+            return []
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}',
+                f'{self.name} {_number(value)}']
+
+
+class Registry:
+    def __init__(self):
+        self.enabled = False
+        self.metrics = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.add(Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint and method', ('endpoint', 'method')))
+REQUESTS = REGISTRY.add(Counter(
+    'http_requests_total', 'Requests by endpoint, method and status', ('endpoint', 'method', 'status')))
+REQUEST_STATEMENTS = REGISTRY.add(Histogram(
+    'http_request_db_statements', 'SQL statements per request', ('endpoint',), STATEMENT_BUCKETS))
+REQUEST_DB_TIME = REGISTRY.add(Histogram(
+    'http_request_db_seconds', 'Time spent in SQL statements per request', ('endpoint',)))
+ML_STAGE = REGISTRY.add(Histogram(
+    'ml_stage_duration_seconds', 'BudgetPredictionService stage time (feature_build, fit, predict)',
+    ('stage',), (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)))
+
+
+def observe_ml(stage, seconds):
+    if REGISTRY.enabled:
+        ML_STAGE.observe((stage,), seconds)
+
+
+class ml_timer:
+    """``with ml_timer('predict'):`` records the block's duration when enabled"""
+
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter() if REGISTRY.enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            ML_STAGE.observe((self.stage,), time.perf_counter() - self.start)
+        return False
+
+
+def _before_request():
+    g._metrics = [time.perf_counter(), 0, 0.0]  # start, statements, DB seconds
+
+
+def _after_request(response):
+    state = g.pop('_metrics', None)
+    if state is not None:
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.observe((endpoint, request.method), time.perf_counter() - state[0])
+        REQUESTS.inc((endpoint, request.method, str(response.status_code)))
+        REQUEST_STATEMENTS.observe((endpoint,), state[1])
+        REQUEST_DB_TIME.observe((endpoint,), state[2])
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_request_context():
+        state = g.get('_metrics')
+        if state is not None:
+            state[1] += 1
+            state[2] += elapsed
+
+
+def _cache_value(app, key):
+    def read():
+        cache = app.extensions.get('response_cache')
+        return cache.stats().get(key) if cache is not None else None
+    return read
+
+
+def _training_value(key):
+    def read():
+        from training_jobs import _training_queue
+        return _training_queue.stats()[key] if _training_queue is not None else None
+    return read
+
+
+def init_app(app):
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    REGISTRY.enabled = True
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    # Scrape-time values for this app
+    gauges = [
+        Gauge('response_cache_hits_total', 'Response cache hits', _cache_value(app, 'hits'), 'counter'),
+        Gauge('response_cache_misses_total', 'Response cache misses', _cache_value(app, 'misses'), 'counter'),
+        Gauge('response_cache_entries', 'Entries in the response cache', _cache_value(app, 'entries')),
+        Gauge('response_cache_evictions_total', 'Response cache LRU evictions',
+              _cache_value(app, 'evictions'), 'counter'),
+        Gauge('training_jobs_active', 'Queued or running training jobs', _training_value('active_jobs')),
+        Gauge('log_records_dropped_total', 'Log records dropped because the log queue was full',
+              logging_config.dropped, 'counter')
+    ]
+
+    @app.route(app.config.get('METRICS_PATH', '/metrics'))
+    def metrics():
+        text = REGISTRY.render() + ''.join(
+            line + '\n' for gauge in gauges for line in gauge.render())
+        return Response(text, mimetype=None, content_type=CONTENT_TYPE)
@@ -0,0 +1,202 @@
+"""
+Versioned schema migrations for the Smart Expense Tracker database.
+
+Each migration is a function registered with the ``@migration`` decorator
+and runs inside its own transaction. Applied versions are recorded in the
+``schema_migrations`` table so every migration runs exactly once per
+database, whether it was created from scratch or by an older
+``db.create_all()`` call.
+
+Migrations declare the tables and indexes they create themselves, on a
+private MetaData, instead of reading them from the models: a migration
+must run the same DDL forever, and a later model change needs a new
+migration to reach databases that are already past the old ones.
+"""
+
+from datetime import datetime
+from sqlalchemy import (MetaData, Table, Column, ForeignKey, Index, Boolean, Float, Integer, String, Text,
+                        Date, DateTime, func, insert, select)
+from models import db
+
+# Kept outside db.metadata so create_all() never touches it
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    'schema_migrations', migration_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register a migration function for the given schema version"""
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return decorator
+
+
+@migration(1, 'Create base tables')
+def create_base_tables(connection):
+    metadata = MetaData()
+    Table(
+        'users', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('username', String(80), unique=True, nullable=False),
+        Column('email', String(120), unique=True, nullable=False),
+        Column('created_at', DateTime)
+    )
+    Table(
+        'categories', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('name', String(50), unique=True, nullable=False),
+        Column('icon', String(50)),
+        Column('color', String(20))
+    )
+    Table(
+        'standard_descriptions', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('category_id', Integer, ForeignKey('categories.id'), nullable=False),
+        Column('description', String(200), nullable=False),
+        Column('is_active', Boolean)
+    )
+    Table(
+        'expenses', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+        Column('category_id', Integer, ForeignKey('categories.id'), nullable=False),
+        Column('amount', Float, nullable=False),
+        Column('description', String(200)),
+        Column('notes', Text),
+        Column('date', DateTime, nullable=False),
+        Column('created_at', DateTime),
+        Column('updated_at', DateTime)
+    )
+    Table(
+        'budgets', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+        Column('category_id', Integer, ForeignKey('categories.id'), nullable=False),
+        Column('amount', Float, nullable=False),
+        Column('period', String(20)),
+        Column('start_date', DateTime, nullable=False),
+        Column('end_date', DateTime),
+        Column('is_active', Boolean),
+        Column('created_at', DateTime)
+    )
+    Table(
+        'budget_predictions', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+        Column('category_id', Integer, ForeignKey('categories.id')),
+        Column('predicted_amount', Float, nullable=False),
+        Column('confidence_score', Float),
+        Column('prediction_period', String(50)),
+        Column('features_used', Text),
+        Column('created_at', DateTime)
+    )
+    metadata.create_all(bind=connection, checkfirst=True)
+
+
+@migration(2, 'Add composite indexes for expense, budget and prediction reads')
+def add_hot_path_indexes(connection):
+    # Only the indexed columns; the tables exist since migration 1
+    metadata = MetaData()
+    expenses = Table('expenses', metadata, Column('user_id', Integer), Column('category_id', Integer),
+                     Column('date', DateTime), Column('amount', Float))
+    budgets = Table('budgets', metadata, Column('user_id', Integer), Column('is_active', Boolean),
+                    Column('category_id', Integer))
+    budget_predictions = Table('budget_predictions', metadata, Column('user_id', Integer),
+                               Column('created_at', DateTime))
+    indexes = [
+        # Both expense indexes end with amount so SUM/MIN/MAX are answered from the index
+        Index('ix_expenses_user_date', expenses.c.user_id, expenses.c.date, expenses.c.category_id,
+              expenses.c.amount),
+        Index('ix_expenses_user_category_date', expenses.c.user_id, expenses.c.category_id, expenses.c.date,
+              expenses.c.amount),
+        Index('ix_budgets_user_active', budgets.c.user_id, budgets.c.is_active, budgets.c.category_id),
+        Index('ix_budget_predictions_user_created', budget_predictions.c.user_id, budget_predictions.c.created_at)
+    ]
+    for index in indexes:
+        index.create(bind=connection, checkfirst=True)
+
+
+@migration(3, 'Add daily spend rollup table and backfill it from expenses')
+def add_daily_spend_rollup(connection):
+    metadata = MetaData()
+    Table('users', metadata, Column('id', Integer, primary_key=True))
+    Table('categories', metadata, Column('id', Integer, primary_key=True))
+    expenses = Table('expenses', metadata, Column('id', Integer, primary_key=True), Column('user_id', Integer),
+                     Column('category_id', Integer), Column('amount', Float), Column('date', DateTime))
+    daily_spend = Table(
+        'daily_spend', metadata,
+        Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+        Column('category_id', Integer, ForeignKey('categories.id'), primary_key=True),
+        Column('day', Date, primary_key=True),
+        Column('total', Float, nullable=False),
+        Column('count', Integer, nullable=False),
+        Column('min_amount', Float),
+        Column('max_amount', Float),
+        Index('ix_daily_spend_user_day', 'user_id', 'day')
+    )
+    daily_spend.create(bind=connection, checkfirst=True)
+
+    day = func.date(expenses.c.date)
+    connection.execute(insert(daily_spend).from_select(
+        ['user_id', 'category_id', 'day', 'total', 'count', 'min_amount', 'max_amount'],
+        select(expenses.c.user_id, expenses.c.category_id, day, func.sum(expenses.c.amount),
+               func.count(expenses.c.id), func.min(expenses.c.amount), func.max(expenses.c.amount))
+        .group_by(expenses.c.user_id, expenses.c.category_id, day)
+    ))
+
+
+@migration(4, 'Add data version counters for conditional GET')
+def add_data_versions(connection):
+    metadata = MetaData()
+    data_versions = Table(
+        'data_versions', metadata,
+        Column('scope', String(50), primary_key=True),
+        Column('version', Integer, nullable=False),
+        Column('updated_at', DateTime, nullable=False)
+    )
+    data_versions.create(bind=connection, checkfirst=True)
+
+
+def current_version(connection):
+    """Return the highest applied migration version (0 for a new database)"""
+    migration_metadata.create_all(bind=connection, checkfirst=True)
+    versions = connection.execute(select(schema_migrations.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def upgrade(engine=None, target=None):
+    """
+    Apply all pending migrations up to ``target`` (default: latest).
+    Must be called inside an application context when no engine is given.
+    Returns the list of versions that were applied.
+    """
+    engine = engine or db.engine
+    applied = []
+
+    with engine.begin() as connection:
+        version = current_version(connection)
+
+    for number, description, apply in MIGRATIONS:
+        if number <= version or (target is not None and number > target):
+            continue
+
+        with engine.begin() as connection:
+            apply(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=number,
+                description=description,
+                applied_at=datetime.utcnow()
+            ))
+
+        applied.append(number)
+
+    return applied
@@ -1,6 +1,8 @@
-import os
+import copy
 import json
-import joblib
+import logging
+import math
+import time
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -8,195 +10,249 @@ from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
+from flask import current_app, has_app_context
 from models import Expense, Budget, BudgetPrediction, db
+from model_registry import ModelBundle, ModelRegistry
+import insights
+from metrics import ml_timer, observe_ml
+from logging_config import diagnostics
 from sqlalchemy import func
 
+# Weekly feature frame columns that are keys or targets, not model inputs
+NON_FEATURE_COLUMNS = ('iso_year', 'week', 'total_spending')
+
+# Boosting stages added to the ensemble by each incremental update
+INCREMENTAL_ESTIMATORS = 10
+
+# plan_training reason when nothing changed since the current model's fit
+UP_TO_DATE = 'up to date'
+
+log = logging.getLogger('ml_service')
+
 class BudgetPredictionService:
-    def __init__(self, model_path='models/budget_predictor.joblib', scaler_path='models/scaler.joblib'):
-        self.model_path = model_path
-        self.scaler_path = scaler_path
-        self.model = None
-        self.scaler = None
-        self.feature_columns = None
-        
-        # Create models directory if it doesn't exist
-        os.makedirs('models', exist_ok=True)
-        
-        # Don't load model on init - train fresh each time for now
-        # self.load_model()
-    
-    def load_model(self):
-        """Load the trained model and scaler from disk"""
-        try:
-            if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
-                self.model = joblib.load(self.model_path)
-                self.scaler = joblib.load(self.scaler_path)
-                
-                # Load feature columns if available
-                feature_path = 'models/feature_columns.json'
-                if os.path.exists(feature_path):
-                    with open(feature_path, 'r') as f:
-                        self.feature_columns = json.load(f)
-                
-                print("✓ Model and scaler loaded successfully")
-                return True
-            else:
-                print("⚠ Model files not found. Will train new model.")
-                return False
-        except Exception as e:
-            print(f"✗ Error loading model: {str(e)}")
-            self.model = None
-            self.scaler = None
-            return False
+    def __init__(self, registry=None):
+        # Models live in a per-(user, category) registry, created from the
+        # app config on first use unless one is passed in
+        self._registry = registry
     
-    def save_model(self):
-        """Save the trained model and scaler to disk"""
-        try:
-            # Only save if model and scaler exist
-            if self.model is None or self.scaler is None:
-                print("⚠ Cannot save: model or scaler is None")
-                return False
-            
-            joblib.dump(self.model, self.model_path)
-            joblib.dump(self.scaler, self.scaler_path)
-            
-            # Save feature columns
-            if self.feature_columns:
-                with open('models/feature_columns.json', 'w') as f:
-                    json.dump(self.feature_columns, f)
-            
-            print("✓ Model, scaler, and features saved successfully")
-            return True
-        except Exception as e:
-            print(f"✗ Error saving model: {str(e)}")
-            return False
+    @property
+    def registry(self):
+        if self._registry is None:
+            self._registry = ModelRegistry.from_config(current_app.config if has_app_context() else {})
+        return self._registry
     
-    def prepare_features(self, expenses_df, for_training=True):
+    def prepare_features(self, expenses_df, for_training=True, group_keys=None):
         """
-        Prepare features from expenses dataframe
+        Prepare weekly features from expenses dataframe.
+        Weeks are keyed by (iso_year, week) and built with a single groupby
+        plus one category pivot, so the cost is linear in the number of rows.
+        Pass group_keys (e.g. ['user_id']) to build features for many
+        histories in one pass; the keys are kept as leading columns.
         """
         if expenses_df.empty:
-            print("⚠ Empty expenses dataframe")
+            diagnostics(log).debug('empty expenses frame')
             return pd.DataFrame()
         
         try:
+            started = time.perf_counter()
+            expenses_df = expenses_df.copy()
             expenses_df['date'] = pd.to_datetime(expenses_df['date'])
-            expenses_df = expenses_df.sort_values('date')
+            expenses_df = expenses_df.sort_values('date', kind='stable')
             
-            # Time-based features
-            expenses_df['day_of_week'] = expenses_df['date'].dt.dayofweek
-            expenses_df['day_of_month'] = expenses_df['date'].dt.day
-            expenses_df['month'] = expenses_df['date'].dt.month
-            expenses_df['week_of_year'] = expenses_df['date'].dt.isocalendar().week
+            iso = expenses_df['date'].dt.isocalendar()
+            expenses_df['iso_year'] = iso['year'].astype(int)
+            expenses_df['week'] = iso['week'].astype(int)
+            week_keys = list(group_keys or []) + ['iso_year', 'week']
             
             # Aggregate features by week
-            weekly_stats = []
-            
-            for week in expenses_df['week_of_year'].unique():
-                week_data = expenses_df[expenses_df['week_of_year'] == week]
-                
-                features = {
-                    'week': week,
-                    'total_spending': float(week_data['amount'].sum()),
-                    'avg_transaction': float(week_data['amount'].mean()),
-                    'num_transactions': int(len(week_data)),
-                    'max_transaction': float(week_data['amount'].max()),
-                    'min_transaction': float(week_data['amount'].min()),
-                    'std_transaction': float(week_data['amount'].std()) if len(week_data) > 1 else 0.0,
-                }
-                
-                # Category distribution
-                if 'category_id' in week_data.columns:
-                    category_totals = week_data.groupby('category_id')['amount'].sum()
-                    for cat_id in expenses_df['category_id'].unique():
-                        features[f'category_{cat_id}_spending'] = float(category_totals.get(cat_id, 0))
-                
-                weekly_stats.append(features)
-            
-            result_df = pd.DataFrame(weekly_stats)
-            print(f"✓ Prepared {len(result_df)} weekly feature rows")
+            result_df = expenses_df.groupby(week_keys, sort=True)['amount'].agg(
+                total_spending='sum',
+                avg_transaction='mean',
+                num_transactions='size',
+                max_transaction='max',
+                min_transaction='min',
+                std_transaction='std'
+            )
+            result_df['std_transaction'] = result_df['std_transaction'].fillna(0.0)
+            result_df = result_df.astype({col: float for col in result_df.columns if col != 'num_transactions'})
+            
+            # Category distribution, columns in order of first appearance
+            if 'category_id' in expenses_df.columns:
+                category_ids = expenses_df['category_id'].unique()
+                category_totals = expenses_df.groupby(week_keys + ['category_id'])['amount'].sum()\
+                    .unstack(fill_value=0.0)\
+                    .reindex(columns=category_ids, fill_value=0.0)\
+                    .astype(float)
+                category_totals.columns = [f'category_{cat_id}_spending' for cat_id in category_ids]
+                result_df = result_df.join(category_totals)
+            
+            result_df = result_df.reset_index()
+            observe_ml('feature_build', time.perf_counter() - started)
+            diagnostics(log).debug('features prepared', extra={
+                'expenses': len(expenses_df), 'weeks': len(result_df)})
             return result_df
         
-        except Exception as e:
-            print(f"✗ Error preparing features: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            log.exception('feature preparation failed')
             return pd.DataFrame()
     
-    def train_model(self, user_id, category_id=None):
+    def load_training_data(self, user_id, category_id=None, since=None):
+        """Load a user's expense history (optionally one category, or from since on) as a DataFrame"""
+        query = db.session.query(Expense.date, Expense.amount, Expense.category_id)\
+            .filter(Expense.user_id == user_id)
+        if category_id:
+            query = query.filter(Expense.category_id == category_id)
+        if since is not None:
+            query = query.filter(Expense.date >= since)
+        
+        return pd.DataFrame(query.all(), columns=['date', 'amount', 'category_id'])\
+            .astype({'amount': float})
+    
+    def plan_training(self, user_id, category_id=None, full=False):
+        """
+        Choose between an incremental update of the current model and a full
+        retrain. Returns (base, expenses_df, reason): base is the bundle to
+        update, or None for a full retrain, and expenses_df the expenses to
+        fit (for an update only those from the base's last fitted week on).
+        When no expense changed since the base was fitted, reason is
+        UP_TO_DATE and base should be kept as it is.
+        """
+        config = current_app.config
+        base = None
+        if full:
+            reason = 'requested'
+        elif not config.get('ML_INCREMENTAL_TRAINING', True):
+            reason = 'incremental training disabled'
+        else:
+            base = self.registry.get(user_id, category_id)
+            reason = self._full_retrain_reason(base, config)
+        
+        if reason is None:
+            # Expenses added, edited or deleted before the watermark change weeks
+            # the update would not featurize again
+            watermark = datetime.fromisoformat(base.metrics['watermark'])
+            query = db.session.query(func.count(Expense.id), func.coalesce(func.sum(Expense.amount), 0.0))\
+                .filter(Expense.user_id == user_id, Expense.date < watermark)
+            if category_id:
+                query = query.filter(Expense.category_id == category_id)
+            count, amount = query.one()
+            if count != base.metrics['history_expenses'] or \
+                    not math.isclose(amount, base.metrics['history_amount'], rel_tol=1e-9, abs_tol=0.005):
+                reason = 'history changed'
+        
+        if reason is None:
+            df = self.load_training_data(user_id, category_id, since=watermark)
+            # Another update on the same data would only add stages fitted to it again
+            if len(df) == base.metrics.get('recent_expenses') and \
+                    math.isclose(df['amount'].sum(), base.metrics['recent_amount'], rel_tol=1e-9, abs_tol=0.005):
+                return base, df, UP_TO_DATE
+            columns = {f'category_{cat_id}_spending' for cat_id in df['category_id'].unique()}
+            if columns <= set(expected_feature_columns(base)):
+                return base, df, 'incremental'
+            reason = 'new categories'
+        
+        return None, self.load_training_data(user_id, category_id), reason
+    
+    def _full_retrain_reason(self, base, config):
+        """Why base cannot be updated incrementally, or None if it can"""
+        if base is None:
+            return 'no model'
+        if base.training_features is None or not {'watermark', 'test_weeks'} <= base.metrics.keys():
+            return 'no training features'
+        if base.metrics.get('incremental_updates', 0) >= config.get('ML_FULL_RETRAIN_UPDATES', 8):
+            return 'scheduled'
+        full_trained_at = datetime.fromisoformat(base.metrics['full_trained_at'])
+        if datetime.utcnow() - full_trained_at >= timedelta(days=config.get('ML_FULL_RETRAIN_DAYS', 7)):
+            return 'scheduled'
+        return None
+    
+    def train_model(self, user_id, category_id=None, full=False):
         """
         Train the budget prediction model using historical expense data
+        and save it to the registry as the next version for the user/category.
+        The current model is updated incrementally when possible (see
+        plan_training); full=True forces a full retrain.
         """
         try:
-            print(f"\n{'='*50}")
-            print(f"TRAINING MODEL FOR USER {user_id}")
-            print(f"{'='*50}")
+            base, df, reason = self.plan_training(user_id, category_id, full)
+            diagnostics(log).debug('training data loaded', extra={
+                'user_id': user_id, 'category_id': category_id, 'expenses': len(df), 'reason': reason})
             
-            # Get historical expenses
-            query = Expense.query.filter_by(user_id=user_id)
-            if category_id:
-                query = query.filter_by(category_id=category_id)
-            
-            expenses = query.all()
-            
-            print(f"📊 Found {len(expenses)} expenses for user {user_id}")
+            if reason == UP_TO_DATE:
+                log.info('model up to date', extra={
+                    'user_id': user_id, 'category_id': category_id, 'model_version': base.version})
+                return True, base.metrics
             
-            if len(expenses) < 10:
-                error_msg = f"Insufficient data: need at least 10 expenses, found {len(expenses)}"
-                print(f"✗ {error_msg}")
+            if base is not None:
+                success, result = self.update_model(base, df)
+            else:
+                success, result = self.fit_model(df)
+            if not success:
+                log.info('training skipped', extra={
+                    'user_id': user_id, 'category_id': category_id, 'reason': result})
+                return False, result
+            
+            # Save model as the next version for this user/category
+            result.metrics['model_version'] = self.registry.save(user_id, category_id, result)
+            log.info('model trained', extra=dict(
+                result.metrics, user_id=user_id, category_id=category_id, reason=reason))
+            
+            return True, result.metrics
+        
+        except Exception as e:
+            error_msg = f"Error training model: {str(e)}"
+            log.exception('training failed', extra={'user_id': user_id, 'category_id': category_id})
+            return False, error_msg
+    
+    def fit_model(self, df):
+        """
+        Fit a model on an expense DataFrame (date, amount, category_id).
+        Touches neither the database nor the registry, so it can run in a
+        worker process. Returns (True, ModelBundle) or (False, error message).
+        """
+        try:
+            if len(df) < 10:
+                error_msg = f"Insufficient data: need at least 10 expenses, found {len(df)}"
                 return False, error_msg
             
-            # Convert to DataFrame
-            expenses_data = [{
-                'date': exp.date,
-                'amount': float(exp.amount),
-                'category_id': exp.category_id
-            } for exp in expenses]
-            
-            df = pd.DataFrame(expenses_data)
-            print(f"📋 DataFrame shape: {df.shape}")
-            
             # Prepare features
             features_df = self.prepare_features(df, for_training=True)
             
             if features_df.empty or len(features_df) < 3:
                 error_msg = f"Insufficient weekly data: need at least 3 weeks, found {len(features_df)}"
-                print(f"✗ {error_msg}")
                 return False, error_msg
             
-            print(f"📈 Features DataFrame shape: {features_df.shape}")
-            
             # Prepare X and y
             feature_columns = [col for col in features_df.columns 
-                             if col not in ['week', 'total_spending']]
-            self.feature_columns = feature_columns
+                             if col not in NON_FEATURE_COLUMNS]
             
             X = features_df[feature_columns].fillna(0).astype(float)
             y = features_df['total_spending'].astype(float)
             
-            print(f"🔢 Training with {len(feature_columns)} features on {len(X)} samples")
-            print(f"📝 Feature columns: {feature_columns[:5]}..." if len(feature_columns) > 5 else f"📝 Feature columns: {feature_columns}")
+            diag = diagnostics(log)
+            diag.debug('training features', extra={
+                'weeks': len(X), 'features': len(feature_columns), 'feature_columns': feature_columns})
             
             # Split data
             if len(X) < 6:
                 # Use all data for training if dataset is very small
                 X_train, X_test, y_train, y_test = X, X, y, y
-                print("⚠ Using all data for both train and test (dataset too small)")
+                test_weeks = []
+                diag.debug('dataset too small to split; evaluating on the training data')
             else:
                 X_train, X_test, y_train, y_test = train_test_split(
                     X, y, test_size=0.2, random_state=42
                 )
-                print(f"✓ Split: {len(X_train)} train, {len(X_test)} test")
+                # Incremental updates keep these weeks held out too
+                test_weeks = sorted(int(key) for key in _week_keys(features_df.loc[X_test.index]))
             
             # Scale features
-            self.scaler = StandardScaler()
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
-            
-            print("✓ Features scaled")
+            scaler = StandardScaler()
+            X_train_scaled = scaler.fit_transform(X_train)
+            X_test_scaled = scaler.transform(X_test)
             
             # Train model
-            self.model = GradientBoostingRegressor(
+            model = GradientBoostingRegressor(
                 n_estimators=50,  # Reduced for faster training
                 learning_rate=0.1,
                 max_depth=3,      # Reduced to prevent overfitting
@@ -205,19 +261,20 @@ class BudgetPredictionService:
                 min_samples_leaf=1
             )
             
-            print("🎯 Training model...")
-            self.model.fit(X_train_scaled, y_train)
-            print("✓ Model trained successfully")
+            started = time.perf_counter()
+            model.fit(X_train_scaled, y_train)
+            fit_seconds = time.perf_counter() - started
+            observe_ml('fit', fit_seconds)
             
             # Verify model is properly trained
-            if not hasattr(self.model, 'estimators_'):
+            if not hasattr(model, 'estimators_'):
                 error_msg = "Model training failed - no estimators created"
-                print(f"✗ {error_msg}")
+                log.error(error_msg)
                 return False, error_msg
             
             # Evaluate
-            train_predictions = self.model.predict(X_train_scaled)
-            test_predictions = self.model.predict(X_test_scaled)
+            train_predictions = model.predict(X_train_scaled)
+            test_predictions = model.predict(X_test_scaled)
             
             train_mae = mean_absolute_error(y_train, train_predictions)
             test_mae = mean_absolute_error(y_test, test_predictions)
@@ -230,30 +287,107 @@ class BudgetPredictionService:
                 'train_r2': float(train_r2),
                 'test_r2': float(test_r2),
                 'features_count': len(feature_columns),
-                'training_samples': len(X_train)
+                'training_samples': len(X_train),
+                'fit_seconds': round(fit_seconds, 4),
+                'training_mode': 'full',
+                'estimators': model.n_estimators,
+                'incremental_updates': 0,
+                'full_trained_at': datetime.utcnow().isoformat(),
+                'test_weeks': test_weeks
             }
+            metrics.update(training_state(features_df, df))
+            
+            diag.debug('model fitted', extra=metrics)
             
-            print(f"📊 Training MAE: ${train_mae:.2f}")
-            print(f"📊 Test MAE: ${test_mae:.2f}")
-            print(f"📊 Train R²: {train_r2:.3f}")
-            print(f"📊 Test R²: {test_r2:.3f}")
+            return True, ModelBundle(model, scaler, feature_columns, metrics, training_features=features_df)
+        
+        except Exception as e:
+            error_msg = f"Error training model: {str(e)}"
+            log.exception('model fit failed')
+            return False, error_msg
+    
+    def update_model(self, base, df):
+        """
+        Update a trained bundle with the expenses from its last fitted week
+        on (see plan_training). Only those weeks are featurized; they replace
+        the last stored week and are appended to the stored feature frame,
+        and INCREMENTAL_ESTIMATORS boosting stages are added (warm start) on
+        the combined frame, scaled with the bundle's scaler. The weeks the
+        last full fit held out stay out of the fit and are scored again as
+        the test set. Like fit_model it touches neither the database nor
+        the registry.
+        Returns (True, ModelBundle) or (False, error message).
+        """
+        try:
+            feature_columns = expected_feature_columns(base)
+            stored = base.training_features
+            watermark = datetime.fromisoformat(base.metrics['watermark']).isocalendar()
+            week_key = _week_keys(stored)
+            
+            new_features = self.prepare_features(df, for_training=True)
+            kept = stored[week_key < watermark[0] * 100 + watermark[1]]
+            if not new_features.empty:
+                new_features = new_features.reindex(columns=stored.columns, fill_value=0.0)
+            features_df = pd.concat([kept, new_features], ignore_index=True)
+            if len(features_df) < 3:
+                return False, f"Insufficient weekly data: need at least 3 weeks, found {len(features_df)}"
             
-            # Save model
-            save_success = self.save_model()
-            if save_success:
-                print("✓ Model saved to disk")
+            X = features_df[feature_columns].fillna(0).astype(float)
+            y = features_df['total_spending'].astype(float)
+            X_scaled = base.scaler.transform(X)
+            
+            keys = _week_keys(features_df)
+            # Weeks the base model has not seen, scored before the update
+            unseen = (keys > week_key.max()).to_numpy()
+            holdout_mae = None
+            if unseen.any():
+                holdout_mae = float(mean_absolute_error(y[unseen], base.model.predict(X_scaled[unseen])))
+            
+            test = keys.isin(base.metrics['test_weeks']).to_numpy()
+            if test.any():
+                X_train, y_train, X_test, y_test = X_scaled[~test], y[~test], X_scaled[test], y[test]
             else:
-                print("⚠ Model not saved (will use in-memory only)")
+                # Like fit_model on a very small dataset: evaluated on the training data
+                X_train, y_train, X_test, y_test = X_scaled, y, X_scaled, y
+            
+            # The registry's bundle is shared with predictions; extend a copy
+            model = copy.deepcopy(base.model)
+            model.set_params(warm_start=True, n_estimators=model.n_estimators + INCREMENTAL_ESTIMATORS)
+            started = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_seconds = time.perf_counter() - started
+            observe_ml('fit', fit_seconds)
+            model.set_params(warm_start=False)
+            
+            train_predictions = model.predict(X_train)
+            test_predictions = model.predict(X_test)
+            metrics = {
+                'train_mae': float(mean_absolute_error(y_train, train_predictions)),
+                'test_mae': float(mean_absolute_error(y_test, test_predictions)),
+                'train_r2': float(r2_score(y_train, train_predictions)),
+                'test_r2': float(r2_score(y_test, test_predictions)),
+                'holdout_mae': holdout_mae,
+                'holdout_weeks': int(unseen.sum()),
+                'features_count': len(feature_columns),
+                'training_samples': len(X_train),
+                'fit_seconds': round(fit_seconds, 4),
+                'training_mode': 'incremental',
+                'estimators': model.n_estimators,
+                'incremental_updates': base.metrics.get('incremental_updates', 0) + 1,
+                'full_trained_at': base.metrics['full_trained_at'],
+                'test_weeks': base.metrics['test_weeks']
+            }
+            metrics.update(training_state(
+                features_df, df, base.metrics['history_expenses'], base.metrics['history_amount']))
             
-            print(f"{'='*50}\n")
+            diagnostics(log).debug('model updated', extra=metrics)
             
-            return True, metrics
+            return True, ModelBundle(model, base.scaler, base.feature_columns, metrics,
+                                     training_features=features_df)
         
         except Exception as e:
-            error_msg = f"Error training model: {str(e)}"
-            print(f"✗ {error_msg}")
-            import traceback
-            traceback.print_exc()
+            error_msg = f"Error updating model: {str(e)}"
+            log.exception('model update failed')
             return False, error_msg
     
     def predict_budget(self, user_id, category_id=None, period='monthly'):
@@ -261,24 +395,16 @@ class BudgetPredictionService:
         Predict budget for the next period based on historical data
         """
         try:
-            print(f"\n{'='*50}")
-            print(f"MAKING PREDICTION FOR USER {user_id}")
-            print(f"{'='*50}")
-            
-            # Check if model exists, if not train it
-            if self.model is None or self.scaler is None:
-                print("⚠ Model not loaded, training new model...")
-                success, result = self.train_model(user_id, category_id)
-                if not success:
-                    print(f"✗ Training failed: {result}")
-                    return None, result
+            diag = diagnostics(log)
             
-            # Verify model is valid
-            if not hasattr(self.model, 'estimators_'):
-                print("⚠ Model invalid, retraining...")
+            # Check if a model exists for this user/category, if not train it
+            bundle = self.registry.get(user_id, category_id)
+            if bundle is None or not hasattr(bundle.model, 'estimators_'):
+                log.info('no trained model; training one', extra={'user_id': user_id, 'category_id': category_id})
                 success, result = self.train_model(user_id, category_id)
                 if not success:
                     return None, result
+                bundle = self.registry.get(user_id, category_id)
             
             # Get recent expenses
             query = Expense.query.filter_by(user_id=user_id)
@@ -288,11 +414,11 @@ class BudgetPredictionService:
             cutoff_date = datetime.utcnow() - timedelta(days=60)
             recent_expenses = query.filter(Expense.date >= cutoff_date).all()
             
-            print(f"📊 Found {len(recent_expenses)} recent expenses")
+            diag.debug('recent expenses loaded', extra={
+                'user_id': user_id, 'category_id': category_id, 'expenses': len(recent_expenses)})
             
             if not recent_expenses:
                 error_msg = "No recent expense data (last 60 days)"
-                print(f"✗ {error_msg}")
                 return None, error_msg
             
             # Convert to DataFrame
@@ -307,24 +433,19 @@ class BudgetPredictionService:
             
             if features_df.empty:
                 error_msg = "Unable to prepare features from recent data"
-                print(f"✗ {error_msg}")
+                log.warning(error_msg, extra={'user_id': user_id, 'category_id': category_id})
                 return None, error_msg
             
             # Use most recent week's features
             latest_features = features_df.iloc[-1:]
             
             # Get expected features
-            if hasattr(self.scaler, 'feature_names_in_'):
-                expected_features = list(self.scaler.feature_names_in_)
-            elif self.feature_columns:
-                expected_features = self.feature_columns
-            else:
+            expected_features = expected_feature_columns(bundle)
+            if not expected_features:
                 error_msg = "Cannot determine expected features"
-                print(f"✗ {error_msg}")
+                log.error(error_msg, extra={'user_id': user_id, 'category_id': category_id})
                 return None, error_msg
             
-            print(f"🔢 Expected {len(expected_features)} features")
-            
             # Create prediction DataFrame with all expected columns
             X_pred = pd.DataFrame(columns=expected_features)
             
@@ -337,23 +458,13 @@ class BudgetPredictionService:
             
             X_pred = X_pred.astype(float)
             
-            print(f"✓ Prediction features prepared: {X_pred.shape}")
-            
             # Scale and predict
-            X_pred_scaled = self.scaler.transform(X_pred)
-            weekly_prediction = float(self.model.predict(X_pred_scaled)[0])
-            
-            print(f"💰 Weekly prediction: ${weekly_prediction:.2f}")
+            with ml_timer('predict'):
+                X_pred_scaled = bundle.scaler.transform(X_pred)
+                weekly_prediction = float(bundle.model.predict(X_pred_scaled)[0])
             
             # Convert to requested period
-            if period == 'monthly':
-                predicted_amount = weekly_prediction * 4.33
-            elif period == 'weekly':
-                predicted_amount = weekly_prediction
-            elif period == 'daily':
-                predicted_amount = weekly_prediction / 7
-            else:
-                predicted_amount = weekly_prediction * 4.33
+            predicted_amount = to_period_amount(weekly_prediction, period)
             
             # Calculate confidence
             if len(features_df) >= 4:
@@ -375,61 +486,152 @@ class BudgetPredictionService:
                                             for k, v in X_pred.iloc[0].to_dict().items()})
             }
             
-            print(f"✓ Final prediction: ${result['predicted_amount']:.2f} ({period})")
-            print(f"✓ Confidence: {result['confidence_score']*100:.0f}%")
-            print(f"{'='*50}\n")
+            diag.debug('prediction', extra={
+                'user_id': user_id, 'category_id': category_id, 'features': len(expected_features),
+                'weekly_prediction': weekly_prediction, 'predicted_amount': result['predicted_amount'],
+                'confidence_score': result['confidence_score'], 'period': period})
             
             return result, None
         
         except Exception as e:
             error_msg = f"Error making prediction: {str(e)}"
-            print(f"✗ {error_msg}")
-            import traceback
-            traceback.print_exc()
+            log.exception('prediction failed', extra={'user_id': user_id, 'category_id': category_id})
             return None, error_msg
     
+    def predict_batch(self, user_ids, category_ids=None, period='monthly', lookback_days=60):
+        """
+        Predict budgets for many users at once: one expense query, one
+        vectorized feature pass and one predict call per model.
+        Without category_ids each user's overall budget is predicted,
+        otherwise one prediction per user and listed category.
+        Returns (predictions, skipped) as lists of dicts.
+        """
+        cutoff_date = datetime.utcnow() - timedelta(days=lookback_days)
+        scopes = [(user_id, category_id) for user_id in user_ids
+                  for category_id in (category_ids or [None])]
+        
+        query = db.session.query(Expense.user_id, Expense.category_id, Expense.date, Expense.amount)\
+            .filter(Expense.user_id.in_(user_ids), Expense.date >= cutoff_date)
+        if category_ids:
+            query = query.filter(Expense.category_id.in_(category_ids))
+        
+        df = pd.DataFrame(query.all(), columns=['user_id', 'category_id', 'date', 'amount'])\
+            .astype({'amount': float})
+        
+        # scope_category 0 stands for "all categories"
+        df['scope_category'] = df['category_id'] if category_ids else 0
+        scope_keys = ['user_id', 'scope_category']
+        
+        features_df = self.prepare_features(df, for_training=False, group_keys=scope_keys) \
+            if not df.empty else pd.DataFrame(columns=scope_keys + ['total_spending'])
+        
+        # Latest week per scope, and confidence from the last 4 weekly totals
+        latest = features_df.groupby(scope_keys, sort=False).tail(1).set_index(scope_keys)
+        recent = features_df.groupby(scope_keys, sort=False).tail(4)\
+            .groupby(scope_keys)['total_spending'].agg(['mean', 'std', 'count'])
+        confidence = (1 - recent['std'] / recent['mean']).clip(0.5, 1.0)
+        confidence = confidence.where((recent['count'] >= 4) & (recent['mean'] > 0), 0.6)
+        
+        predictions = []
+        skipped = []
+        by_model = {}
+        
+        for user_id, category_id in scopes:
+            key = (user_id, category_id or 0)
+            if key not in latest.index:
+                skipped.append({'user_id': user_id, 'category_id': category_id,
+                                'reason': f'No recent expense data (last {lookback_days} days)'})
+                continue
+            
+            bundle = self.registry.get(user_id, category_id)
+            if bundle is None or not expected_feature_columns(bundle):
+                skipped.append({'user_id': user_id, 'category_id': category_id,
+                                'reason': 'No trained model'})
+                continue
+            
+            by_model.setdefault(id(bundle), (bundle, []))[1].append(key)
+        
+        # One predict call per model on its stacked feature rows
+        for bundle, keys in by_model.values():
+            X_pred = latest.loc[keys].reindex(columns=expected_feature_columns(bundle))\
+                .fillna(0.0).astype(float)
+            with ml_timer('predict'):
+                weekly_predictions = bundle.model.predict(bundle.scaler.transform(X_pred))
+            
+            for (user_id, scope_category), weekly_prediction, features in zip(
+                    keys, weekly_predictions, X_pred.to_dict('records')):
+                predictions.append({
+                    'user_id': int(user_id),
+                    'category_id': int(scope_category) or None,
+                    'predicted_amount': round(to_period_amount(float(weekly_prediction), period), 2),
+                    'confidence_score': round(float(confidence.loc[(user_id, scope_category)]), 2),
+                    'prediction_period': period,
+                    'features_used': json.dumps({k: round(float(v), 2) for k, v in features.items()})
+                })
+        
+        diagnostics(log).debug('batch prediction', extra={
+            'users': len(user_ids), 'predicted': len(predictions), 'skipped': len(skipped)})
+        return predictions, skipped
+    
     def get_spending_insights(self, user_id, days=30):
-        """Get spending insights and trends"""
+        """Get spending insights and trends (answered from the daily spend rollup)"""
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=days)
-            expenses = Expense.query.filter(
-                Expense.user_id == user_id,
-                Expense.date >= cutoff_date
-            ).all()
-            
-            if not expenses:
-                return None
-            
-            # Convert to DataFrame
-            expenses_data = [{
-                'date': exp.date,
-                'amount': float(exp.amount),
-                'category_id': exp.category_id,
-                'category_name': exp.category.name if exp.category else 'Unknown'
-            } for exp in expenses]
-            
-            df = pd.DataFrame(expenses_data)
-            
-            insights = {
-                'total_spending': float(df['amount'].sum()),
-                'average_daily': float(df['amount'].sum() / days),
-                'num_transactions': len(df),
-                'average_transaction': float(df['amount'].mean()),
-                'max_transaction': float(df['amount'].max()),
-                'category_breakdown': df.groupby('category_name')['amount'].sum().to_dict(),
-                'daily_trend': df.groupby(df['date'].dt.date)['amount'].sum().to_dict()
-            }
-            
-            # Convert to JSON-safe format
-            insights['daily_trend'] = {str(k): float(v) for k, v in insights['daily_trend'].items()}
-            insights['category_breakdown'] = {k: float(v) for k, v in insights['category_breakdown'].items()}
-            
-            return insights
+            return insights.spending_insights(insights.load_window(user_id, days))
         
-        except Exception as e:
-            print(f"Error getting insights: {str(e)}")
+        except Exception:
+            log.exception('spending insights failed', extra={'user_id': user_id})
             return None
 
 
+def expected_feature_columns(bundle):
+    """Feature columns a trained bundle expects, in training order"""
+    if hasattr(bundle.scaler, 'feature_names_in_'):
+        return list(bundle.scaler.feature_names_in_)
+    return bundle.feature_columns
+
+
+def to_period_amount(weekly_amount, period):
+    """Convert a weekly amount to the requested budget period"""
+    if period == 'weekly':
+        return weekly_amount
+    if period == 'daily':
+        return weekly_amount / 7
+    return weekly_amount * 4.33
+
+
+def _week_keys(features_df):
+    """iso_year * 100 + week for each row of a weekly feature frame"""
+    return features_df['iso_year'] * 100 + features_df['week']
+
+
+def training_state(features_df, expenses_df, history_expenses=0, history_amount=0.0):
+    """
+    Incremental training state for a model fitted on features_df: the
+    watermark (start of the last fitted week, which may have been partial
+    and is featurized again by the next update), the count and sum of
+    the expenses before it, to detect changes to that history, and of the
+    expenses from it on, to detect that nothing changed at all.
+    expenses_df holds the expenses fitted on top of history_expenses.
+    """
+    last = features_df.iloc[-1]
+    watermark = datetime.fromisocalendar(int(last['iso_year']), int(last['week']), 1)
+    before = pd.to_datetime(expenses_df['date']) < watermark
+    return {
+        'watermark': watermark.isoformat(),
+        'history_expenses': history_expenses + int(before.sum()),
+        'history_amount': history_amount + float(expenses_df['amount'][before].sum()),
+        'recent_expenses': int((~before).sum()),
+        'recent_amount': float(expenses_df['amount'][~before].sum())
+    }
+
+
+def fit_model_job(expenses_df, base=None):
+    """Process pool entry point: fit (or update base) without a registry or app context"""
+    service = BudgetPredictionService()
+    if base is not None:
+        return service.update_model(base, expenses_df)
+    return service.fit_model(expenses_df)
+
+
 # Global instance
 budget_prediction_service = BudgetPredictionService()
\ No newline at end of file
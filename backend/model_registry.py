@@ -0,0 +1,395 @@
+"""
+Model registry for per-user, per-category budget prediction models.
+
+Each (user_id, category_id) pair gets its own versioned artifacts under
+``<root>/user_<id>/<category_<id>|all>/v0001.bundle/``. A bounded in-memory
+LRU keeps the hot models; cold ones are loaded lazily from the latest
+version on disk. Every lookup lists the key's directory, so a version saved
+(or pruned) by another worker process replaces the cached one.
+Hit/miss/load/reload/eviction counters are kept for monitoring.
+
+An artifact bundle is a directory holding ``manifest.json`` (format header,
+SHA-256 checksums, training metrics), ``feature_columns.json`` and the
+uncompressed ``model.joblib`` / ``scaler.joblib`` pickles, plus
+``training_features.joblib`` (the weekly feature frame the model was
+fitted on, used by incremental updates) when the bundle has one. Checksums are
+verified before anything is unpickled, and the pickles are loaded with
+``mmap_mode`` so the numpy arrays inside them are mapped from the page cache
+and shared by every worker process on the host. Single-file ``vNNNN.joblib``
+artifacts written by older versions are still readable.
+
+Several processes may save the same key at once. Each writes its bundle
+to a uniquely named temporary directory and renames it to the next free
+version; a rename onto a version another process published meanwhile
+fails, and the save moves on to the version after it.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+import joblib
+
+VERSION_PATTERN = re.compile(r'^v(\d+)\.(bundle|joblib)$')
+
+ARTIFACT_FORMAT = 'expense-tracker-model'
+ARTIFACT_FORMAT_VERSION = 2
+MANIFEST_FILE = 'manifest.json'
+FEATURES_FILE = 'feature_columns.json'
+PAYLOAD_FILES = {'model': 'model.joblib', 'scaler': 'scaler.joblib'}
+TRAINING_FEATURES_FILE = 'training_features.joblib'
+TMP_SUFFIX = '.tmp'
+
+# Versions tried by one save before giving up on concurrent writers
+SAVE_ATTEMPTS = 10
+# Temporary bundles older than this were left by a crashed writer
+STALE_TMP_SECONDS = 3600
+
+
+class ModelBundle:
+    """A trained model with the scaler and feature columns it was fitted with"""
+
+    def __init__(self, model, scaler, feature_columns, metrics=None, trained_at=None, version=None,
+                 training_features=None):
+        self.model = model
+        self.scaler = scaler
+        self.feature_columns = feature_columns
+        self.metrics = metrics or {}
+        self.trained_at = trained_at or datetime.utcnow()
+        self.version = version
+        self.training_features = training_features
+
+    def to_dict(self):
+        return {
+            'model': self.model,
+            'scaler': self.scaler,
+            'feature_columns': self.feature_columns,
+            'metrics': self.metrics,
+            'trained_at': self.trained_at
+        }
+
+    @classmethod
+    def from_dict(cls, data, version=None):
+        return cls(data['model'], data['scaler'], data['feature_columns'],
+                   data.get('metrics'), data.get('trained_at'), version)
+
+
+class ArtifactError(Exception):
+    """A model artifact is missing, unreadable or fails its checksum"""
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_bundle(path, bundle):
+    """
+    Write a bundle directory at ``path``. The files are written to a
+    temporary directory that is renamed into place, so readers never see a
+    partial artifact. Raises FileExistsError if ``path`` already exists.
+    """
+    tmp_path = stage_bundle(os.path.dirname(path) or '.', bundle)
+    try:
+        publish_bundle(tmp_path, path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def publish_bundle(tmp_path, path):
+    """
+    Rename a staged bundle to ``path``. Raises FileExistsError if another
+    writer got there first (rename never replaces a published bundle).
+    """
+    try:
+        os.rename(tmp_path, path)
+    except OSError as e:
+        if os.path.exists(path):
+            raise FileExistsError(f'{path} already exists') from e
+        raise
+
+
+def stage_bundle(directory, bundle):
+    """Write a bundle to a new, uniquely named temporary directory and return its path"""
+    tmp_path = os.path.join(directory, f'.{os.getpid()}-{uuid.uuid4().hex}{TMP_SUFFIX}')
+    os.makedirs(tmp_path)
+
+    # Uncompressed so the arrays can be memory-mapped on load
+    joblib.dump(bundle.model, os.path.join(tmp_path, PAYLOAD_FILES['model']))
+    joblib.dump(bundle.scaler, os.path.join(tmp_path, PAYLOAD_FILES['scaler']))
+    with open(os.path.join(tmp_path, FEATURES_FILE), 'w') as f:
+        json.dump(list(bundle.feature_columns), f)
+
+    files = list(PAYLOAD_FILES.values()) + [FEATURES_FILE]
+    if bundle.training_features is not None:
+        joblib.dump(bundle.training_features, os.path.join(tmp_path, TRAINING_FEATURES_FILE))
+        files.append(TRAINING_FEATURES_FILE)
+    manifest = {
+        'format': ARTIFACT_FORMAT,
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'created_at': datetime.utcnow().isoformat(),
+        'trained_at': bundle.trained_at.isoformat(),
+        'metrics': bundle.metrics,
+        'checksums': {name: _sha256(os.path.join(tmp_path, name)) for name in files}
+    }
+    with open(os.path.join(tmp_path, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2, default=str)
+    return tmp_path
+
+
+def read_bundle(path, version=None, mmap_mode='r', verify=True):
+    """Load a bundle directory (or a legacy single-file artifact)"""
+    if not os.path.isdir(path):
+        try:
+            return ModelBundle.from_dict(joblib.load(path), version)
+        except Exception as e:
+            raise ArtifactError(f'Cannot load {path}: {e}') from e
+
+    try:
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f'Cannot read manifest in {path}: {e}') from e
+
+    if manifest.get('format') != ARTIFACT_FORMAT:
+        raise ArtifactError(f'{path} is not a model artifact')
+    if manifest.get('format_version', 0) > ARTIFACT_FORMAT_VERSION:
+        raise ArtifactError(f'{path} uses unsupported format version {manifest["format_version"]}')
+
+    if verify:
+        for name, checksum in manifest.get('checksums', {}).items():
+            try:
+                actual = _sha256(os.path.join(path, name))
+            except OSError as e:
+                raise ArtifactError(f'Missing {name} in {path}') from e
+            if actual != checksum:
+                raise ArtifactError(f'Checksum mismatch for {name} in {path}')
+
+    try:
+        with open(os.path.join(path, FEATURES_FILE)) as f:
+            feature_columns = json.load(f)
+        model = joblib.load(os.path.join(path, PAYLOAD_FILES['model']), mmap_mode=mmap_mode)
+        scaler = joblib.load(os.path.join(path, PAYLOAD_FILES['scaler']), mmap_mode=mmap_mode)
+        training_features = None
+        if TRAINING_FEATURES_FILE in manifest.get('checksums', {}):
+            training_features = joblib.load(os.path.join(path, TRAINING_FEATURES_FILE))
+    except Exception as e:
+        raise ArtifactError(f'Cannot load {path}: {e}') from e
+
+    return ModelBundle(
+        model, scaler, feature_columns,
+        metrics=manifest.get('metrics'),
+        trained_at=datetime.fromisoformat(manifest['trained_at']),
+        version=version,
+        training_features=training_features
+    )
+
+
+class ModelRegistry:
+    def __init__(self, root='models', capacity=256, keep_versions=3, mmap_mode='r', verify_checksums=True):
+        self.root = root
+        self.capacity = capacity
+        self.keep_versions = keep_versions
+        self.mmap_mode = mmap_mode
+        self.verify_checksums = verify_checksums
+        self._cache = OrderedDict()  # key -> (bundle, newest version on disk when it was loaded)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.corrupt = 0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            root=config.get('ML_MODEL_DIR', 'models'),
+            capacity=config.get('ML_REGISTRY_CAPACITY', 256),
+            keep_versions=config.get('ML_KEEP_VERSIONS', 3),
+            mmap_mode=config.get('ML_MMAP_MODE', 'r'),
+            verify_checksums=config.get('ML_VERIFY_CHECKSUMS', True)
+        )
+
+    def _key_dir(self, key):
+        user_id, category_id = key
+        scope = f'category_{category_id}' if category_id else 'all'
+        return os.path.join(self.root, f'user_{user_id}', scope)
+
+    def _artifacts(self, key):
+        """Sorted list of (version, path) artifacts stored on disk for a key"""
+        directory = self._key_dir(key)
+        if not os.path.isdir(directory):
+            return []
+        artifacts = []
+        for name in os.listdir(directory):
+            match = VERSION_PATTERN.match(name)
+            if match:
+                artifacts.append((int(match.group(1)), os.path.join(directory, name)))
+        return sorted(artifacts)
+
+    def _versions(self, key):
+        return [version for version, _ in self._artifacts(key)]
+
+    def _load_latest(self, key, artifacts=None):
+        """Load the newest readable artifact, skipping corrupt ones"""
+        for version, path in reversed(self._artifacts(key) if artifacts is None else artifacts):
+            try:
+                return read_bundle(path, version, self.mmap_mode, self.verify_checksums)
+            except ArtifactError:
+                with self._lock:
+                    self.corrupt += 1
+        return None
+
+    def _remember(self, key, bundle, newest=None):
+        """Insert into the LRU, evicting the least recently used entries"""
+        with self._lock:
+            self._cache[key] = (bundle, bundle.version if newest is None else newest)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, user_id, category_id=None):
+        """
+        Return the latest bundle for a key, loading it from disk on a miss or
+        when the newest version on disk is not the one the cached bundle was
+        loaded at (another process saved or pruned a version)
+        """
+        key = (user_id, category_id or None)
+        artifacts = self._artifacts(key)
+        newest = artifacts[-1][0] if artifacts else None
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[1] == newest:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._cache.pop(key)
+                self.reloads += 1
+            else:
+                self.misses += 1
+
+        bundle = self._load_latest(key, artifacts)
+        if bundle is None:
+            return None
+
+        with self._lock:
+            self.loads += 1
+        self._remember(key, bundle, newest)
+        return bundle
+
+    def save(self, user_id, category_id, bundle):
+        """Persist a bundle as the next version for the key and make it current"""
+        key = (user_id, category_id or None)
+        directory = self._key_dir(key)
+        os.makedirs(directory, exist_ok=True)
+
+        tmp_path = stage_bundle(directory, bundle)
+        try:
+            for _ in range(SAVE_ATTEMPTS):
+                artifacts = self._artifacts(key)
+                version = (artifacts[-1][0] if artifacts else 0) + 1
+                try:
+                    publish_bundle(tmp_path, os.path.join(directory, f'v{version:04d}.bundle'))
+                    break
+                except FileExistsError:
+                    continue  # published by another process meanwhile
+            else:
+                raise ArtifactError(f'No free version for {directory} after {SAVE_ATTEMPTS} attempts')
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        bundle.version = version
+
+        self._prune(directory, self._artifacts(key)[:-self.keep_versions])
+        self._remember(key, bundle)
+        return bundle.version
+
+    def _prune(self, directory, stale):
+        """Remove old versions and temporary bundles abandoned by crashed writers"""
+        for _, old_path in stale:
+            if os.path.isdir(old_path):
+                shutil.rmtree(old_path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+        cutoff = time.time() - STALE_TMP_SECONDS
+        for entry in os.scandir(directory):
+            try:
+                if entry.name.endswith(TMP_SUFFIX) and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                pass  # removed by another process meanwhile
+
+    def preload(self, limit=None):
+        """
+        Warm the LRU with the most recently trained models on disk, e.g. at
+        app startup. Loads at most ``limit`` (default: capacity) models and
+        returns how many were loaded.
+        """
+        limit = min(limit or self.capacity, self.capacity)
+        if not os.path.isdir(self.root):
+            return 0
+
+        candidates = []
+        for user_dir in os.scandir(self.root):
+            if not (user_dir.is_dir() and user_dir.name.startswith('user_')):
+                continue
+            for scope_dir in os.scandir(user_dir.path):
+                if not scope_dir.is_dir():
+                    continue
+                try:
+                    user_id = int(user_dir.name[len('user_'):])
+                    category_id = None if scope_dir.name == 'all' else int(scope_dir.name[len('category_'):])
+                except ValueError:
+                    continue
+                candidates.append((scope_dir.stat().st_mtime, (user_id, category_id)))
+
+        loaded = 0
+        # Oldest first, so the most recent models end up most recently used
+        for _, key in sorted(candidates, reverse=True)[:limit][::-1]:
+            artifacts = self._artifacts(key)
+            bundle = self._load_latest(key, artifacts)
+            if bundle is not None:
+                with self._lock:
+                    self.loads += 1
+                self._remember(key, bundle, artifacts[-1][0])
+                loaded += 1
+        return loaded
+
+    def evict(self, user_id, category_id=None):
+        """Drop a key from memory; the next get() reloads it from disk"""
+        with self._lock:
+            self._cache.pop((user_id, category_id or None), None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'cached_models': len(self._cache),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'loads': self.loads,
+                'reloads': self.reloads,
+                'evictions': self.evictions,
+                'corrupt_artifacts': self.corrupt
+            }
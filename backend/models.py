@@ -1,6 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from sqlalchemy import Float, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Float, Integer, String, Date, DateTime, ForeignKey, Text, Boolean
 from sqlalchemy.orm import relationship
 
 db = SQLAlchemy()
@@ -63,6 +63,13 @@ class Expense(db.Model):
     created_at = db.Column(DateTime, default=datetime.utcnow)
     updated_at = db.Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Composite indexes for the per-user date-window reads. Both end with
+    # amount so SUM/MIN/MAX aggregations are answered from the index alone.
+    __table_args__ = (
+        db.Index('ix_expenses_user_date', 'user_id', 'date', 'category_id', 'amount'),
+        db.Index('ix_expenses_user_category_date', 'user_id', 'category_id', 'date', 'amount'),
+    )
+    
     def __repr__(self):
         return f'<Expense {self.amount} - {self.description}>'
 
@@ -80,6 +87,10 @@ class Budget(db.Model):
     is_active = db.Column(Boolean, default=True)
     created_at = db.Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_budgets_user_active', 'user_id', 'is_active', 'category_id'),
+    )
+    
     def __repr__(self):
         return f'<Budget {self.amount} for {self.period}>'
 
@@ -96,5 +107,44 @@ class BudgetPrediction(db.Model):
     features_used = db.Column(Text)  # JSON string of features
     created_at = db.Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_budget_predictions_user_created', 'user_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<BudgetPrediction {self.predicted_amount}>'
+
+
+class DailySpend(db.Model):
+    """Per-user, per-category daily spending rollup maintained from expenses"""
+    __tablename__ = 'daily_spend'
+    
+    user_id = db.Column(Integer, ForeignKey('users.id'), primary_key=True)
+    category_id = db.Column(Integer, ForeignKey('categories.id'), primary_key=True)
+    day = db.Column(Date, primary_key=True)
+    total = db.Column(Float, nullable=False, default=0)
+    count = db.Column(Integer, nullable=False, default=0)
+    min_amount = db.Column(Float)
+    max_amount = db.Column(Float)
+    
+    __table_args__ = (
+        db.Index('ix_daily_spend_user_day', 'user_id', 'day'),
+    )
+    
+    def __repr__(self):
+        return f'<DailySpend {self.user_id}/{self.category_id} {self.day}: {self.total}>'
+
+
+class DataVersion(db.Model):
+    """
+    Monotonic change counter per data scope ('user:<id>' or 'catalog'),
+    bumped by every write; backs the ETag/Last-Modified validators
+    """
+    __tablename__ = 'data_versions'
+    
+    scope = db.Column(String(50), primary_key=True)
+    version = db.Column(Integer, nullable=False, default=0)
+    updated_at = db.Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.scope}: {self.version}>'
@@ -0,0 +1,49 @@
+"""
+Keyset (cursor) pagination helpers for expense listings.
+
+Expenses are ordered by (date desc, id desc). A cursor is an opaque,
+URL-safe token holding the (date, id) of the last row a client has seen;
+the next page starts strictly after it, so every page is an index range
+scan no matter how deep the client has paged.
+"""
+
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import or_
+from models import Expense
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(date, expense_id):
+    """Encode the position of an expense row as an opaque cursor token"""
+    payload = json.dumps([date.isoformat(), expense_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor token into (date, id). Raises ValueError if malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        date_str, expense_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(date_str), int(expense_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def after_cursor(query, token):
+    """Restrict a (date desc, id desc) ordered expense query to rows after the cursor"""
+    date, expense_id = decode_cursor(token)
+    return query.filter(
+        Expense.date <= date,
+        or_(Expense.date < date, Expense.id < expense_id)
+    )
+
+
+def clamp_page_size(limit):
+    """Bound a client supplied page size to [1, MAX_PAGE_SIZE]"""
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
@@ -82,7 +82,7 @@ def create_sample_expenses(user_id, categories):
         ]
     }
     
-    created_count = 0
+    expenses = []
     
     # Create expenses over the last 30 days
     for i in range(30):
@@ -104,22 +104,25 @@ def create_sample_expenses(user_id, categories):
             desc = "Other"
             amount = round(random.uniform(10, 100), 2)
         
-        data = {
+        expenses.append({
             "user_id": user_id,
             "category_id": category['id'],
             "amount": amount,
             "description": desc,
             "notes": f"Sample expense for testing - {category_name}",
             "date": expense_date.isoformat() + "Z"
-        }
-        
-        response = requests.post(f"{BASE_URL}/expenses", json=data)
-        if response.status_code == 201:
-            created_count += 1
-            if created_count % 10 == 0:
-                print(f"  Created {created_count}/30 expenses...")
-        else:
-            print(f"  ⚠️  Failed to create expense: {response.text}")
+        })
+    
+    # One request for all rows instead of one per expense
+    response = requests.post(f"{BASE_URL}/expenses/bulk", json=expenses)
+    created_count = 0
+    if response.status_code in (201, 400) and 'data' in response.json():
+        result = response.json()['data']
+        created_count = result['inserted']
+        for error in result['errors']:
+            print(f"  ⚠️  Failed to create expense: {error}")
+    else:
+        print(f"  ⚠️  Bulk import failed: {response.text}")
     
     print(f"✅ Created {created_count} sample expenses")
     return created_count
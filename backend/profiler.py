@@ -0,0 +1,404 @@
+"""
+On-demand request profiling.
+
+With ``PROFILER_ENABLED`` and a ``PROFILER_SECRET`` set, a request that
+carries a valid ``X-Profile`` header runs under a profiler:
+
+    X-Profile: <mode>:<unix timestamp>:<hex HMAC-SHA256>
+
+signed with the secret over ``mode:timestamp:METHOD:path`` (query string
+excluded), and accepted for ``PROFILER_TOKEN_TTL`` seconds;
+``flask --app app profile-header`` prints one. ``mode`` is ``cprofile``
+(deterministic, every call) or ``sampling`` (the request thread's stack,
+every ``PROFILER_SAMPLE_INTERVAL`` seconds, from a helper thread). The SQL
+statements the request runs are captured with their parameters and
+timings. The report is written to ``PROFILER_DIR`` under a new id,
+returned in the ``X-Profile-Id`` response header, and read back (with a
+header signed for that path) from:
+
+    GET /api/profiles                 recent report ids
+    GET /api/profiles/<id>            JSON report
+    GET /api/profiles/<id>/folded     collapsed stacks for flamegraph.pl / speedscope
+
+Requests without the header pay one header lookup; with the profiler
+disabled nothing is registered. SQL listeners are attached only while a
+profiled request is running.
+"""
+
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+import click
+from flask import current_app, g, jsonify, request
+from sqlalchemy import event
+from models import db
+
+HEADER = 'X-Profile'
+ID_HEADER = 'X-Profile-Id'
+MODES = ('cprofile', 'sampling')
+PROFILES_PATH = '/api/profiles'
+TOP_FUNCTIONS = 40
+_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def sign(secret, method, path, mode='cprofile', timestamp=None):
+    """X-Profile header value for one request"""
+    timestamp = int(time.time() if timestamp is None else timestamp)
+    message = f'{mode}:{timestamp}:{method.upper()}:{path}'.encode()
+    signature = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return f'{mode}:{timestamp}:{signature}'
+
+
+def verify(secret, value, method, path, ttl):
+    """The profiling mode if value is a valid, fresh signature for the request, else None"""
+    try:
+        mode, timestamp, signature = value.split(':')
+        timestamp = int(timestamp)
+    except ValueError:
+        return None
+    if mode not in MODES or abs(time.time() - timestamp) > ttl:
+        return None
+    expected = sign(secret, method, path, mode, timestamp).rsplit(':', 1)[1]
+    return mode if hmac.compare_digest(expected, signature) else None
+
+
+def _label(filename, line, function):
+    if filename == '~':  # built-in
+        return function
+    return f'{function} ({os.path.basename(filename)}:{line})'
+
+
+class SamplingProfiler:
+    """Samples one thread's stack from a helper thread"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_label(code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def report(self):
+        leaf = Counter()
+        for stack, count in self.stacks.items():
+            leaf[stack.rsplit(';', 1)[-1]] += count
+        samples = sum(self.stacks.values())
+        return {
+            'interval_ms': self.interval * 1000,
+            'samples': samples,
+            'top_functions': [
+                {'function': function, 'self_samples': count,
+                 'self_ms': round(count * self.interval * 1000, 2)}
+                for function, count in leaf.most_common(TOP_FUNCTIONS)
+            ]
+        }
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.stacks.items()))
+
+
+class DeterministicProfiler:
+    """cProfile for the request thread"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def report(self):
+        stats = pstats.Stats(self.profile).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+        return {
+            'top_functions': [
+                {'function': _label(*key), 'calls': nc, 'primitive_calls': cc,
+                 'self_ms': round(tt * 1000, 3), 'cumulative_ms': round(ct * 1000, 3)}
+                for key, (cc, nc, tt, ct, _) in rows
+            ]
+        }
+
+    def folded(self, max_depth=128, min_seconds=1e-5):
+        """
+        Collapsed stacks in microseconds. cProfile keeps caller/callee
+        edges, not whole stacks, so a function's time is split over its
+        callers in proportion to the time each call edge took. Branches
+        worth less than ``min_seconds`` are dropped; walking every path
+        of a large call graph is exponential.
+        """
+        stats = pstats.Stats(self.profile).stats
+        callees = {}
+        for function, (_, _, _, _, callers) in stats.items():
+            for caller, edge in callers.items():
+                callees.setdefault(caller, []).append((function, edge[3]))
+
+        lines = Counter()
+
+        def walk(function, share, path):
+            _, _, tt, ct, _ = stats[function]
+            path = path + [_label(*function)]
+            scale = share / ct if ct else 0.0
+            own = int(tt * scale * 1e6)
+            if own:
+                lines[';'.join(path)] += own
+            if len(path) >= max_depth:
+                return
+            for callee, edge_time in callees.get(function, ()):
+                if callee in visiting or edge_time * scale < min_seconds:
+                    continue  # recursion (time already counted on the way in) or too small to show
+                visiting.add(callee)
+                walk(callee, edge_time * scale, path)
+                visiting.discard(callee)
+
+        roots = [f for f, (_, _, _, _, callers) in stats.items() if not callers]
+        for root in roots:
+            visiting = {root}
+            walk(root, stats[root][3], [])
+        return ''.join(f'{stack} {value}\n' for stack, value in sorted(lines.items()))
+
+
+class ProfileStore:
+    """Reports as <id>.json plus <id>.folded files; the newest ``keep`` are kept"""
+
+    def __init__(self, directory, keep=100):
+        self.directory = directory
+        self.keep = keep
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get('PROFILER_DIR', 'profiles'), config.get('PROFILER_KEEP', 100))
+
+    def _path(self, profile_id, suffix):
+        return os.path.join(self.directory, f'{profile_id}{suffix}')
+
+    def save(self, report, folded):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(report['id'], '.folded'), 'w') as f:
+            f.write(folded)
+        # The JSON file is written last and atomically: it marks the report as complete
+        tmp = self._path(report['id'], '.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(report, f, default=str)
+        os.replace(tmp, self._path(report['id'], '.json'))
+        self._prune()
+
+    def _prune(self):
+        ids = self.list()
+        for profile_id in ids[self.keep:]:
+            for suffix in ('.json', '.folded'):
+                try:
+                    os.remove(self._path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def list(self):
+        """Report ids, newest first"""
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith('.json')]
+        except FileNotFoundError:
+            return []
+        names.sort(key=lambda n: os.path.getmtime(os.path.join(self.directory, n)), reverse=True)
+        return [n[:-len('.json')] for n in names]
+
+    def get(self, profile_id, suffix='.json'):
+        if not _ID_PATTERN.match(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id, suffix)) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+class _SqlCapture:
+    """Engine listeners, attached while at least one profiled request runs"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.active = {}  # thread id -> statement list
+        self.lock = threading.Lock()
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() in self.active:
+            conn.info.setdefault('profile_start', []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        statements = self.active.get(threading.get_ident())
+        starts = conn.info.get('profile_start')
+        if statements is None or not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        statements.append({
+            'statement': statement,
+            'parameters': repr(parameters)[:500],
+            'executemany': executemany,
+            'duration_ms': round(elapsed * 1000, 3)
+        })
+
+    def start(self):
+        statements = []
+        with self.lock:
+            if not self.active:
+                event.listen(self.engine, 'before_cursor_execute', self._before)
+                event.listen(self.engine, 'after_cursor_execute', self._after)
+            self.active[threading.get_ident()] = statements
+        return statements
+
+    def stop(self):
+        with self.lock:
+            self.active.pop(threading.get_ident(), None)
+            if not self.active:
+                event.remove(self.engine, 'before_cursor_execute', self._before)
+                event.remove(self.engine, 'after_cursor_execute', self._after)
+
+
+def _signed(config):
+    value = request.headers.get(HEADER)
+    if value is None:
+        return None
+    return verify(config['PROFILER_SECRET'], value, request.method, request.path,
+                  config.get('PROFILER_TOKEN_TTL', 300))
+
+
+def init_app(app):
+    config = app.config
+    if not config.get('PROFILER_ENABLED'):
+        return
+    if not config.get('PROFILER_SECRET'):
+        raise ValueError('PROFILER_ENABLED requires PROFILER_SECRET')
+
+    store = ProfileStore.from_config(config)
+    with app.app_context():
+        capture = _SqlCapture(db.engine)
+    app.extensions['profiler'] = store
+
+    @app.before_request
+    def start_profile():
+        if HEADER not in request.headers or request.path.startswith(PROFILES_PATH):
+            return
+        mode = _signed(config)
+        if mode is None:
+            return
+
+        if mode == 'sampling':
+            profiler = SamplingProfiler(threading.get_ident(), config.get('PROFILER_SAMPLE_INTERVAL', 0.005))
+        else:
+            profiler = DeterministicProfiler()
+        g._profile = {
+            'id': uuid.uuid4().hex,
+            'mode': mode,
+            'profiler': profiler,
+            'statements': capture.start(),
+            'started': time.perf_counter(),
+            'created_at': datetime.utcnow().isoformat()
+        }
+        profiler.start()
+
+    @app.after_request
+    def add_profile_id(response):
+        profile = g.get('_profile')
+        if profile is not None:
+            response.headers[ID_HEADER] = profile['id']
+            profile['status'] = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_profile(error=None):
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return
+        profiler = profile['profiler']
+        profiler.stop()
+        duration = time.perf_counter() - profile['started']
+        capture.stop()
+
+        statements = profile['statements']
+        report = {
+            'id': profile['id'],
+            'created_at': profile['created_at'],
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': profile.get('status', 500),
+            'mode': profile['mode'],
+            'duration_ms': round(duration * 1000, 3),
+            'sql': {
+                'count': len(statements),
+                'total_ms': round(sum(s['duration_ms'] for s in statements), 3),
+                'statements': statements
+            },
+            'profile': profiler.report(),
+            'folded_units': 'samples' if profile['mode'] == 'sampling' else 'microseconds'
+        }
+        try:
+            store.save(report, profiler.folded())
+        except OSError as e:
+            current_app.logger.error('Could not save profile %s: %s', profile['id'], e)
+
+    def require_signature(view):
+        def wrapped(*args, **kwargs):
+            if _signed(config) is None:
+                return jsonify({'error': 'Not found'}), 404
+            return view(*args, **kwargs)
+        wrapped.__name__ = view.__name__
+        return wrapped
+
+    @app.route(PROFILES_PATH)
+    @require_signature
+    def list_profiles():
+        return jsonify({'success': True, 'data': store.list()}), 200
+
+    @app.route(f'{PROFILES_PATH}/<profile_id>')
+    @require_signature
+    def get_profile(profile_id):
+        report = store.get(profile_id)
+        if report is None:
+            return jsonify({'error': 'Profile not found'}), 404
+        return current_app.response_class(report, mimetype='application/json')
+
+    @app.route(f'{PROFILES_PATH}/<profile_id>/folded')
+    @require_signature
+    def get_profile_folded(profile_id):
+        folded = store.get(profile_id, '.folded')
+        if folded is None:
+            return jsonify({'error': 'Profile not found'}), 404
+        return current_app.response_class(folded, mimetype='text/plain')
+
+    # CLI: flask --app app profile-header /api/insights/spending [--mode sampling]
+    @app.cli.command('profile-header')
+    @click.argument('path')
+    @click.option('--method', default='GET')
+    @click.option('--mode', type=click.Choice(MODES), default='cprofile')
+    def profile_header_command(path, method, mode):
+        """Print an X-Profile header for one request path"""
+        print(f'{HEADER}: {sign(config["PROFILER_SECRET"], method, path.split("?")[0], mode)}')
@@ -0,0 +1,190 @@
+"""
+Response cache for analytics endpoints.
+
+Views wrapped in ``conditional_get(cache=True)`` store their 200 bodies
+here, keyed by endpoint, path, query parameters and the data versions of
+the user/catalog scopes they read (see data_versions). A write bumps the
+version, so stale entries are never served; ``invalidate`` additionally
+frees the entries of the written scopes right away.
+
+Backends implement the small ``CacheBackend`` interface. ``MemoryBackend``
+is an in-process LRU with a TTL; a shared backend (e.g. Redis or
+memcached) can be plugged in with ``RESPONSE_CACHE_BACKEND =
+'package.module:ClassName'``, constructed as ``ClassName(config)``.
+"""
+
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+
+
+class CacheBackend:
+    """Interface for response cache storage"""
+
+    def get(self, key):
+        """Return the stored value or None"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl, scopes=()):
+        """Store a value for ``ttl`` seconds, tagged with the data scopes it depends on"""
+        raise NotImplementedError
+
+    def invalidate(self, scopes):
+        """
+        Drop entries tagged with any of the scopes. Optional: keys embed the
+        data version, so backends that expire entries on their own may skip it.
+        """
+
+    def stats(self):
+        return {}
+
+
+class NullBackend(CacheBackend):
+    """Caches nothing (RESPONSE_CACHE_BACKEND = 'null')"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl, scopes=()):
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU with per-entry expiry"""
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._scopes = {}
+        self._lock = threading.Lock()
+
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(capacity=config.get('RESPONSE_CACHE_SIZE', 1024))
+
+    def _drop(self, key):
+        _, _, scopes = self._entries.pop(key)
+        for scope in scopes:
+            keys = self._scopes.get(scope)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._scopes[scope]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl, scopes=()):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tuple(scopes))
+            for scope in scopes:
+                self._scopes.setdefault(scope, set()).add(key)
+            while len(self._entries) > self.capacity:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, scopes):
+        with self._lock:
+            for scope in scopes:
+                for key in list(self._scopes.get(scope, ())):
+                    self._drop(key)
+                    self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'capacity': self.capacity,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+
+BACKENDS = {
+    'memory': MemoryBackend.from_config,
+    'null': lambda config: NullBackend()
+}
+
+
+def _load_backend(config):
+    name = config.get('RESPONSE_CACHE_BACKEND', 'memory')
+    if name in BACKENDS:
+        return BACKENDS[name](config)
+
+    module_name, _, class_name = name.partition(':')
+    if not class_name:
+        raise ValueError(f'Unknown response cache backend: {name}')
+    return getattr(importlib.import_module(module_name), class_name)(config)
+
+
+class ResponseCache:
+    """Backend plus hit/miss accounting"""
+
+    def __init__(self, backend, ttl=300):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(_load_backend(config), ttl=config.get('RESPONSE_CACHE_TTL', 300))
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value, scopes=()):
+        self.backend.set(key, value, self.ttl, scopes)
+
+    def invalidate(self, scopes):
+        self.backend.invalidate(scopes)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'backend': type(self.backend).__name__,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+        stats.update(self.backend.stats())
+        return stats
+
+
+def init_app(app):
+    app.extensions['response_cache'] = ResponseCache.from_config(app.config)
+
+
+def get_cache():
+    """The app's response cache, or None outside an app / when not set up"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('response_cache')
@@ -0,0 +1,236 @@
+"""
+Daily spend rollups.
+
+``daily_spend`` holds one row per (user_id, category_id, day) with the
+sum, count, min and max of that day's expenses. Expense writes refresh
+the affected rows in the same transaction, and read endpoints answer
+from the rollup so their cost follows the number of days in the window
+rather than the number of transactions. Partial days at the edges of a
+window are aggregated from the raw expenses so results stay exact.
+"""
+
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from models import db, Expense, DailySpend
+
+SpendRow = namedtuple('SpendRow', 'category_id day total count min_amount max_amount')
+
+# Max days bound into one IN (...) clause when refreshing
+REFRESH_CHUNK_SIZE = 500
+
+ROLLUP_COLUMNS = ['user_id', 'category_id', 'day', 'total', 'count', 'min_amount', 'max_amount']
+
+
+def expense_key(expense):
+    """Rollup key an expense contributes to"""
+    return (expense.user_id, expense.category_id, expense.date.date())
+
+
+def _expense_day():
+    return func.date(Expense.date, type_=DailySpend.day.type)
+
+
+def aggregate_expenses():
+    """SELECT producing rollup rows from raw expenses"""
+    day = _expense_day()
+    return select(
+        Expense.user_id,
+        Expense.category_id,
+        day.label('day'),
+        func.sum(Expense.amount),
+        func.count(Expense.id),
+        func.min(Expense.amount),
+        func.max(Expense.amount)
+    ).group_by(Expense.user_id, Expense.category_id, day)
+
+
+def refresh(keys):
+    """
+    Recompute the rollup rows for the given (user_id, category_id, day) keys.
+    Runs in the caller's transaction; pending ORM changes are flushed first.
+    """
+    db.session.flush()
+
+    groups = defaultdict(set)
+    for user_id, category_id, day in keys:
+        groups[(user_id, category_id)].add(day)
+
+    for (user_id, category_id), days in groups.items():
+        days = sorted(days)
+        for i in range(0, len(days), REFRESH_CHUNK_SIZE):
+            chunk = days[i:i + REFRESH_CHUNK_SIZE]
+
+            db.session.execute(delete(DailySpend).where(
+                DailySpend.user_id == user_id,
+                DailySpend.category_id == category_id,
+                DailySpend.day.in_(chunk)
+            ))
+
+            source = aggregate_expenses().where(
+                Expense.user_id == user_id,
+                Expense.category_id == category_id,
+                Expense.date >= datetime.combine(chunk[0], time()),
+                Expense.date < datetime.combine(chunk[-1] + timedelta(days=1), time()),
+                _expense_day().in_(chunk)
+            )
+            db.session.execute(insert(DailySpend).from_select(ROLLUP_COLUMNS, source))
+
+
+def add_expenses(values):
+    """
+    Fold newly inserted expenses (dicts with user_id, category_id, amount,
+    date) into the rollup as deltas, without re-aggregating existing rows.
+    Only valid for pure inserts, e.g. bulk imports; runs in the caller's
+    transaction.
+    """
+    deltas = {}
+    for value in values:
+        key = (value['user_id'], value['category_id'], value['date'].date())
+        amount = value['amount']
+        delta = deltas.get(key)
+        if delta is None:
+            deltas[key] = [amount, 1, amount, amount]
+        else:
+            delta[0] += amount
+            delta[1] += 1
+            delta[2] = min(delta[2], amount)
+            delta[3] = max(delta[3], amount)
+
+    groups = defaultdict(list)
+    for user_id, category_id, day in deltas:
+        groups[(user_id, category_id)].append(day)
+
+    existing = {}
+    for (user_id, category_id), days in groups.items():
+        for i in range(0, len(days), REFRESH_CHUNK_SIZE):
+            rows = db.session.execute(select(
+                DailySpend.day, DailySpend.total, DailySpend.count, DailySpend.min_amount, DailySpend.max_amount
+            ).where(
+                DailySpend.user_id == user_id,
+                DailySpend.category_id == category_id,
+                DailySpend.day.in_(days[i:i + REFRESH_CHUNK_SIZE])
+            ))
+            for row in rows:
+                existing[(user_id, category_id, row.day)] = row
+
+    updates = []
+    inserts = []
+    for key, (total, count, min_amount, max_amount) in deltas.items():
+        current = existing.get(key)
+        if current is None:
+            inserts.append(dict(zip(ROLLUP_COLUMNS, (*key, total, count, min_amount, max_amount))))
+        else:
+            updates.append({
+                'b_user_id': key[0],
+                'b_category_id': key[1],
+                'b_day': key[2],
+                'total': current.total + total,
+                'count': current.count + count,
+                'min_amount': min(current.min_amount, min_amount),
+                'max_amount': max(current.max_amount, max_amount)
+            })
+
+    table = DailySpend.__table__
+    if updates:
+        db.session.execute(
+            update(table).where(
+                table.c.user_id == bindparam('b_user_id'),
+                table.c.category_id == bindparam('b_category_id'),
+                table.c.day == bindparam('b_day')
+            ),
+            updates
+        )
+    if inserts:
+        db.session.execute(insert(table), inserts)
+
+
+def rebuild(user_ids=None):
+    """
+    Rebuild the rollup from scratch, for all users or only the given ones.
+    Used for backfills; the caller commits. Returns the number of rollup rows.
+    """
+    clear = delete(DailySpend)
+    source = aggregate_expenses()
+    if user_ids is not None:
+        clear = clear.where(DailySpend.user_id.in_(user_ids))
+        source = source.where(Expense.user_id.in_(user_ids))
+
+    db.session.execute(clear)
+    db.session.execute(insert(DailySpend).from_select(ROLLUP_COLUMNS, source))
+
+    count = select(func.count()).select_from(DailySpend)
+    if user_ids is not None:
+        count = count.where(DailySpend.user_id.in_(user_ids))
+    return db.session.execute(count).scalar()
+
+
+def _raw_rows(user_id, start, end):
+    day = _expense_day()
+    query = select(
+        Expense.category_id,
+        day,
+        func.sum(Expense.amount),
+        func.count(Expense.id),
+        func.min(Expense.amount),
+        func.max(Expense.amount)
+    ).where(
+        Expense.user_id == user_id,
+        Expense.date >= start,
+        Expense.date < end
+    ).group_by(Expense.category_id, day)
+    return [SpendRow(*row) for row in db.session.execute(query)]
+
+
+def spend_rows(user_id, start, end=None):
+    """
+    Per-(category, day) spend rows for expenses with start <= date < end.
+    Whole days come from the rollup; partial edge days from raw expenses.
+    """
+    start_of_day = datetime.combine(start.date(), time())
+    first_full_day = start.date() if start == start_of_day else start.date() + timedelta(days=1)
+    end_day = end.date() if end is not None else None
+
+    if end_day is not None and first_full_day >= end_day:
+        return _raw_rows(user_id, start, end)
+
+    query = select(
+        DailySpend.category_id,
+        DailySpend.day,
+        DailySpend.total,
+        DailySpend.count,
+        DailySpend.min_amount,
+        DailySpend.max_amount
+    ).where(
+        DailySpend.user_id == user_id,
+        DailySpend.day >= first_full_day
+    )
+    if end_day is not None:
+        query = query.where(DailySpend.day < end_day)
+
+    rows = [SpendRow(*row) for row in db.session.execute(query)]
+
+    first_full_start = datetime.combine(first_full_day, time())
+    if start < first_full_start:
+        rows.extend(_raw_rows(user_id, start, first_full_start))
+
+    if end is not None and end > datetime.combine(end_day, time()):
+        rows.extend(_raw_rows(user_id, datetime.combine(end_day, time()), end))
+
+    return rows
+
+
+def totals_by_category(rows):
+    """{category_id: total} for a list of spend rows"""
+    totals = defaultdict(float)
+    for row in rows:
+        totals[row.category_id] += row.total
+    return dict(totals)
+
+
+def totals_by_day(rows):
+    """{day: total} for a list of spend rows, ordered by day"""
+    totals = defaultdict(float)
+    for row in rows:
+        totals[row.day] += row.total
+    return dict(sorted(totals.items()))
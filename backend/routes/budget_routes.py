@@ -1,12 +1,14 @@
 from flask import Blueprint, request, jsonify
-from models import db, Budget, Expense, Category
+from models import db, Budget
 from schemas import budget_schema, budgets_schema
-from datetime import datetime, timedelta
-from sqlalchemy import func, and_
+from datetime import datetime
+import budget_status
+from data_versions import bump, conditional_get, user_scope
 
 budgets_bp = Blueprint('budgets', __name__)
 
 @budgets_bp.route('/budgets', methods=['GET'])
+@conditional_get()
 def get_budgets():
     """Get all budgets for a user"""
     try:
@@ -83,6 +85,7 @@ def create_budget():
         )
         
         db.session.add(budget)
+        bump(user_scope(budget.user_id))
         db.session.commit()
         
         return jsonify({
@@ -127,6 +130,7 @@ def update_budget(budget_id):
         if 'is_active' in data:
             budget.is_active = data['is_active']
         
+        bump(user_scope(budget.user_id))
         db.session.commit()
         
         return jsonify({
@@ -150,6 +154,7 @@ def delete_budget(budget_id):
             return jsonify({'error': 'Budget not found'}), 404
         
         db.session.delete(budget)
+        bump(user_scope(budget.user_id))
         db.session.commit()
         
         return jsonify({
@@ -163,6 +168,7 @@ def delete_budget(budget_id):
 
 
 @budgets_bp.route('/budgets/status', methods=['GET'])
+@conditional_get(cache=True)
 def get_budget_status():
     """Get budget status showing spent vs budgeted amounts"""
     try:
@@ -171,75 +177,41 @@ def get_budget_status():
         if not user_id:
             return jsonify({'error': 'user_id is required'}), 400
         
-        # Get active budgets
-        budgets = Budget.query.filter_by(user_id=user_id, is_active=True).all()
-        
-        budget_status = []
-        
-        for budget in budgets:
-            # Calculate date range based on period
-            if budget.period == 'daily':
-                start_date = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-                end_date = start_date + timedelta(days=1)
-            elif budget.period == 'weekly':
-                today = datetime.utcnow()
-                start_date = today - timedelta(days=today.weekday())
-                start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_date = start_date + timedelta(days=7)
-            elif budget.period == 'monthly':
-                today = datetime.utcnow()
-                start_date = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                if today.month == 12:
-                    end_date = start_date.replace(year=today.year + 1, month=1)
-                else:
-                    end_date = start_date.replace(month=today.month + 1)
-            elif budget.period == 'yearly':
-                today = datetime.utcnow()
-                start_date = today.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-                end_date = start_date.replace(year=today.year + 1)
-            else:
-                start_date = budget.start_date
-                end_date = budget.end_date or datetime.utcnow()
-            
-            # Get total spent in this period
-            spent = db.session.query(func.sum(Expense.amount)).filter(
-                Expense.user_id == user_id,
-                Expense.category_id == budget.category_id,
-                Expense.date >= start_date,
-                Expense.date < end_date
-            ).scalar() or 0
-            
-            remaining = budget.amount - spent
-            percentage = (spent / budget.amount * 100) if budget.amount > 0 else 0
-            
-            budget_status.append({
-                'budget_id': budget.id,
-                'category_id': budget.category_id,
-                'category_name': budget.category.name if budget.category else 'Unknown',
-                'category_icon': budget.category.icon if budget.category else '',
-                'category_color': budget.category.color if budget.category else '',
-                'budgeted': float(budget.amount),
-                'spent': float(spent),
-                'remaining': float(remaining),
-                'percentage_used': round(float(percentage), 2),
-                'period': budget.period,
-                'start_date': start_date.isoformat(),
-                'end_date': end_date.isoformat(),
-                'is_exceeded': spent > budget.amount
-            })
-        
-        # Calculate total
-        total_budgeted = sum(b['budgeted'] for b in budget_status)
-        total_spent = sum(b['spent'] for b in budget_status)
-        
         return jsonify({
             'success': True,
-            'data': {
-                'budgets': budget_status,
-                'total_budgeted': total_budgeted,
-                'total_spent': total_spent,
-                'total_remaining': total_budgeted - total_spent
+            'data': budget_status.get_budget_status(user_id)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@budgets_bp.route('/budgets/status/batch', methods=['POST'])
+def get_budget_status_batch():
+    """Get budget status for many users at once (alerting sweeps)"""
+    try:
+        data = request.get_json()
+        
+        user_ids = data.get('user_ids') if data else None
+        if not user_ids or not isinstance(user_ids, list):
+            return jsonify({'error': 'user_ids must be a non-empty list'}), 400
+        if any(isinstance(u, bool) or not isinstance(u, int) for u in user_ids):
+            return jsonify({'error': 'user_ids must be integers'}), 400
+        
+        exceeded_only = bool(data.get('exceeded_only', False))
+        statuses = budget_status.get_budget_status_batch(user_ids)
+        
+        if exceeded_only:
+            # Same shape per user; totals still cover all active budgets
+            statuses = {
+                user_id: dict(status, budgets=[b for b in status['budgets'] if b['is_exceeded']])
+                for user_id, status in statuses.items()
             }
+            statuses = {user_id: status for user_id, status in statuses.items() if status['budgets']}
+        
+        return jsonify({
+            'success': True,
+            'data': {str(user_id): status for user_id, status in statuses.items()}
         }), 200
         
     except Exception as e:
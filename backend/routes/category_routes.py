@@ -1,18 +1,19 @@
 from flask import Blueprint, request, jsonify
 from models import db, Category, StandardDescription
-from schemas import (category_schema, categories_schema, 
-                     standard_description_schema, standard_descriptions_schema)
+from schemas import category_schema, standard_description_schema
+from data_versions import CATALOG_SCOPE, bump, conditional_get
+import catalog
 
 categories_bp = Blueprint('categories', __name__)
 
 @categories_bp.route('/categories', methods=['GET'])
+@conditional_get(user_param=None)
 def get_categories():
     """Get all categories"""
     try:
-        categories = Category.query.all()
         return jsonify({
             'success': True,
-            'data': categories_schema.dump(categories)
+            'data': list(catalog.get_catalog().categories)
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -22,14 +23,14 @@ def get_categories():
 def get_category(category_id):
     """Get a specific category"""
     try:
-        category = Category.query.get(category_id)
+        category = catalog.get_catalog().category(category_id)
         
         if not category:
             return jsonify({'error': 'Category not found'}), 404
         
         return jsonify({
             'success': True,
-            'data': category_schema.dump(category)
+            'data': category
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -56,7 +57,9 @@ def create_category():
         )
         
         db.session.add(category)
+        bump(CATALOG_SCOPE)
         db.session.commit()
+        catalog.refresh()
         
         return jsonify({
             'success': True,
@@ -87,7 +90,9 @@ def update_category(category_id):
         if 'color' in data:
             category.color = data['color']
         
+        bump(CATALOG_SCOPE)
         db.session.commit()
+        catalog.refresh()
         
         return jsonify({
             'success': True,
@@ -110,7 +115,9 @@ def delete_category(category_id):
             return jsonify({'error': 'Category not found'}), 404
         
         db.session.delete(category)
+        bump(CATALOG_SCOPE)
         db.session.commit()
+        catalog.refresh()
         
         return jsonify({
             'success': True,
@@ -124,31 +131,26 @@ def delete_category(category_id):
 
 # Standard Descriptions Routes
 @categories_bp.route('/categories/<int:category_id>/descriptions', methods=['GET'])
+@conditional_get(user_param=None)
 def get_category_descriptions(category_id):
     """Get all standard descriptions for a category"""
     try:
-        descriptions = StandardDescription.query.filter_by(
-            category_id=category_id,
-            is_active=True
-        ).all()
-        
         return jsonify({
             'success': True,
-            'data': standard_descriptions_schema.dump(descriptions)
+            'data': list(catalog.get_catalog().category_descriptions(category_id))
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @categories_bp.route('/descriptions', methods=['GET'])
+@conditional_get(user_param=None)
 def get_all_descriptions():
     """Get all standard descriptions"""
     try:
-        descriptions = StandardDescription.query.filter_by(is_active=True).all()
-        
         return jsonify({
             'success': True,
-            'data': standard_descriptions_schema.dump(descriptions)
+            'data': list(catalog.get_catalog().descriptions)
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -172,7 +174,9 @@ def create_description():
         )
         
         db.session.add(description)
+        bump(CATALOG_SCOPE)
         db.session.commit()
+        catalog.refresh()
         
         return jsonify({
             'success': True,
@@ -201,7 +205,9 @@ def update_description(description_id):
         if 'is_active' in data:
             description.is_active = data['is_active']
         
+        bump(CATALOG_SCOPE)
         db.session.commit()
+        catalog.refresh()
         
         return jsonify({
             'success': True,
@@ -224,7 +230,9 @@ def delete_description(description_id):
             return jsonify({'error': 'Description not found'}), 404
         
         db.session.delete(description)
+        bump(CATALOG_SCOPE)
         db.session.commit()
+        catalog.refresh()
         
         return jsonify({
             'success': True,
@@ -0,0 +1,50 @@
+from flask import Blueprint, request, jsonify
+import insights
+from data_versions import conditional_get
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+# Insights shape returned when the user has no spending in the window
+EMPTY_INSIGHTS = {
+    'total_spending': 0,
+    'average_daily': 0,
+    'num_transactions': 0,
+    'average_transaction': 0,
+    'max_transaction': 0,
+    'category_breakdown': {},
+    'daily_trend': {}
+}
+
+
+@dashboard_bp.route('/dashboard', methods=['GET'])
+@conditional_get(cache=True)
+def get_dashboard():
+    """
+    Summary, insights, stats and recommendations for the dashboard, built
+    from one load of the user's spend window
+    """
+    try:
+        user_id = request.args.get('user_id', type=int)
+        days = request.args.get('days', type=int, default=30)
+        
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+        
+        window = insights.load_window(user_id, days)
+        spending = insights.spending_insights(window)
+        recommendations, insights_summary = insights.recommendations(spending)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'period_days': days,
+                'summary': insights.summary(window),
+                'insights': spending or EMPTY_INSIGHTS,
+                'stats': insights.stats(window),
+                'recommendations': recommendations,
+                'insights_summary': insights_summary
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,20 +1,53 @@
-from flask import Blueprint, request, jsonify
+import csv
+import io
+import json
+import zlib
+from itertools import islice
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from models import db, Expense, Category
-from schemas import expense_schema, expenses_schema
-from datetime import datetime, timedelta
-from sqlalchemy import func, and_
+from schemas import expense_schema
+from pagination import after_cursor, clamp_page_size, encode_cursor
+import bulk_import
+import serializers
+import insights
+import rollups
+from data_versions import bump, conditional_get, user_scope
+from datetime import datetime
+from sqlalchemy import and_
+
+# Rows fetched from the database cursor per round-trip when streaming
+STREAM_BATCH_SIZE = 500
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+EXPORT_COLUMNS = ('id', 'date', 'category_id', 'category', 'description', 'amount', 'notes')
+
+# Request content types read as CSV by the bulk import
+CSV_MIMETYPES = ('text/csv', 'application/csv')
 
 expenses_bp = Blueprint('expenses', __name__)
 
 @expenses_bp.route('/expenses', methods=['GET'])
+@conditional_get()
 def get_expenses():
-    """Get all expenses with optional filters"""
+    """
+    Get expenses with optional filters.
+    Pass limit and/or cursor for keyset pagination, or stream=true to
+    stream the full result set row by row.
+    Categories are side-loaded once as a top-level "categories" object;
+    pass embed=category for the previous shape with a nested category per row.
+    """
     try:
         user_id = request.args.get('user_id', type=int)
         category_id = request.args.get('category_id', type=int)
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         days = request.args.get('days', type=int)
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
+        stream = request.args.get('stream', 'false').lower() in ('1', 'true', 'yes')
+        embed = request.args.get('embed')
+        embed_category = embed == 'category' if embed is not None \
+            else current_app.config.get('EXPENSES_EMBED_CATEGORY', False)
         
         if not user_id:
             return jsonify({'error': 'user_id is required'}), 400
@@ -27,8 +60,7 @@ def get_expenses():
         
         # Date filters
         if days:
-            cutoff_date = datetime.utcnow() - timedelta(days=days)
-            query = query.filter(Expense.date >= cutoff_date)
+            query = query.filter(Expense.date >= insights.window_start(days))
         elif start_date and end_date:
             start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
             end = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
@@ -37,19 +69,203 @@ def get_expenses():
             start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
             query = query.filter(Expense.date >= start)
         
-        # Order by date descending
-        expenses = query.order_by(Expense.date.desc()).all()
+        if cursor:
+            try:
+                query = after_cursor(query, cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        # Only the expense columns; categories are looked up once below.
+        # Order by date descending, id breaks ties so cursors are stable
+        query = query.with_entities(*serializers.EXPENSE_COLUMNS)\
+            .order_by(Expense.date.desc(), Expense.id.desc())
+        categories = serializers.category_map()
+        
+        if stream:
+            return Response(stream_with_context(_stream_expenses(query, categories, embed_category, limit)),
+                            mimetype='application/json')
+        
+        if limit is None and cursor is None:
+            expenses = query.all()
+            
+            return serializers.json_response(_expense_list(expenses, categories, embed_category, {
+                'success': True,
+                'count': len(expenses)
+            }))
+        
+        # Keyset pagination: fetch one extra row to know if there is a next page
+        page_size = clamp_page_size(limit)
+        expenses = query.limit(page_size + 1).all()
+        has_more = len(expenses) > page_size
+        expenses = expenses[:page_size]
         
-        return jsonify({
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(expenses[-1].date, expenses[-1].id)
+        
+        return serializers.json_response(_expense_list(expenses, categories, embed_category, {
             'success': True,
-            'data': expenses_schema.dump(expenses),
-            'count': len(expenses)
-        }), 200
+            'count': len(expenses),
+            'has_more': has_more,
+            'next_cursor': next_cursor
+        }))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _expense_list(rows, categories, embed_category, payload):
+    """Add the serialized rows (and side-loaded categories) to a response payload"""
+    payload['data'] = serializers.dump_expense_rows(rows, categories if embed_category else None)
+    if not embed_category:
+        payload['categories'] = _referenced_categories(categories, {row.category_id for row in rows})
+    return payload
+
+
+def _referenced_categories(categories, category_ids):
+    return {str(category_id): categories[category_id]
+            for category_id in sorted(category_ids) if category_id in categories}
+
+
+def _stream_expenses(query, categories, embed_category, limit=None):
+    """Yield a JSON document for the query one database batch at a time"""
+    if limit:
+        query = query.limit(limit)
+    
+    yield '{"success": true, "data": ['
+    count = 0
+    category_ids = set()
+    results = iter(query.yield_per(STREAM_BATCH_SIZE))
+    while True:
+        batch = list(islice(results, STREAM_BATCH_SIZE))
+        if not batch:
+            break
+        
+        data = serializers.dump_expense_rows(batch, categories if embed_category else None)
+        encoded = serializers.dumps(data)
+        # Splice the batch's array items into the open data array
+        yield (',' if count else '') + encoded[1:-1].decode()
+        count += len(batch)
+        category_ids.update(row.category_id for row in batch)
+    
+    if embed_category:
+        yield '], "count": %d}' % count
+    else:
+        yield '], "categories": %s, "count": %d}' % (
+            serializers.dumps(_referenced_categories(categories, category_ids)).decode(), count)
+
+
+@expenses_bp.route('/expenses/export', methods=['GET'])
+def export_expenses():
+    """
+    Stream a user's expense history as CSV or NDJSON.
+    Rows come straight from a projected SQL cursor (newest first); each row
+    carries a cursor that can be passed back to resume an interrupted export.
+    """
+    try:
+        user_id = request.args.get('user_id', type=int)
+        category_id = request.args.get('category_id', type=int)
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        days = request.args.get('days', type=int)
+        cursor = request.args.get('cursor')
+        export_format = request.args.get('format', 'csv').lower()
+        use_gzip = request.args.get('gzip', 'false').lower() in ('1', 'true', 'yes')
+        resumable = request.args.get('resumable', 'true').lower() in ('1', 'true', 'yes')
+        
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+        
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'format must be one of {", ".join(EXPORT_FORMATS)}'}), 400
+        
+        query = db.session.query(
+            Expense.id,
+            Expense.date,
+            Expense.category_id,
+            Category.name,
+            Expense.description,
+            Expense.amount,
+            Expense.notes
+        ).outerjoin(Category, Category.id == Expense.category_id)\
+            .filter(Expense.user_id == user_id)
+        
+        if category_id:
+            query = query.filter(Expense.category_id == category_id)
+        
+        if days:
+            query = query.filter(Expense.date >= insights.window_start(days))
+        if start_date:
+            query = query.filter(Expense.date >= datetime.fromisoformat(start_date.replace('Z', '+00:00')))
+        if end_date:
+            query = query.filter(Expense.date <= datetime.fromisoformat(end_date.replace('Z', '+00:00')))
+        
+        if cursor:
+            try:
+                query = after_cursor(query, cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        query = query.order_by(Expense.date.desc(), Expense.id.desc())\
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        
+        chunks = _export_rows(query, export_format, resumable)
+        if use_gzip:
+            chunks = _gzip_chunks(chunks)
+        
+        filename = f'expenses-{user_id}-{datetime.utcnow().strftime("%Y%m%d")}.{export_format}'
+        response = Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[export_format])
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _export_rows(query, export_format, resumable=True):
+    """Yield encoded export rows, buffering one database batch per chunk"""
+    columns = list(EXPORT_COLUMNS) + (['cursor'] if resumable else [])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    # Header goes out before the query runs so the first byte is immediate
+    if export_format == 'csv':
+        writer.writerow(columns)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    for count, row in enumerate(query, start=1):
+        values = [row.id, row.date.isoformat(), row.category_id, row.name,
+                  row.description, row.amount, row.notes]
+        if resumable:
+            values.append(encode_cursor(row.date, row.id))
+        
+        if export_format == 'csv':
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False))
+            buffer.write('\n')
+        
+        if count % STREAM_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _gzip_chunks(chunks):
+    """Gzip a stream of text chunks, flushing after each so clients see progress"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
 @expenses_bp.route('/expenses/<int:expense_id>', methods=['GET'])
 def get_expense(expense_id):
     """Get a specific expense by ID"""
@@ -80,9 +296,8 @@ def create_expense():
             if field not in data:
                 return jsonify({'error': f'{field} is required'}), 400
         
-        # Parse date
-        if isinstance(data['date'], str):
-            data['date'] = datetime.fromisoformat(data['date'].replace('Z', '+00:00'))
+        # Parse date (stored as naive UTC, like bulk imports)
+        data['date'] = bulk_import.parse_date(data['date'])
         
         # Create expense
         expense = Expense(
@@ -95,6 +310,9 @@ def create_expense():
         )
         
         db.session.add(expense)
+        db.session.flush()
+        rollups.refresh([rollups.expense_key(expense)])
+        bump(user_scope(expense.user_id))
         db.session.commit()
         
         return jsonify({
@@ -108,6 +326,45 @@ def create_expense():
         return jsonify({'error': str(e)}), 500
 
 
+@expenses_bp.route('/expenses/bulk', methods=['POST'])
+def bulk_create_expenses():
+    """
+    Import many expenses at once from a JSON array, a CSV body
+    (Content-Type: text/csv) or a CSV file upload (form field "file").
+    Invalid rows are reported and skipped; valid rows are inserted.
+    """
+    try:
+        default_user_id = request.args.get('user_id', type=int)
+        
+        upload = request.files.get('file')
+        if upload is not None or request.mimetype in CSV_MIMETYPES:
+            raw = upload.read() if upload is not None else request.get_data()
+            rows = list(csv.DictReader(io.StringIO(raw.decode('utf-8-sig'))))
+        else:
+            data = request.get_json(silent=True)
+            rows = data.get('expenses') if isinstance(data, dict) else data
+            if not isinstance(rows, list):
+                return jsonify({'error': 'Expected a JSON array of expenses or a CSV body'}), 400
+        
+        max_rows = current_app.config.get('BULK_IMPORT_MAX_ROWS', 500_000)
+        if len(rows) > max_rows:
+            return jsonify({'error': f'Too many rows: {len(rows)} (max {max_rows})'}), 400
+        
+        result = bulk_import.import_expenses(rows, default_user_id)
+        
+        return jsonify({
+            'success': result['inserted'] > 0,
+            'message': f"Imported {result['inserted']} of {result['received']} expenses",
+            'data': result
+        }), 201 if result['inserted'] > 0 else 400
+        
+    except UnicodeDecodeError:
+        return jsonify({'error': 'CSV body must be UTF-8 encoded'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @expenses_bp.route('/expenses/<int:expense_id>', methods=['PUT'])
 def update_expense(expense_id):
     """Update an existing expense"""
@@ -118,6 +375,7 @@ def update_expense(expense_id):
             return jsonify({'error': 'Expense not found'}), 404
         
         data = request.get_json()
+        old_key = rollups.expense_key(expense)
         
         # Update fields
         if 'category_id' in data:
@@ -129,13 +387,13 @@ def update_expense(expense_id):
         if 'notes' in data:
             expense.notes = data['notes']
         if 'date' in data:
-            if isinstance(data['date'], str):
-                expense.date = datetime.fromisoformat(data['date'].replace('Z', '+00:00'))
-            else:
-                expense.date = data['date']
+            expense.date = bulk_import.parse_date(data['date'])
         
         expense.updated_at = datetime.utcnow()
         
+        db.session.flush()
+        rollups.refresh({old_key, rollups.expense_key(expense)})
+        bump(user_scope(expense.user_id))
         db.session.commit()
         
         return jsonify({
@@ -158,7 +416,10 @@ def delete_expense(expense_id):
         if not expense:
             return jsonify({'error': 'Expense not found'}), 404
         
+        key = rollups.expense_key(expense)
         db.session.delete(expense)
+        rollups.refresh([key])
+        bump(user_scope(expense.user_id))
         db.session.commit()
         
         return jsonify({
@@ -172,6 +433,7 @@ def delete_expense(expense_id):
 
 
 @expenses_bp.route('/expenses/summary', methods=['GET'])
+@conditional_get(cache=True)
 def get_expense_summary():
     """Get expense summary with totals by category"""
     try:
@@ -181,55 +443,9 @@ def get_expense_summary():
         if not user_id:
             return jsonify({'error': 'user_id is required'}), 400
         
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Total spending
-        total = db.session.query(func.sum(Expense.amount)).filter(
-            Expense.user_id == user_id,
-            Expense.date >= cutoff_date
-        ).scalar() or 0
-        
-        # Category breakdown
-        category_totals = db.session.query(
-            Category.name,
-            Category.icon,
-            Category.color,
-            func.sum(Expense.amount).label('total')
-        ).join(Expense).filter(
-            Expense.user_id == user_id,
-            Expense.date >= cutoff_date
-        ).group_by(Category.id).all()
-        
-        category_breakdown = [{
-            'category': cat[0],
-            'icon': cat[1],
-            'color': cat[2],
-            'total': float(cat[3])
-        } for cat in category_totals]
-        
-        # Daily totals
-        daily_totals = db.session.query(
-            func.date(Expense.date).label('date'),
-            func.sum(Expense.amount).label('total')
-        ).filter(
-            Expense.user_id == user_id,
-            Expense.date >= cutoff_date
-        ).group_by(func.date(Expense.date)).all()
-        
-        daily_breakdown = [{
-            'date': str(day[0]),
-            'total': float(day[1])
-        } for day in daily_totals]
-        
         return jsonify({
             'success': True,
-            'data': {
-                'total_spending': float(total),
-                'period_days': days,
-                'average_daily': float(total / days) if days > 0 else 0,
-                'category_breakdown': category_breakdown,
-                'daily_breakdown': daily_breakdown
-            }
+            'data': insights.summary(insights.load_window(user_id, days))
         }), 200
         
     except Exception as e:
@@ -237,45 +453,36 @@ def get_expense_summary():
 
 
 @expenses_bp.route('/expenses/stats', methods=['GET'])
+@conditional_get(cache=True)
 def get_expense_stats():
-    """Get detailed expense statistics"""
+    """Get detailed expense statistics, percentiles and an amount histogram"""
     try:
         user_id = request.args.get('user_id', type=int)
         days = request.args.get('days', type=int, default=30)
+        bins = request.args.get('bins', type=int, default=insights.DEFAULT_HISTOGRAM_BINS)
         
         if not user_id:
             return jsonify({'error': 'user_id is required'}), 400
         
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        expenses = Expense.query.filter(
-            Expense.user_id == user_id,
-            Expense.date >= cutoff_date
-        ).all()
+        if not 1 <= bins <= insights.MAX_HISTOGRAM_BINS:
+            return jsonify({'error': f'bins must be between 1 and {insights.MAX_HISTOGRAM_BINS}'}), 400
         
-        if not expenses:
-            return jsonify({
-                'success': True,
-                'data': {
-                    'total': 0,
-                    'count': 0,
-                    'average': 0,
-                    'max': 0,
-                    'min': 0
-                }
-            }), 200
+        percentiles = insights.DEFAULT_PERCENTILES
+        if request.args.get('percentiles'):
+            try:
+                percentiles = [float(p) for p in request.args['percentiles'].split(',')]
+            except ValueError:
+                percentiles = None
+            if not percentiles or not all(0 <= p <= 100 for p in percentiles):
+                return jsonify({'error': 'percentiles must be comma-separated numbers between 0 and 100'}), 400
         
-        amounts = [exp.amount for exp in expenses]
+        window = insights.load_window(user_id, days)
+        data = insights.stats(window)
+        data.update(insights.distribution(window, percentiles, bins))
         
         return jsonify({
             'success': True,
-            'data': {
-                'total': float(sum(amounts)),
-                'count': len(amounts),
-                'average': float(sum(amounts) / len(amounts)),
-                'max': float(max(amounts)),
-                'min': float(min(amounts))
-            }
+            'data': data
         }), 200
         
     except Exception as e:
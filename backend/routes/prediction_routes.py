@@ -1,14 +1,54 @@
-from flask import Blueprint, request, jsonify
-from models import db, BudgetPrediction
-from schemas import budget_prediction_schema, budget_predictions_schema
-from ml_service import budget_prediction_service
+from flask import Blueprint, current_app, request, jsonify
+from models import db, BudgetPrediction, Expense
+from schemas import budget_predictions_schema
+from training_jobs import get_training_queue
+import insights
+from data_versions import conditional_get
 from datetime import datetime
+from sqlalchemy import insert
 
 predictions_bp = Blueprint('predictions', __name__)
 
+# Users per chunk in batch prediction (one query and one bulk insert each)
+PREDICTION_BATCH_SIZE = 500
+
+def _service():
+    """
+    The prediction service, imported on first use so that workers which never
+    serve a prediction route don't pay for importing pandas/numpy/sklearn
+    """
+    from ml_service import budget_prediction_service
+    return budget_prediction_service
+
+def _queue_training(user_id, category_id, full=False):
+    """
+    Submit (or join) a background training job for a user/category, an
+    incremental update of the current model unless full is set or a full
+    retrain is due. Returns (job, created, error) where error is set if
+    there is too little data; job is None when the current model is
+    already fitted on the current expenses.
+    """
+    from ml_service import UP_TO_DATE
+    
+    queue = get_training_queue(current_app.config)
+    
+    job = queue.active_job(user_id, category_id)
+    if job is not None:
+        return job, False, None
+    
+    base, expenses_df, reason = _service().plan_training(user_id, category_id, full)
+    if reason == UP_TO_DATE:
+        return None, False, None
+    if base is None and len(expenses_df) < 10:
+        return None, False, f"Insufficient data: need at least 10 expenses, found {len(expenses_df)}"
+    
+    job, created = queue.submit(user_id, category_id, expenses_df, _service().registry, base)
+    return job, created, None
+
+
 @predictions_bp.route('/predictions/train', methods=['POST'])
 def train_model():
-    """Train the budget prediction model"""
+    """Queue training of the budget prediction model; returns a job id immediately"""
     try:
         data = request.get_json()
         
@@ -17,19 +57,46 @@ def train_model():
         
         user_id = data['user_id']
         category_id = data.get('category_id')
+        full = bool(data.get('full', False))
         
-        success, result = budget_prediction_service.train_model(user_id, category_id)
+        job, created, error = _queue_training(user_id, category_id, full)
         
-        if not success:
+        if error:
             return jsonify({
                 'success': False,
-                'message': result
+                'message': error
             }), 400
         
+        if job is None:
+            return jsonify({
+                'success': True,
+                'message': 'Model is up to date, no expenses changed since it was trained',
+                'status': 'up_to_date'
+            }), 200
+        
+        return jsonify({
+            'success': True,
+            'message': 'Training job queued' if created else 'Training already in progress',
+            'job_id': job.id,
+            'status': job.to_dict()['status']
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@predictions_bp.route('/predictions/jobs/<job_id>', methods=['GET'])
+def get_training_job(job_id):
+    """Get the status and metrics of a training job"""
+    try:
+        job = get_training_queue(current_app.config).get(job_id)
+        
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
         return jsonify({
             'success': True,
-            'message': 'Model trained successfully',
-            'metrics': result
+            'data': job.to_dict()
         }), 200
         
     except Exception as e:
@@ -49,7 +116,23 @@ def predict_budget():
         category_id = data.get('category_id')
         period = data.get('period', 'monthly')
         
-        prediction, error = budget_prediction_service.predict_budget(user_id, category_id, period)
+        # Never train on the request thread: start a job and let the client poll
+        if _service().registry.get(user_id, category_id) is None:
+            job, created, error = _queue_training(user_id, category_id)
+            if error:
+                return jsonify({
+                    'success': False,
+                    'message': error
+                }), 400
+            
+            return jsonify({
+                'success': False,
+                'message': 'No trained model yet, training has been started',
+                'job_id': job.id,
+                'status': job.to_dict()['status']
+            }), 202
+        
+        prediction, error = _service().predict_budget(user_id, category_id, period)
         
         if error:
             return jsonify({
@@ -85,6 +168,81 @@ def predict_budget():
         return jsonify({'error': str(e)}), 500
 
 
+@predictions_bp.route('/predictions/predict/batch', methods=['POST'])
+def predict_budget_batch():
+    """
+    Predict budgets for many users (and optionally categories) at once.
+    Users are processed in chunks; each chunk is one expense query, one
+    feature pass and one bulk insert of BudgetPrediction rows.
+    """
+    try:
+        data = request.get_json() or {}
+        
+        user_ids = data.get('user_ids')
+        category_ids = data.get('category_ids')
+        period = data.get('period', 'monthly')
+        save = data.get('save', True)
+        include_predictions = data.get('include_predictions', True)
+        
+        if user_ids is not None and not isinstance(user_ids, list):
+            return jsonify({'error': 'user_ids must be a list'}), 400
+        if category_ids is not None and not isinstance(category_ids, list):
+            return jsonify({'error': 'category_ids must be a list'}), 400
+        if not user_ids and not category_ids:
+            return jsonify({'error': 'user_ids or category_ids is required'}), 400
+        for name, ids in (('user_ids', user_ids), ('category_ids', category_ids)):
+            if ids and any(isinstance(i, bool) or not isinstance(i, int) for i in ids):
+                return jsonify({'error': f'{name} must be integers'}), 400
+        
+        # Categories only: every user with spending in those categories
+        if not user_ids:
+            user_ids = [row[0] for row in db.session.query(Expense.user_id).filter(
+                Expense.category_id.in_(category_ids)
+            ).distinct().all()]
+        
+        user_ids = list(dict.fromkeys(user_ids))
+        category_ids = category_ids or None
+        
+        predictions = []
+        skipped = []
+        saved = 0
+        
+        for i in range(0, len(user_ids), PREDICTION_BATCH_SIZE):
+            chunk = user_ids[i:i + PREDICTION_BATCH_SIZE]
+            chunk_predictions, chunk_skipped = _service().predict_batch(
+                chunk, category_ids, period
+            )
+            
+            if save and chunk_predictions:
+                db.session.execute(insert(BudgetPrediction), chunk_predictions)
+                db.session.commit()
+                saved += len(chunk_predictions)
+            
+            if include_predictions:
+                predictions.extend(chunk_predictions)
+            skipped.extend(chunk_skipped)
+        
+        result = {
+            'predicted': saved if save else len(predictions),
+            'saved': saved,
+            'skipped': skipped
+        }
+        if include_predictions:
+            result['predictions'] = [
+                {k: v for k, v in prediction.items() if k != 'features_used'}
+                for prediction in predictions
+            ]
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @predictions_bp.route('/predictions/history', methods=['GET'])
 def get_prediction_history():
     """Get prediction history for a user"""
@@ -108,7 +266,24 @@ def get_prediction_history():
         return jsonify({'error': str(e)}), 500
 
 
+@predictions_bp.route('/predictions/models/stats', methods=['GET'])
+def get_model_registry_stats():
+    """Get model registry cache statistics"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': {
+                **_service().registry.stats(),
+                'training': get_training_queue(current_app.config).stats()
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @predictions_bp.route('/insights/spending', methods=['GET'])
+@conditional_get(cache=True)
 def get_spending_insights():
     """Get spending insights and trends"""
     try:
@@ -118,9 +293,9 @@ def get_spending_insights():
         if not user_id:
             return jsonify({'error': 'user_id is required'}), 400
         
-        insights = budget_prediction_service.get_spending_insights(user_id, days)
+        spending = insights.spending_insights(insights.load_window(user_id, days))
         
-        if not insights:
+        if not spending:
             return jsonify({
                 'success': True,
                 'data': {
@@ -130,7 +305,7 @@ def get_spending_insights():
         
         return jsonify({
             'success': True,
-            'data': insights
+            'data': spending
         }), 200
         
     except Exception as e:
@@ -138,6 +313,7 @@ def get_spending_insights():
 
 
 @predictions_bp.route('/insights/recommendations', methods=['GET'])
+@conditional_get(cache=True)
 def get_recommendations():
     """Get AI-powered spending recommendations"""
     try:
@@ -146,64 +322,22 @@ def get_recommendations():
         if not user_id:
             return jsonify({'error': 'user_id is required'}), 400
         
-        # Get spending insights
-        insights = budget_prediction_service.get_spending_insights(user_id, 30)
+        spending = insights.spending_insights(insights.load_window(user_id, 30))
+        recommendations, insights_summary = insights.recommendations(spending)
         
-        if not insights:
+        if insights_summary is None:
             return jsonify({
                 'success': True,
                 'data': {
-                    'recommendations': ['Start tracking your expenses to get personalized recommendations']
+                    'recommendations': recommendations
                 }
             }), 200
         
-        recommendations = []
-        
-        # Generate recommendations based on insights
-        avg_daily = insights['average_daily']
-        total = insights['total_spending']
-        category_breakdown = insights['category_breakdown']
-        
-        # Check for high spending categories
-        if category_breakdown:
-            max_category = max(category_breakdown.items(), key=lambda x: x[1])
-            max_category_name, max_category_amount = max_category
-            
-            if max_category_amount > total * 0.4:
-                recommendations.append({
-                    'type': 'warning',
-                    'title': f'High spending in {max_category_name}',
-                    'message': f'You spent ${max_category_amount:.2f} ({max_category_amount/total*100:.1f}% of total) on {max_category_name} this month. Consider setting a budget limit.',
-                    'priority': 'high'
-                })
-        
-        # Daily spending recommendation
-        if avg_daily > 100:
-            recommendations.append({
-                'type': 'tip',
-                'title': 'Daily spending is high',
-                'message': f'Your average daily spending is ${avg_daily:.2f}. Try to reduce discretionary expenses by 10-20%.',
-                'priority': 'medium'
-            })
-        
-        # Generic tips if no specific recommendations
-        if not recommendations:
-            recommendations.append({
-                'type': 'success',
-                'title': 'Good spending habits!',
-                'message': 'Your spending is well-balanced. Keep up the good work!',
-                'priority': 'low'
-            })
-        
         return jsonify({
             'success': True,
             'data': {
                 'recommendations': recommendations,
-                'insights_summary': {
-                    'total_spending': total,
-                    'average_daily': avg_daily,
-                    'top_category': max(category_breakdown.items(), key=lambda x: x[1])[0] if category_breakdown else None
-                }
+                'insights_summary': insights_summary
             }
         }), 200
         
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
-from models import db, User
+from models import db, User, DailySpend
 from schemas import user_schema, users_schema
+from data_versions import bump, user_scope
 
 users_bp = Blueprint('users', __name__)
 
@@ -125,7 +126,10 @@ def delete_user(user_id):
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
+        DailySpend.query.filter_by(user_id=user_id).delete()
         db.session.delete(user)
+        # Keep the counter (ids can be reused) so cached validators never match again
+        bump(user_scope(user_id))
         db.session.commit()
         
         return jsonify({
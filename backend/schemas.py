@@ -1,5 +1,6 @@
 from flask_marshmallow import Marshmallow
 from marshmallow import fields, validate
+from catalog import get_catalog
 
 ma = Marshmallow()
 
@@ -44,13 +45,16 @@ class ExpenseSchema(ma.Schema):
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
     
-    # Nested fields for related data
-    category = fields.Nested(CategorySchema, dump_only=True)
+    # Nested category, taken from the in-memory catalog instead of lazy-loading
+    category = fields.Method('dump_category', dump_only=True)
     
     class Meta:
         fields = ('id', 'user_id', 'category_id', 'amount', 'description', 
                  'notes', 'date', 'created_at', 'updated_at', 'category')
 
+    def dump_category(self, obj):
+        return get_catalog().category(obj.category_id)
+
 
 class BudgetSchema(ma.Schema):
     id = fields.Int(dump_only=True)
@@ -63,13 +67,16 @@ class BudgetSchema(ma.Schema):
     is_active = fields.Bool()
     created_at = fields.DateTime(dump_only=True)
     
-    # Nested fields
-    category = fields.Nested(CategorySchema, dump_only=True)
+    # Nested category, taken from the in-memory catalog
+    category = fields.Method('dump_category', dump_only=True)
     
     class Meta:
         fields = ('id', 'user_id', 'category_id', 'amount', 'period', 
                  'start_date', 'end_date', 'is_active', 'created_at', 'category')
 
+    def dump_category(self, obj):
+        return get_catalog().category(obj.category_id)
+
 
 class BudgetPredictionSchema(ma.Schema):
     id = fields.Int(dump_only=True)
@@ -0,0 +1,73 @@
+"""
+Default categories and standard descriptions.
+
+Run once after creating the schema (``flask --app app seed-db``) instead of
+on every server start. Rows are written with bulk INSERTs and existing
+categories/descriptions are left untouched, so re-running is safe.
+"""
+
+from sqlalchemy import insert, select
+from models import db, Category, StandardDescription
+from data_versions import CATALOG_SCOPE, bump
+
+DEFAULT_CATEGORIES = [
+    {'name': 'Food & Dining', 'icon': '🍔', 'color': '#ef4444'},
+    {'name': 'Transportation', 'icon': '🚗', 'color': '#3b82f6'},
+    {'name': 'Shopping', 'icon': '🛍️', 'color': '#8b5cf6'},
+    {'name': 'Entertainment', 'icon': '🎬', 'color': '#ec4899'},
+    {'name': 'Bills & Utilities', 'icon': '⚡', 'color': '#f59e0b'},
+    {'name': 'Healthcare', 'icon': '🏥', 'color': '#10b981'},
+    {'name': 'Education', 'icon': '📚', 'color': '#6366f1'},
+    {'name': 'Travel', 'icon': '✈️', 'color': '#14b8a6'},
+    {'name': 'Housing', 'icon': '🏠', 'color': '#f97316'},
+    {'name': 'Groceries', 'icon': '🛒', 'color': '#22c55e'},
+    {'name': 'Personal Care', 'icon': '💅', 'color': '#a855f7'},
+    {'name': 'Others', 'icon': '📝', 'color': '#64748b'}
+]
+
+STANDARD_DESCRIPTIONS = {
+    'Food & Dining': ['Restaurant', 'Fast Food', 'Coffee Shop', 'Home Delivery', 'Other'],
+    'Transportation': ['Fuel/Gas', 'Public Transit', 'Taxi/Uber', 'Parking', 'Vehicle Maintenance', 'Other'],
+    'Shopping': ['Clothing', 'Electronics', 'Home Items', 'Gifts', 'Online Shopping', 'Other'],
+    'Entertainment': ['Movies', 'Concerts', 'Streaming Services', 'Games', 'Sports', 'Other'],
+    'Bills & Utilities': ['Electricity', 'Water', 'Internet', 'Phone Bill', 'Insurance', 'Other'],
+    'Healthcare': ['Doctor Visit', 'Medicines', 'Lab Tests', 'Hospital', 'Pharmacy', 'Other'],
+    'Education': ['Tuition Fees', 'Books', 'Courses', 'Supplies', 'Other'],
+    'Travel': ['Flight', 'Hotel', 'Vacation', 'Travel Insurance', 'Other'],
+    'Housing': ['Rent', 'Mortgage', 'Property Tax', 'Home Maintenance', 'Other'],
+    'Groceries': ['Supermarket', 'Local Market', 'Organic Store', 'Other'],
+    'Personal Care': ['Salon', 'Gym', 'Spa', 'Cosmetics', 'Other'],
+    'Others': ['Miscellaneous', 'Other']
+}
+
+
+def seed_defaults():
+    """
+    Insert any missing default categories and standard descriptions.
+    Returns (categories_created, descriptions_created); the caller commits.
+    """
+    existing = set(db.session.scalars(select(Category.name)))
+    new_categories = [c for c in DEFAULT_CATEGORIES if c['name'] not in existing]
+    if new_categories:
+        db.session.execute(insert(Category), new_categories)
+
+    category_ids = dict(db.session.execute(
+        select(Category.name, Category.id).where(Category.name.in_(list(STANDARD_DESCRIPTIONS)))
+    ).all())
+    existing = set(db.session.execute(
+        select(StandardDescription.category_id, StandardDescription.description)
+    ).all())
+
+    new_descriptions = [
+        {'category_id': category_ids[name], 'description': description, 'is_active': True}
+        for name, descriptions in STANDARD_DESCRIPTIONS.items() if name in category_ids
+        for description in descriptions
+        if (category_ids[name], description) not in existing
+    ]
+    if new_descriptions:
+        db.session.execute(insert(StandardDescription), new_descriptions)
+
+    if new_categories or new_descriptions:
+        bump(CATALOG_SCOPE)
+
+    return len(new_categories), len(new_descriptions)
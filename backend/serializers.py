@@ -0,0 +1,81 @@
+"""
+Fast serialization for expense lists.
+
+``expenses_schema.dump`` builds every row through marshmallow from full
+Expense objects. The list endpoints instead select only the expense
+columns, take categories from the in-memory catalog and build the row
+dicts directly, then encode with orjson when it is installed (falling back
+to the app's JSON provider). ``dump_expense_rows`` produces exactly what
+``ExpenseSchema`` would, with or without the nested category.
+"""
+
+from flask import current_app
+from models import Expense
+from catalog import get_catalog
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+EXPENSE_COLUMNS = (
+    Expense.id,
+    Expense.user_id,
+    Expense.category_id,
+    Expense.amount,
+    Expense.description,
+    Expense.notes,
+    Expense.date,
+    Expense.created_at,
+    Expense.updated_at
+)
+
+
+def category_map():
+    """{category id: serialized category} from the catalog snapshot"""
+    return get_catalog().categories_by_id
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def dump_expense_rows(rows, categories=None):
+    """
+    Serialize projected rows (EXPENSE_COLUMNS). With ``categories`` from
+    category_map() each row also embeds its category like ExpenseSchema.
+    Datetimes are left to orjson, which writes naive values in the same
+    format as isoformat().
+    """
+    as_text = _isoformat if orjson is None else None
+    data = []
+    append = data.append
+    for id, user_id, category_id, amount, description, notes, date, created_at, updated_at in rows:
+        if as_text is not None:
+            date, created_at, updated_at = as_text(date), as_text(created_at), as_text(updated_at)
+        expense = {
+            'id': id,
+            'user_id': user_id,
+            'category_id': category_id,
+            'amount': float(amount) if amount is not None else None,
+            'description': description,
+            'notes': notes,
+            'date': date,
+            'created_at': created_at,
+            'updated_at': updated_at
+        }
+        if categories is not None:
+            expense['category'] = categories.get(category_id)
+        append(expense)
+    return data
+
+
+def dumps(payload):
+    """Encode a response payload to JSON bytes, sorted keys like jsonify"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return current_app.json.dumps(payload).encode()
+
+
+def json_response(payload, status=200):
+    return current_app.response_class(dumps(payload), status=status, mimetype='application/json')
@@ -0,0 +1,92 @@
+"""
+Single-pass summaries of expense amounts.
+
+``QuantileSketch`` estimates percentiles of a stream without keeping the
+values: amounts are counted in logarithmically sized buckets (the DDSketch
+scheme), so every order statistic is known within ``relative_accuracy``
+and memory depends on the range of amounts, not their number. Quantiles
+interpolate linearly between the two order statistics around their rank,
+like ``numpy.percentile``'s default method, which keeps them within
+``relative_accuracy`` too and matters for small categories. Sketches with the same accuracy can be merged, e.g. per-category
+sketches into an overall one.
+
+``Histogram`` counts values into fixed-width bins between known bounds.
+"""
+
+import math
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch for non-negative values"""
+
+    def __init__(self, relative_accuracy=0.005):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError('relative_accuracy must be between 0 and 1')
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._inv_log_gamma = 1 / math.log(self.gamma)
+
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            # Amounts are validated as >= 0; zero gets its own bucket
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) * self._inv_log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError('Cannot merge sketches with different accuracy')
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q):
+        """Estimate of the q-quantile (0 <= q <= 1), or None if empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        below = math.floor(rank)
+
+        low = self._order_statistic(below)
+        if rank == below:
+            return low
+        return low + (rank - below) * (self._order_statistic(below + 1) - low)
+
+    def _order_statistic(self, rank):
+        """Estimate of the value at 0-based position rank in sorted order"""
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Midpoint (in relative terms) of (gamma^(i-1), gamma^i]
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class Histogram:
+    """Counts of values in ``bins`` equal-width bins over [low, high]"""
+
+    def __init__(self, low, high, bins):
+        self.low = low
+        self.high = high
+        self.bins = bins
+        self.counts = [0] * bins
+        self._scale = bins / (high - low) if high > low else 0
+
+    def add(self, value):
+        index = int((value - self.low) * self._scale)
+        # The upper bound falls in the last bin, as in numpy.histogram
+        self.counts[min(max(index, 0), self.bins - 1)] += 1
+
+    def edges(self):
+        width = (self.high - self.low) / self.bins
+        return [self.low + i * width for i in range(self.bins)] + [self.high]
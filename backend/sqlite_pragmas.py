@@ -0,0 +1,39 @@
+"""
+Per-connection SQLite settings.
+
+``PRAGMA`` values such as ``synchronous`` and ``busy_timeout`` only last for
+the connection they were issued on, so they are applied from a ``connect``
+listener to every connection the pool opens. ``journal_mode=WAL`` is stored
+in the database file but is repeated harmlessly. Configured through
+``SQLITE_PRAGMAS`` (see ProductionConfig); other databases are left alone.
+"""
+
+from sqlalchemy import event
+from models import db
+
+
+def _apply(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def init_app(app):
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _apply(dict(pragmas)))
+
+
+def current(connection, names):
+    """{pragma: value} as seen by a connection, for checks and benchmarks"""
+    return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
@@ -0,0 +1,77 @@
+"""
+Shared fixtures: one seeded SQLite database per test session.
+
+User 1 ("bench") has a synthetic expense history (benchmarks.common),
+a budget per category and a trained model; the response cache is off so
+every request runs its queries.
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app import create_app
+from config import Config
+from migrations import upgrade
+from models import Budget, db
+from seed import seed_defaults
+from benchmarks.common import seed_expenses
+
+EXPENSES = 3000
+DAYS = 180
+
+
+@pytest.fixture(scope='session')
+def app():
+    workdir = tempfile.mkdtemp()
+
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'test.db')
+        ML_MODEL_DIR = os.path.join(workdir, 'models')
+        RESPONSE_CACHE_BACKEND = 'null'
+
+    app = create_app(TestConfig)
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        from ml_service import budget_prediction_service
+        upgrade()
+        seed_defaults()
+        seed_expenses(EXPENSES, DAYS)
+        db.session.add_all([Budget(user_id=1, category_id=category_id, amount=500.0, period='monthly',
+                                   start_date=datetime.utcnow() - timedelta(days=90))
+                            for category_id in range(1, 13)])
+        db.session.commit()
+        budget_prediction_service.train_model(1)
+        db.session.remove()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    shutil.rmtree(workdir)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def statements(app):
+    """Records (statement, parameters) for every SQL statement run while the test runs"""
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            recorded.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    yield recorded
+    event.remove(engine, 'before_cursor_execute', record)
@@ -0,0 +1,39 @@
+"""POST /api/budgets/status/batch"""
+
+import pytest
+
+PATH = '/api/budgets/status/batch'
+
+
+def test_batch_matches_single_user_status(client):
+    single = client.get('/api/budgets/status?user_id=1').get_json()['data']
+
+    response = client.post(PATH, json={'user_ids': [1, 2]})
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['1'] == single
+    assert data['2'] == {'budgets': [], 'total_budgeted': 0, 'total_spent': 0, 'total_remaining': 0}
+
+
+def test_exceeded_only_keeps_status_shape(client):
+    full = client.post(PATH, json={'user_ids': [1, 2]}).get_json()['data']
+
+    response = client.post(PATH, json={'user_ids': [1, 2], 'exceeded_only': True})
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    exceeded = [b for b in full['1']['budgets'] if b['is_exceeded']]
+    if exceeded:
+        assert data['1'] == dict(full['1'], budgets=exceeded)
+    else:
+        assert '1' not in data
+    assert '2' not in data
+
+
+@pytest.mark.parametrize('user_ids', [['x'], [1, 'x'], [1.5], [True], [None], [[1]]])
+def test_non_integer_user_ids_are_rejected(client, user_ids):
+    response = client.post(PATH, json={'user_ids': user_ids})
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'user_ids must be integers'
@@ -0,0 +1,36 @@
+"""Last-Modified / If-Modified-Since never hide a write made in the same second"""
+
+from datetime import datetime
+import data_versions
+
+SCOPES = ['user:1', data_versions.CATALOG_SCOPE]
+
+
+def validators(app, monkeypatch, updated_at, now, if_modified_since=None):
+    monkeypatch.setattr(data_versions, 'current', lambda scopes: ({}, updated_at))
+    headers = {'If-Modified-Since': if_modified_since} if if_modified_since else {}
+    with app.test_request_context('/api/expenses?user_id=1', headers=headers):
+        _, etag, last_modified = data_versions._validators(SCOPES, now)
+        return last_modified, data_versions._not_modified(etag, last_modified)
+
+
+def test_last_modified_is_withheld_until_its_second_has_passed(app, monkeypatch):
+    write = datetime(2024, 5, 1, 10, 0, 0, 200000)
+    assert validators(app, monkeypatch, write, datetime(2024, 5, 1, 10, 0, 0, 500000))[0] is None
+    assert validators(app, monkeypatch, write, datetime(2024, 5, 1, 10, 0, 1, 100000))[0] == \
+        datetime(2024, 5, 1, 10, 0, 0)
+
+
+def test_second_write_in_the_same_second_is_not_hidden(app, monkeypatch):
+    first = datetime(2024, 5, 1, 10, 0, 0, 200000)
+    second = datetime(2024, 5, 1, 10, 0, 0, 800000)
+    # A client can only hold the first write's Last-Modified from after its second
+    seen, _ = validators(app, monkeypatch, first, datetime(2024, 5, 1, 10, 0, 0, 500000))
+    assert seen is None
+
+    since = 'Wed, 01 May 2024 10:00:00 GMT'
+    last_modified, not_modified = validators(app, monkeypatch, second, datetime(2024, 5, 1, 10, 0, 2), since)
+    assert last_modified == datetime(2024, 5, 1, 10, 0, 0) and not_modified
+    later = datetime(2024, 5, 1, 10, 0, 2, 300000)
+    assert validators(app, monkeypatch, later, datetime(2024, 5, 1, 10, 0, 2, 600000), since) == (None, False)
+    assert validators(app, monkeypatch, later, datetime(2024, 5, 1, 10, 0, 3), since)[1] is False
@@ -0,0 +1,20 @@
+"""/api/dashboard is built from one pass over the spend window"""
+
+DASHBOARD_STATEMENTS = 2  # data versions, daily rollup rows (windows start at midnight)
+
+
+def test_dashboard_statement_count(client, statements):
+    path = '/api/dashboard?user_id=1&days=30'
+    assert client.get(path).status_code == 200  # warms the category catalog
+    statements.clear()
+
+    response = client.get(path)
+
+    assert response.status_code == 200
+    assert len(statements) == DASHBOARD_STATEMENTS, [s for s, _ in statements]
+
+
+def test_dashboard_matches_separate_endpoints(client):
+    dashboard = client.get('/api/dashboard?user_id=1&days=30').get_json()['data']
+    summary = client.get('/api/expenses/summary?user_id=1&days=30').get_json()['data']
+    assert dashboard['summary'] == summary
@@ -0,0 +1,38 @@
+"""Expense dates are stored as naive UTC on every write path"""
+
+from datetime import datetime
+import pytest
+from bulk_import import parse_date
+from models import db, Expense
+
+LOCAL = '2024-03-15T10:00:00+05:30'
+UTC = datetime(2024, 3, 15, 4, 30)
+
+
+@pytest.mark.parametrize('value, expected', [
+    (LOCAL, UTC),
+    ('2024-03-15T04:30:00Z', UTC),
+    ('2024-03-15T04:30:00', UTC),
+    ('2024-03-15', datetime(2024, 3, 15)),
+    (datetime.fromisoformat(LOCAL), UTC)
+])
+def test_parse_date(value, expected):
+    assert parse_date(value) == expected
+
+
+def test_create_update_and_bulk_import_agree(app, client):
+    expense = {'user_id': 1, 'category_id': 1, 'amount': 5.0, 'date': LOCAL,
+               'description': 'expense date test'}
+
+    created = client.post('/api/expenses', json=expense)
+    updated = client.post('/api/expenses', json={**expense, 'date': '2024-01-01'})
+    client.put(f"/api/expenses/{updated.get_json()['data']['id']}", json={'date': LOCAL})
+    imported = client.post('/api/expenses/bulk', json=[expense])
+
+    with app.app_context():
+        rows = db.session.query(Expense.id, Expense.date).filter_by(description=expense['description']).all()
+    for row in rows:
+        client.delete(f'/api/expenses/{row.id}')
+
+    assert (created.status_code, imported.status_code) == (201, 201)
+    assert [row.date for row in rows] == [UTC, UTC, UTC]
@@ -0,0 +1,49 @@
+"""Migrations build the schema the models describe"""
+
+from sqlalchemy import create_engine, inspect, select
+import migrations
+import rollups
+from models import db, DailySpend, Expense
+
+
+def schema(engine, tables):
+    inspector = inspect(engine)
+    return {
+        table: (
+            [(c['name'], str(c['type']), c['nullable']) for c in inspector.get_columns(table)],
+            sorted((i['name'], tuple(i['column_names'])) for i in inspector.get_indexes(table))
+        )
+        for table in tables
+    }
+
+
+def test_migrated_schema_matches_the_models(tmp_path):
+    migrated = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    created = create_engine(f"sqlite:///{tmp_path / 'created.db'}")
+    migrations.upgrade(migrated)
+    db.metadata.create_all(created)
+
+    tables = sorted(db.metadata.tables)
+    assert schema(migrated, tables) == schema(created, tables)
+
+
+def test_upgrade_is_recorded_and_idempotent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    assert migrations.upgrade(engine) == [number for number, _, _ in migrations.MIGRATIONS]
+    assert migrations.upgrade(engine) == []
+
+
+def test_rollup_backfill_matches_a_rebuild(app, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    migrations.upgrade(engine, target=2)
+    with app.app_context():
+        rows = [{c: getattr(e, c) for c in ('user_id', 'category_id', 'amount', 'date')}
+                for e in db.session.scalars(select(Expense).limit(500))]
+    with engine.begin() as connection:
+        connection.execute(Expense.__table__.insert(), rows)
+    migrations.upgrade(engine)
+
+    with engine.connect() as connection:
+        backfilled = sorted(tuple(row) for row in connection.execute(select(DailySpend.__table__)))
+        rebuilt = sorted(tuple(row) for row in connection.execute(rollups.aggregate_expenses()))
+    assert backfilled and backfilled == rebuilt
@@ -0,0 +1,50 @@
+"""Concurrent saves of the same key get distinct versions"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import model_registry
+from model_registry import ModelBundle, ModelRegistry, TMP_SUFFIX
+
+
+def bundle(value):
+    return ModelBundle({'value': value}, None, ['f'], metrics={'value': value})
+
+
+def save_many(root, writer, count):
+    registry = ModelRegistry(root, keep_versions=1000)
+    return [registry.save(1, None, bundle(f'{writer}-{i}')) for i in range(count)]
+
+
+def test_save_moves_on_when_another_writer_takes_the_version(monkeypatch, tmp_path):
+    first, second = ModelRegistry(str(tmp_path)), ModelRegistry(str(tmp_path))
+    publish = model_registry.publish_bundle
+    raced = []
+
+    def publish_after_another_save(tmp, path):
+        if not raced:
+            raced.append(None)
+            raced[0] = second.save(1, None, bundle('second'))
+        publish(tmp, path)
+
+    monkeypatch.setattr(model_registry, 'publish_bundle', publish_after_another_save)
+    version = first.save(1, None, bundle('first'))
+
+    assert (raced, version) == ([1], 2)
+    assert ModelRegistry(str(tmp_path)).get(1).metrics == {'value': 'first'}
+    key_dir = tmp_path / 'user_1' / 'all'
+    assert sorted(os.listdir(key_dir)) == ['v0001.bundle', 'v0002.bundle']
+
+
+def test_concurrent_processes_get_distinct_readable_versions(tmp_path):
+    writers, count = 4, 5
+    with ProcessPoolExecutor(writers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        results = list(pool.map(save_many, [str(tmp_path)] * writers, range(writers), [count] * writers))
+
+    versions = sorted(v for saved in results for v in saved)
+    assert versions == list(range(1, writers * count + 1))
+
+    registry = ModelRegistry(str(tmp_path), keep_versions=1000)
+    values = {model_registry.read_bundle(path).metrics['value'] for _, path in registry._artifacts((1, None))}
+    assert values == {f'{w}-{i}' for w in range(writers) for i in range(count)}
+    assert not [name for name in os.listdir(tmp_path / 'user_1' / 'all') if name.endswith(TMP_SUFFIX)]
@@ -0,0 +1,25 @@
+"""POST /api/predictions/predict/batch"""
+
+import pytest
+
+PATH = '/api/predictions/predict/batch'
+
+
+def test_batch_prediction(client):
+    response = client.post(PATH, json={'user_ids': [1, 2], 'save': False})
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('body, name', [
+    ({'user_ids': ['x']}, 'user_ids'),
+    ({'user_ids': [1, 2.5]}, 'user_ids'),
+    ({'user_ids': [True]}, 'user_ids'),
+    ({'category_ids': ['food']}, 'category_ids'),
+    ({'user_ids': [1], 'category_ids': [None]}, 'category_ids')
+])
+def test_non_integer_ids_are_rejected(client, body, name):
+    response = client.post(PATH, json=body)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f'{name} must be integers'
@@ -0,0 +1,67 @@
+"""
+Every hot-path endpoint's queries must be answered from an index.
+
+Each request's SELECTs are captured through before_cursor_execute and run
+again under EXPLAIN QUERY PLAN; a bare ``SCAN`` of a per-user table (no
+index) fails the test.
+"""
+
+import re
+import pytest
+from models import db
+
+PER_USER_TABLES = ('expenses', 'budgets', 'budget_predictions', 'daily_spend')
+FULL_SCAN = re.compile(r'^SCAN (%s)\b(?!.*\bUSING\b)' % '|'.join(PER_USER_TABLES))
+
+GET_ENDPOINTS = [
+    '/api/expenses?user_id=1',
+    '/api/expenses?user_id=1&category_id=3',
+    '/api/expenses?user_id=1&start_date=2020-01-01&end_date=2100-01-01',
+    '/api/expenses?user_id=1&stream=true',
+    '/api/expenses/export?user_id=1&format=ndjson',
+    '/api/expenses/summary?user_id=1&days=30',
+    '/api/expenses/stats?user_id=1&days=90',
+    '/api/budgets?user_id=1',
+    '/api/budgets/status?user_id=1',
+    '/api/dashboard?user_id=1&days=30',
+    '/api/insights/spending?user_id=1&days=30',
+    '/api/insights/recommendations?user_id=1',
+    '/api/predictions/history?user_id=1'
+]
+
+
+def query_plan(app, statement, parameters):
+    with app.app_context():
+        with db.engine.connect() as conn:
+            rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+    return [row[-1] for row in rows]
+
+
+def full_scans(app, statements):
+    scans = []
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            continue
+        for detail in query_plan(app, statement, parameters):
+            if FULL_SCAN.match(detail):
+                scans.append(f'{detail}\n    {statement}')
+    return scans
+
+
+@pytest.mark.parametrize('path', GET_ENDPOINTS)
+def test_get_endpoint_uses_indexes(app, client, statements, path):
+    response = client.get(path)
+    response.get_data()  # drain streamed responses
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert any(s.lstrip().upper().startswith('SELECT') for s, _ in statements)
+    assert full_scans(app, statements) == []
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/api/predictions/predict', {'user_id': 1, 'period': 'monthly'}),
+    ('/api/predictions/predict/batch', {'user_ids': [1], 'period': 'monthly'})
+])
+def test_prediction_uses_indexes(app, client, statements, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert full_scans(app, statements) == []
@@ -0,0 +1,23 @@
+"""Nested categories in expense and budget dumps come from the catalog"""
+
+import pytest
+
+CATEGORY_QUERY = 'FROM categories'
+
+
+@pytest.mark.parametrize('path', [
+    '/api/expenses/5',
+    '/api/budgets?user_id=1',
+    '/api/budgets/1'
+])
+def test_nested_category_not_loaded_from_db(client, statements, path):
+    assert client.get(path).status_code == 200  # warms the category catalog
+    statements.clear()
+
+    response = client.get(path)
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    for row in data if isinstance(data, list) else [data]:
+        assert row['category']['id'] == row['category_id']
+    assert not [s for s, _ in statements if CATEGORY_QUERY in s]
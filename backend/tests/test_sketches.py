@@ -0,0 +1,86 @@
+"""QuantileSketch, Histogram and /api/expenses/stats against NumPy"""
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+from models import db, Expense
+from sketches import Histogram, QuantileSketch
+from insights import QUANTILE_ACCURACY
+from benchmarks.common import amount_distributions
+
+PERCENTILES = [1, 10, 25, 50, 75, 90, 99, 99.9]
+BINS = 20
+DISTRIBUTIONS = ['gamma', 'lognormal', 'with zeros', 'heavy tail']
+
+
+def max_relative_error(estimates, values):
+    """Largest relative error of the estimates vs. numpy.percentile"""
+    reference = np.percentile(values, PERCENTILES)
+    return max(abs(estimate - exact) / exact if exact else abs(estimate)
+               for estimate, exact in zip(estimates, reference))
+
+
+def check_against_numpy(values):
+    sketch = QuantileSketch(QUANTILE_ACCURACY)
+    histogram = Histogram(float(values.min()), float(values.max()), BINS)
+    for value in values.tolist():
+        sketch.add(value)
+        histogram.add(value)
+
+    estimates = [sketch.quantile(p / 100) for p in PERCENTILES]
+    assert max_relative_error(estimates, values) <= QUANTILE_ACCURACY
+    assert histogram.counts == np.histogram(values, bins=BINS)[0].tolist()
+
+
+@pytest.mark.parametrize('distribution', DISTRIBUTIONS)
+def test_sketch_and_histogram_match_numpy(distribution):
+    check_against_numpy(amount_distributions(20_000)[distribution])
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('distribution', DISTRIBUTIONS)
+def test_sketch_and_histogram_match_numpy_1m(distribution):
+    check_against_numpy(amount_distributions(1_000_000)[distribution])
+
+
+def test_small_samples_interpolate_like_numpy():
+    sketch = QuantileSketch(QUANTILE_ACCURACY)
+    for value in [12, 15, 100]:
+        sketch.add(value)
+    assert sketch.quantile(0.9) == pytest.approx(np.percentile([12, 15, 100], 90), rel=QUANTILE_ACCURACY)
+    assert sketch.quantile(0.5) == pytest.approx(15, rel=QUANTILE_ACCURACY)
+
+
+def test_merged_sketches_match_single_sketch():
+    values = amount_distributions(20_000)['lognormal'].tolist()
+    whole, left, right = (QuantileSketch(QUANTILE_ACCURACY) for _ in range(3))
+    for i, value in enumerate(values):
+        whole.add(value)
+        (left if i % 2 else right).add(value)
+    left.merge(right)
+    assert [left.quantile(p / 100) for p in PERCENTILES] == [whole.quantile(p / 100) for p in PERCENTILES]
+
+
+def test_stats_endpoint_matches_numpy(app, client):
+    with app.app_context():
+        rows = db.session.execute(select(Expense.category_id, Expense.amount).where(Expense.user_id == 1)).all()
+    categories = np.array([row[0] for row in rows])
+    amounts = np.array([row[1] for row in rows])
+
+    response = client.get('/api/expenses/stats?user_id=1&days=365&bins={}&percentiles={}'.format(
+        BINS, ','.join(f'{p:g}' for p in PERCENTILES)))
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['count'] == len(amounts)
+    assert data['total'] == pytest.approx(amounts.sum())
+    assert (data['min'], data['max']) == (amounts.min(), amounts.max())
+    assert data['histogram']['counts'] == np.histogram(amounts, bins=BINS)[0].tolist()
+
+    # Estimates are rounded to cents in the response
+    tolerance = QUANTILE_ACCURACY + 0.001
+    assert max_relative_error([data['percentiles'][f'p{p:g}'] for p in PERCENTILES], amounts) <= tolerance
+    for entry in data['by_category']:
+        values = amounts[categories == entry['category_id']]
+        assert entry['count'] == len(values)
+        assert max_relative_error([entry['percentiles'][f'p{p:g}'] for p in PERCENTILES], values) <= tolerance
@@ -0,0 +1,58 @@
+"""Incremental training: no-op on unchanged expenses, updates on new ones"""
+
+from datetime import datetime
+import pytest
+from sklearn.metrics import mean_absolute_error
+from ml_service import expected_feature_columns
+
+
+def service():
+    from ml_service import budget_prediction_service
+    return budget_prediction_service
+
+
+def test_training_on_unchanged_expenses_keeps_the_model(app, client):
+    with app.app_context():
+        service().train_model(1)  # bring the model up to date
+        before = service().registry.get(1)
+        success, metrics = service().train_model(1)
+        after = service().registry.get(1)
+
+    assert success
+    assert metrics['model_version'] == before.version == after.version
+    assert after.model.n_estimators == before.model.n_estimators
+
+    response = client.post('/api/predictions/train', json={'user_id': 1})
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'up_to_date'
+    assert 'job_id' not in response.get_json()
+
+
+def test_new_expense_is_fitted_incrementally(app, client):
+    with app.app_context():
+        service().train_model(1)
+        before = service().registry.get(1)
+
+    created = client.post('/api/expenses', json={
+        'user_id': 1, 'category_id': 1, 'amount': 42.0, 'date': datetime.utcnow().isoformat()})
+    assert created.status_code == 201
+    try:
+        with app.app_context():
+            success, metrics = service().train_model(1)
+            bundle = service().registry.get(1)
+    finally:
+        client.delete(f"/api/expenses/{created.get_json()['data']['id']}")
+
+    assert success
+    assert metrics['training_mode'] == 'incremental'
+    assert metrics['model_version'] == before.version + 1
+    assert metrics['estimators'] == before.model.n_estimators + 10
+
+    # The weeks the full fit held out stay out of the update and are scored again
+    features = bundle.training_features
+    test = (features['iso_year'] * 100 + features['week']).isin(metrics['test_weeks'])
+    assert metrics['test_weeks'] == before.metrics['test_weeks'] and test.any()
+    assert metrics['training_samples'] == len(features) - test.sum()
+    X = bundle.scaler.transform(features.loc[test, expected_feature_columns(bundle)].fillna(0).astype(float))
+    assert metrics['test_mae'] == pytest.approx(
+        mean_absolute_error(features.loc[test, 'total_spending'], bundle.model.predict(X)))
@@ -0,0 +1,57 @@
+"""The training queue recovers from a pool whose worker process died"""
+
+import os
+import time
+import ml_service
+from training_jobs import TrainingQueue
+
+
+def crash(*args):
+    os._exit(1)
+
+
+def fit(expenses_df, base):
+    return False, f'fitted {expenses_df}'
+
+
+def finished(job, timeout=60):
+    """Wait for the job's done callback, which runs after the future resolves"""
+    deadline = time.monotonic() + timeout
+    while job.finished_at is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+class Registry:
+    def save(self, user_id, category_id, bundle):
+        return 1
+
+
+def test_job_in_a_crashed_pool_fails_and_the_next_submit_gets_a_new_pool(monkeypatch, tmp_path):
+    queue = TrainingQueue(max_workers=1, job_dir=str(tmp_path))
+    try:
+        monkeypatch.setattr(ml_service, 'fit_model_job', crash)
+        crashed = finished(queue.submit(1, None, None, Registry())[0])
+        assert crashed.status == 'failed'
+        assert 'terminated abruptly' in crashed.error
+        assert queue._executor is None
+
+        monkeypatch.setattr(ml_service, 'fit_model_job', fit)
+        job, created = queue.submit(1, None, 7, Registry())
+        assert created
+        assert finished(job).error == 'fitted 7'
+    finally:
+        queue.shutdown()
+
+
+def test_submit_to_a_pool_broken_meanwhile_is_retried(monkeypatch, tmp_path):
+    queue = TrainingQueue(max_workers=1, job_dir=str(tmp_path))
+    try:
+        broken = queue._get_executor().submit(crash)
+        broken.exception(timeout=60)
+
+        monkeypatch.setattr(ml_service, 'fit_model_job', fit)
+        job, _ = queue.submit(1, None, 9, Registry())
+        assert finished(job).error == 'fitted 9'
+    finally:
+        queue.shutdown()
@@ -0,0 +1,44 @@
+"""Day windows (days=N) start at UTC midnight, matching the date-keyed validators"""
+
+from datetime import datetime, time, timedelta
+from sqlalchemy import func, select
+from models import db, Expense
+import insights
+
+
+def test_window_covers_n_calendar_days_including_today():
+    day = datetime(2024, 3, 15)
+    for now in (day, day.replace(hour=9, minute=30), day.replace(hour=23, minute=59, second=59)):
+        assert insights.window_start(30, now) == datetime(2024, 2, 15)
+        assert insights.window_start(1, now) == day
+
+
+def test_average_daily_divides_by_the_days_covered(app):
+    with app.app_context():
+        window = insights.load_window(1, 7)
+        summary = insights.summary(window)
+    assert len({row.day for row in window.rows}) <= 7
+    assert summary['average_daily'] == summary['total_spending'] / 7
+
+
+def test_window_only_changes_with_the_date(app):
+    today = datetime.combine(datetime.utcnow().date(), time())
+    with app.app_context():
+        early = insights.load_window(1, 30, today + timedelta(minutes=1))
+        late = insights.load_window(1, 30, today + timedelta(hours=23, minutes=59))
+        tomorrow = insights.load_window(1, 30, today + timedelta(days=1, minutes=1))
+    assert early.start == late.start == today - timedelta(days=29)
+    assert sorted(early.rows) == sorted(late.rows)
+    assert tomorrow.start == early.start + timedelta(days=1)
+
+
+def test_expense_list_days_filter_starts_at_midnight(app, client):
+    start = insights.window_start(30)
+    with app.app_context():
+        expected = db.session.scalar(
+            select(func.count()).where(Expense.user_id == 1, Expense.date >= start))
+
+    response = client.get('/api/expenses?user_id=1&days=30')
+
+    assert response.status_code == 200
+    assert response.get_json()['count'] == expected
@@ -0,0 +1,270 @@
+"""
+Asynchronous training job queue.
+
+Model fitting runs in a process pool so it never occupies a request
+thread. The request thread only loads the user's expenses and submits
+them; the finished model is saved to the registry from the pool's
+completion callback. Requests for a (user_id, category_id) that already
+has a queued or running job are merged into that job.
+
+Job records are also written as JSON files to a directory shared by the
+web workers (``TRAINING_JOB_DIR``, default ``<ML_MODEL_DIR>/jobs``), so a
+status poll that lands on another worker process still finds the job.
+Only the submitting process knows when a queued job starts running;
+other workers report it as queued until it finishes.
+
+If a pool process dies (e.g. killed for memory during a fit), the pool
+is broken for good: its jobs fail, and it is discarded so the next
+submit starts a fresh one. A submit that hits a pool broken in the
+meantime is retried once on a new pool.
+"""
+
+import json
+import multiprocessing
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+_JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class TrainingJob:
+    def __init__(self, user_id, category_id=None):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.category_id = category_id
+        self.status = 'queued'
+        self.submitted_at = datetime.utcnow()
+        self.finished_at = None
+        self.metrics = None
+        self.error = None
+        self.future = None
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(data['user_id'], data['category_id'])
+        job.id = data['job_id']
+        job.status = data['status']
+        job.submitted_at = datetime.fromisoformat(data['submitted_at'])
+        job.finished_at = datetime.fromisoformat(data['finished_at']) if data['finished_at'] else None
+        job.metrics = data['metrics']
+        job.error = data['error']
+        return job
+
+    def to_dict(self):
+        status = self.status
+        if status == 'queued' and self.future is not None and self.future.running():
+            status = 'running'
+
+        return {
+            'job_id': self.id,
+            'user_id': self.user_id,
+            'category_id': self.category_id,
+            'status': status,
+            'submitted_at': self.submitted_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'metrics': self.metrics,
+            'error': self.error
+        }
+
+
+class JobStore:
+    """Job records as <job_id>.json files; the newest ``keep`` are kept"""
+
+    def __init__(self, directory, keep=1000):
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, job_id):
+        return os.path.join(self.directory, f'{job_id}.json')
+
+    def write(self, job):
+        os.makedirs(self.directory, exist_ok=True)
+        # Written to a temporary file and renamed, so readers never see a partial record
+        tmp = f'{self._path(job.id)}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(job.to_dict(), f, default=str)
+        os.replace(tmp, self._path(job.id))
+
+    def read(self, job_id):
+        if not _JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            with open(self._path(job_id)) as f:
+                return TrainingJob.from_dict(json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def prune(self):
+        try:
+            entries = [(e.stat().st_mtime, e.path) for e in os.scandir(self.directory) if e.name.endswith('.json')]
+        except OSError:
+            return  # missing directory, or a record removed by another worker meanwhile
+        for _, path in sorted(entries, reverse=True)[self.keep:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class TrainingQueue:
+    def __init__(self, max_workers=2, max_finished_jobs=1000, job_dir=None):
+        self.max_workers = max_workers
+        self.max_finished_jobs = max_finished_jobs
+        self.store = JobStore(job_dir, max_finished_jobs) if job_dir else None
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._active = {}
+        self._finished = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        job_dir = config.get('TRAINING_JOB_DIR') or os.path.join(config.get('ML_MODEL_DIR', 'models'), 'jobs')
+        return cls(
+            max_workers=config.get('TRAINING_WORKERS', 2),
+            max_finished_jobs=config.get('TRAINING_JOB_HISTORY', 1000),
+            job_dir=job_dir
+        )
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: the parent is a multi-threaded web server
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _discard_executor(self, executor):
+        """Drop a broken pool so the next submit creates a new one"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def active_job(self, user_id, category_id=None):
+        """The queued or running job for a user/category, if any"""
+        with self._lock:
+            return self._active.get((user_id, category_id or None))
+
+    def get(self, job_id):
+        """A job submitted by this process, or one read from the shared job directory"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.read(job_id)
+        return job
+
+    def _write(self, job):
+        if self.store is None:
+            return
+        try:
+            self.store.write(job)
+        except OSError:
+            pass  # status lookups on other workers are best effort
+
+    def submit(self, user_id, category_id, expenses_df, registry, base=None):
+        """
+        Queue a training job for the expenses, updating base instead of
+        fitting from scratch when given (see plan_training). Returns
+        (job, created); created is False when the request was merged into
+        an existing active job.
+        """
+        from ml_service import fit_model_job
+
+        key = (user_id, category_id or None)
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                return job, False
+
+            job = TrainingJob(user_id, category_id or None)
+            self._jobs[job.id] = job
+            self._active[key] = job
+        self._write(job)
+
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                job.future = executor.submit(fit_model_job, expenses_df, base)
+                break
+            except BrokenProcessPool as e:
+                self._discard_executor(executor)
+                if attempt:
+                    self._finish(job, registry, error=str(e))
+                    return job, True
+            except Exception as e:
+                self._finish(job, registry, error=str(e))
+                return job, True
+
+        job.future.add_done_callback(
+            lambda future: self._finish(job, registry, future=future, executor=executor))
+        return job, True
+
+    def _finish(self, job, registry, future=None, error=None, executor=None):
+        """Save the fitted model (pool callback thread) and close out the job"""
+        if future is not None:
+            try:
+                success, result = future.result()
+                if success:
+                    # The fit ran in a pool process, whose metrics are not scraped
+                    from metrics import observe_ml
+                    observe_ml('fit', result.metrics.get('fit_seconds', 0.0))
+                    result.metrics['model_version'] = registry.save(job.user_id, job.category_id, result)
+                    job.metrics = result.metrics
+                else:
+                    error = result
+            except BrokenProcessPool as e:
+                error = f"Error training model: {str(e)}"
+                if executor is not None:
+                    self._discard_executor(executor)
+            except Exception as e:
+                error = f"Error training model: {str(e)}"
+
+        # Under the lock, so a job seen as finished is never joined by submit
+        with self._lock:
+            job.status = 'failed' if error else 'succeeded'
+            job.error = error
+            job.finished_at = datetime.utcnow()
+            self._active.pop((job.user_id, job.category_id), None)
+            self._finished.append(job.id)
+            while len(self._finished) > self.max_finished_jobs:
+                self._jobs.pop(self._finished.popleft(), None)
+
+        self._write(job)
+        if self.store is not None:
+            self.store.prune()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'active_jobs': len(self._active),
+                'tracked_jobs': len(self._jobs)
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_training_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_training_queue(config=None):
+    """Process-wide training queue, created from the app config on first use"""
+    global _training_queue
+    with _queue_lock:
+        if _training_queue is None:
+            _training_queue = TrainingQueue.from_config(config or {})
+        return _training_queue
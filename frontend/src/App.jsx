@@ -60,7 +60,8 @@ function App() {
     try {
       const res  = await fetch(`${API_BASE}/expenses?user_id=${user.id}&days=${dateRange}`);
       const data = await res.json();
-      if (data.success) setExpenses(data.data);
+      // Categories are side-loaded once per response; attach them to each row
+      if (data.success) setExpenses(data.data.map(e => ({ ...e, category: data.categories[e.category_id] })));
     } catch { showNotification('Failed to load expenses', 'error'); }
     finally { setLoading(false); }
   };
@@ -21,43 +21,24 @@ function Dashboard({ expenses, budgets, categories, dateRange, userId, apiBase }
 
   const fetchAllData = async () => {
     setLoading(true);
-    await Promise.all([
-      fetchSummary(),
-      fetchInsights(),
-      fetchRecommendations()
-    ]);
-    setLoading(false);
-  };
-
-  const fetchSummary = async () => {
     try {
-      const response = await fetch(`${apiBase}/expenses/summary?user_id=${userId}&days=${selectedPeriod}`);
+      // Summary, insights and recommendations come from one request
+      const response = await fetch(`${apiBase}/dashboard?user_id=${userId}&days=${selectedPeriod}`);
       const data = await response.json();
       if (data.success) {
-        setSummary(data.data);
+        setSummary(data.data.summary);
+        setInsights(data.data.insights);
+        setRecommendations(data.data.recommendations || []);
       }
     } catch (error) {
-      console.error('Failed to fetch summary:', error);
-      // Set empty summary if fetch fails
+      console.error('Failed to fetch dashboard:', error);
+      // Set empty data if fetch fails
       setSummary({
         total_spending: 0,
         average_daily: 0,
         category_breakdown: [],
         daily_breakdown: []
       });
-    }
-  };
-
-  const fetchInsights = async () => {
-    try {
-      const response = await fetch(`${apiBase}/insights/spending?user_id=${userId}&days=${selectedPeriod}`);
-      const data = await response.json();
-      if (data.success) {
-        setInsights(data.data);
-      }
-    } catch (error) {
-      console.error('Failed to fetch insights:', error);
-      // Set empty insights if fetch fails
       setInsights({
         total_spending: 0,
         average_daily: 0,
@@ -67,20 +48,9 @@ function Dashboard({ expenses, budgets, categories, dateRange, userId, apiBase }
         category_breakdown: {},
         daily_trend: {}
       });
-    }
-  };
-
-  const fetchRecommendations = async () => {
-    try {
-      const response = await fetch(`${apiBase}/insights/recommendations?user_id=${userId}`);
-      const data = await response.json();
-      if (data.success) {
-        setRecommendations(data.data.recommendations || []);
-      }
-    } catch (error) {
-      console.error('Failed to fetch recommendations:', error);
       setRecommendations([]);
     }
+    setLoading(false);
   };
 
   const handleRefresh = () => {
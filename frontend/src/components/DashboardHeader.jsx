@@ -153,17 +153,10 @@ function DashboardHeader({ user, notifications = [], onLogout, onClearNotificati
     setSaveMessage('');
 
     try {
-      const res = await fetch(`${apiBase}/expenses?user_id=${user.id}&days=365`);
+      const res = await fetch(`${apiBase}/expenses/export?user_id=${user.id}&days=365&format=csv&resumable=false`);
       if (!res.ok) throw new Error('Failed to fetch data');
 
-      const data = await res.json();
-      
-      const expenses = data.data || [];
-      let csv = 'Date,Category,Description,Amount,Notes\n';
-      expenses.forEach(exp => {
-        const date = new Date(exp.date).toLocaleDateString();
-        csv += `"${date}","${exp.category?.name || 'Unknown'}","${exp.description}","₹${exp.amount}","${exp.notes || ''}"\n`;
-      });
+      const csv = await res.text();
 
       const blob = new Blob([csv], { type: 'text/csv' });
       const url = window.URL.createObjectURL(blob);
@@ -29,6 +29,19 @@ function PredictionView({ userId, apiBase, expenses }) {
     }
   };
 
+  // Training runs as a background job on the server; poll until it finishes
+  const waitForTrainingJob = async (jobId) => {
+    for (let attempt = 0; attempt < 120; attempt++) {
+      const response = await fetch(`${apiBase}/predictions/jobs/${jobId}`);
+      const data = await response.json();
+      const status = data.data?.status;
+      if (status === 'succeeded') return data.data;
+      if (status === 'failed') throw new Error(data.data.error || 'Failed to train model');
+      await new Promise(resolve => setTimeout(resolve, 500));
+    }
+    throw new Error('Training is taking longer than expected, please try again');
+  };
+
   const trainAndPredict = async () => {
     setLoading(true);
     setError(null);
@@ -57,6 +70,14 @@ function PredictionView({ userId, apiBase, expenses }) {
         throw new Error(trainData.message || trainData.error || 'Failed to train model');
       }
       
+      try {
+        // No job when the model is already trained on the current expenses
+        if (trainData.job_id) await waitForTrainingJob(trainData.job_id);
+      } catch (trainError) {
+        clearInterval(progressInterval);
+        throw trainError;
+      }
+      
       setTrained(true);
       setProgress(70);
       